@@ -2,15 +2,29 @@
 import pandas as pd
 from pathlib import Path
 
+from enhance_health_group.parquet_store import read_parquet
+
 vantage_dir = Path("enhance_health_group/csv_files/vantage")
 enhance_dir = Path("enhance_health_group/csv_files/enhance_health")
 
+
+def report_files(directory):
+    """Fetched reports in `directory`, as CSV or typed Parquet files"""
+    return sorted(list(directory.glob("*.csv")) + list(directory.glob("*.parquet")))
+
+
+def read_report(path):
+    if path.suffix == ".parquet":
+        return read_parquet(path)
+    return pd.read_csv(path)
+
+
 print("=" * 80)
 print("VANTAGE CSV ANALYSIS")
 print("=" * 80)
 
-for csv_file in sorted(vantage_dir.glob("*.csv")):
-    df = pd.read_csv(csv_file)
+for csv_file in report_files(vantage_dir):
+    df = read_report(csv_file)
     dupes = [c for c in df.columns if '.' in c and c.split('.')[-1].isdigit()]
     print(f"\n{csv_file.name}:")
     print(f"  Columns: {len(df.columns)}")
@@ -24,8 +38,8 @@ print("\n" + "=" * 80)
 print("ENHANCE CSV ANALYSIS")
 print("=" * 80)
 
-for csv_file in sorted(enhance_dir.glob("*.csv")):
-    df = pd.read_csv(csv_file)
+for csv_file in report_files(enhance_dir):
+    df = read_report(csv_file)
     print(f"\n{csv_file.name}:")
     print(f"  Columns: {len(df.columns)}")
     print(f"  All columns: {list(df.columns)[:5]}... ({len(df.columns)} total)")
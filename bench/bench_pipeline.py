@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end benchmark of the report pipelines.
+
+Starts a local mock CollaborateMD API (mock_collaboratemd.py) serving synthetic reports in
+the vantage table layouts, creates a throwaway database on a local Postgres, and times:
+
+  enhance_generate  generate_identifiers.run_all_reports (against the mock run endpoint)
+  enhance_fetch     fetch_and_load_reports.fetch_reports_to_csv(refresh=True)
+  enhance_cached    fetch_reports_to_csv() again, served from the report cache
+  enhance_load      fetch_and_load_reports.load_csvs_to_db()
+  vantage_fetch     vantage pipeline/etl_csv_to_dat_all.fetch_and_generate_dat()
+  vantage_load      vantage pipeline/load_data.load_files_via_insert()
+
+Nothing outside the temporary work directory and the throwaway database is touched;
+both are removed afterwards unless --keep is given. Each run is appended to
+bench/results/history.jsonl and compared with the last run of the same size, so
+regressions show up as slower-than-before steps.
+
+Example:
+  python bench/bench_pipeline.py --pg-host 127.0.0.1 --pg-port 5432 --rows 20000 --accounts 3
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import psycopg2
+
+from mock_collaboratemd import MockCollaborateMD, load_layouts
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+ENHANCE_DIR = os.path.join(REPO_ROOT, 'enhance_health_group')
+VANTAGE_DIR = os.path.join(REPO_ROOT, 'vantage')
+LAYOUT_SQL = os.path.join(VANTAGE_DIR, 'sqlReportApi', 'psql-create.sql')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+HISTORY_FILE = os.path.join(RESULTS_DIR, 'history.jsonl')
+
+STEPS = ('enhance_generate', 'enhance_fetch', 'enhance_cached', 'enhance_load', 'vantage_fetch', 'vantage_load')
+ENHANCE_SCHEMA = 'enhance_bench'
+VANTAGE_SCHEMA = 'vantage_bench'
+INSTANCE_KEY = 'bench'
+# A step is flagged when its best time is this much slower than in the last comparable run
+DEFAULT_REGRESSION_THRESHOLD = 1.25
+
+ENHANCE_CONFIG = """\
+POSTGRES = {postgres!r}
+
+INSTANCES = {{
+    {instance!r}: {{
+        'api_base_url': {base_url!r},
+        'username': 'bench',
+        'password': 'bench',
+        'accounts': {accounts!r},
+        'report_configs': {report_configs!r},
+        'fetch_workers': {fetch_workers},
+        'requests_per_second': 0,
+    }},
+}}
+"""
+
+VANTAGE_CONFIG = """\
+[POSTGRES]
+host = {host}
+user = {user}
+password = {password}
+database = {database}
+port = {port}
+schema = {schema}
+
+[API]
+report_api_base_url = {base_url}
+username = bench
+password = bench
+
+[CUSTOMERS]
+accounts = {accounts!r}
+"""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Offline benchmark of the report pipelines against a mock API')
+    parser.add_argument('--rows', type=int, default=10000, help='rows per report per account (default 10000)')
+    parser.add_argument('--accounts', type=int, default=2, help='number of customer accounts (default 2)')
+    parser.add_argument('--reports', nargs='*', help='report names to include (default: every layout)')
+    parser.add_argument('--steps', nargs='*', choices=STEPS, default=list(STEPS), help='steps to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=1, help='timed runs per step; the best is compared (default 1)')
+    parser.add_argument('--fetch-workers', type=int, default=4)
+    parser.add_argument('--load-workers', type=int, default=4)
+    parser.add_argument('--chunk-rows', type=int, default=None, help='stream the enhance load in chunks of this many rows')
+    parser.add_argument('--commit-mode', choices=('atomic', 'per_table'), default=None,
+                        help='enhance load commit mode (default: the pipeline default)')
+    parser.add_argument('--load-strategy', choices=('swap', 'truncate'), default=None,
+                        help='enhance load strategy (default: the pipeline default)')
+    parser.add_argument('--vantage-load-method', choices=('copy', 'insert'), default='copy')
+    parser.add_argument('--pg-host', default=os.getenv('PGHOST', '127.0.0.1'))
+    parser.add_argument('--pg-port', default=os.getenv('PGPORT', '5432'))
+    parser.add_argument('--pg-user', default=os.getenv('PGUSER', 'postgres'))
+    parser.add_argument('--pg-password', default=os.getenv('PGPASSWORD', ''))
+    parser.add_argument('--pg-admin-db', default='postgres', help='database used to create/drop the throwaway one')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help='slowdown ratio reported as a regression (default 1.25)')
+    parser.add_argument('--fail-on-regression', action='store_true', help='exit with status 1 on a regression')
+    parser.add_argument('--no-save', action='store_true', help='do not append this run to the history')
+    parser.add_argument('--keep', action='store_true', help='keep the work directory and database for inspection')
+    parser.add_argument('--verbose', action='store_true', help='show the pipelines\' own output')
+    return parser.parse_args()
+
+
+def admin_connection(args, database):
+    conn = psycopg2.connect(host=args.pg_host, port=args.pg_port, user=args.pg_user,
+                            password=args.pg_password, dbname=database)
+    conn.autocommit = True
+    return conn
+
+
+def create_database(args, database):
+    with contextlib.closing(admin_connection(args, args.pg_admin_db)) as conn:
+        conn.cursor().execute(f'CREATE DATABASE "{database}"')
+
+
+def drop_database(args, database):
+    with contextlib.closing(admin_connection(args, args.pg_admin_db)) as conn:
+        conn.cursor().execute(f'DROP DATABASE IF EXISTS "{database}" WITH (FORCE)')
+
+
+def seed_database(args, database, mock):
+    """Schemas, account_reports with the mock's identifiers, and the vantage tables"""
+    with contextlib.closing(admin_connection(args, database)) as conn:
+        cursor = conn.cursor()
+        for schema, instance_column in ((ENHANCE_SCHEMA, True), (VANTAGE_SCHEMA, False)):
+            cursor.execute(f"CREATE SCHEMA {schema}")
+            cursor.execute(f"""
+                CREATE TABLE {schema}.account_reports (
+                    id SERIAL PRIMARY KEY,
+                    customer_account VARCHAR(20) NOT NULL,
+                    report_name VARCHAR(100) NOT NULL,
+                    identifier VARCHAR(20) NOT NULL,
+                    status INTEGER DEFAULT 1
+                    {', instance_key VARCHAR(50)' if instance_column else ''}
+                )
+            """)
+            for (account, report_name), identifier in mock.identifiers.items():
+                if instance_column:
+                    cursor.execute(
+                        f"INSERT INTO {schema}.account_reports (customer_account, report_name, identifier, instance_key) "
+                        f"VALUES (%s, %s, %s, %s)", (account, report_name, identifier, INSTANCE_KEY)
+                    )
+                else:
+                    cursor.execute(
+                        f"INSERT INTO {schema}.account_reports (customer_account, report_name, identifier) "
+                        f"VALUES (%s, %s, %s)", (account, report_name, identifier)
+                    )
+
+        cursor.execute(f"SET search_path TO {VANTAGE_SCHEMA}")
+        with open(LAYOUT_SQL, 'r') as f:
+            cursor.execute(f.read())
+        cursor.close()
+
+
+def write_configs(workdir, args, database, base_url, accounts, report_names):
+    config_dir = os.path.join(workdir, 'config')
+    os.makedirs(config_dir)
+
+    postgres = {
+        'host': args.pg_host, 'user': args.pg_user, 'password': args.pg_password, 'database': database,
+        'port': str(args.pg_port), 'schema': ENHANCE_SCHEMA, 'pool_minconn': 1, 'pool_maxconn': 10,
+    }
+    report_configs = [
+        {'report_id': str(1000 + i), 'filter_id': str(2000 + i), 'name': name} for i, name in enumerate(report_names)
+    ]
+    with open(os.path.join(config_dir, 'config.py'), 'w') as f:
+        f.write(ENHANCE_CONFIG.format(postgres=postgres, instance=INSTANCE_KEY, base_url=base_url, accounts=accounts,
+                                      report_configs=report_configs, fetch_workers=args.fetch_workers))
+    with open(os.path.join(config_dir, 'config.ini'), 'w') as f:
+        f.write(VANTAGE_CONFIG.format(host=args.pg_host, user=args.pg_user, password=args.pg_password,
+                                      database=database, port=args.pg_port, schema=VANTAGE_SCHEMA,
+                                      base_url=base_url, accounts=accounts))
+
+    return {config['report_id']: config['name'] for config in report_configs}
+
+
+def reset_tree(path):
+    shutil.rmtree(path, ignore_errors=True)
+
+
+@contextlib.contextmanager
+def quiet(enabled):
+    """Swallow the pipelines' console output unless --verbose"""
+    if not enabled:
+        yield
+        return
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink):
+        yield
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_steps(args, workdir, database, mock):
+    """Import the pipelines from `workdir` (they read config/ relative to the cwd) and time each step"""
+    sys.path[:0] = [ENHANCE_DIR, REPO_ROOT, VANTAGE_DIR]
+    os.chdir(workdir)
+
+    import instrumentation
+    import fetch_and_load_reports as enhance
+    from pipeline import etl_csv_to_dat_all, load_data
+
+    vantage_conn = psycopg2.connect(host=args.pg_host, port=args.pg_port, user=args.pg_user,
+                                    password=args.pg_password, dbname=database)
+
+    def enhance_generate():
+        import generate_identifiers
+        generate_identifiers.run_all_reports(max_workers=args.fetch_workers)
+
+    def enhance_fetch():
+        reset_tree('csv_files')
+        enhance.fetch_reports_to_csv(refresh=True)
+
+    def enhance_cached():
+        reset_tree('csv_files')
+        enhance.fetch_reports_to_csv()
+
+    def enhance_load():
+        options = {'commit_mode': args.commit_mode, 'load_strategy': args.load_strategy}
+        enhance.load_csvs_to_db(load_workers=args.load_workers, chunk_rows=args.chunk_rows,
+                                **{name: value for name, value in options.items() if value is not None})
+
+    def vantage_fetch():
+        reset_tree('dat_files')
+        # Time a cold fetch: drop the archives the previous repeat left in the client's cache
+        api = etl_csv_to_dat_all.config['API']
+        etl_csv_to_dat_all.get_report_client(api['report_api_base_url'], api['username'], api['password']).clear_cache()
+        etl_csv_to_dat_all.fetch_and_generate_dat()
+
+    def vantage_load():
+        cursor = vantage_conn.cursor()
+        load_data.load_files_via_insert(cursor, 'dat_files', schema=VANTAGE_SCHEMA,
+                                        load_method=args.vantage_load_method)
+        vantage_conn.commit()
+        # Untimed: leave the tables empty for the next repeat
+        cursor.execute(f"SET search_path TO {VANTAGE_SCHEMA}")
+        for table in load_data_tables(cursor):
+            cursor.execute(f'TRUNCATE TABLE "{table}"')
+        vantage_conn.commit()
+        cursor.close()
+
+    step_functions = {
+        'enhance_generate': enhance_generate,
+        'enhance_fetch': enhance_fetch,
+        'enhance_cached': enhance_cached,
+        'enhance_load': enhance_load,
+        'vantage_fetch': vantage_fetch,
+        'vantage_load': vantage_load,
+    }
+
+    # A load needs its fetch output; run the fetch once, untimed, if it was not selected
+    prerequisites = {'enhance_cached': 'enhance_fetch', 'enhance_load': 'enhance_fetch', 'vantage_load': 'vantage_fetch'}
+
+    results = {}
+    try:
+        for step in STEPS:
+            if step not in args.steps:
+                continue
+
+            prerequisite = prerequisites.get(step)
+            if prerequisite and prerequisite not in args.steps and prerequisite not in results:
+                print(f"→ {prerequisite} (untimed, needed by {step})")
+                with quiet(not args.verbose):
+                    step_functions[prerequisite]()
+                results[prerequisite] = None
+
+            timings = []
+            stages = None
+            for _ in range(max(1, args.repeat)):
+                instrumentation.reset_run_metrics()
+                requests_before = mock.requests
+                started = time.perf_counter()
+                with quiet(not args.verbose):
+                    step_functions[step]()
+                timings.append(time.perf_counter() - started)
+                stages = instrumentation.get_run_metrics().report()
+                requests = mock.requests - requests_before
+
+            results[step] = {
+                'seconds': [round(t, 4) for t in timings],
+                'best': round(min(timings), 4),
+                'median': round(statistics.median(timings), 4),
+                'api_requests': requests,
+                'stages': stages['stages'][:10],
+                'counters': stages['counters'],
+            }
+            print(f"✓ {step:<18} best {min(timings):8.2f}s  median {statistics.median(timings):8.2f}s  "
+                  f"({requests} API request(s))")
+    finally:
+        vantage_conn.close()
+        instrumentation.reset_run_metrics()
+
+    return {step: result for step, result in results.items() if result is not None}
+
+
+def load_data_tables(cursor):
+    cursor.execute("""
+        SELECT table_name FROM information_schema.tables
+        WHERE table_schema = %s AND table_type = 'BASE TABLE' AND table_name <> 'account_reports'
+    """, (VANTAGE_SCHEMA,))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def load_history():
+    if not os.path.exists(HISTORY_FILE):
+        return []
+    with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare_with_previous(run, history, threshold):
+    """Print each step against the last run with the same parameters; returns the regressed steps"""
+    previous = next((entry for entry in reversed(history) if entry['params'] == run['params']), None)
+    if previous is None:
+        print("\nNo earlier run with the same parameters to compare against")
+        return []
+
+    print(f"\nCompared with {previous['timestamp']} ({previous.get('git_commit') or 'unknown commit'}):")
+    regressions = []
+    for step, result in run['steps'].items():
+        before = previous['steps'].get(step)
+        if not before:
+            continue
+        ratio = result['best'] / before['best'] if before['best'] else float('inf')
+        marker = '⚠' if ratio > threshold else '✓'
+        print(f"  {marker} {step:<18} {before['best']:8.2f}s → {result['best']:8.2f}s  ({ratio:.2f}x)")
+        if ratio > threshold:
+            regressions.append(step)
+    return regressions
+
+
+def main():
+    args = parse_args()
+
+    layouts = load_layouts(LAYOUT_SQL)
+    if args.reports:
+        unknown = sorted(set(args.reports) - set(layouts))
+        if unknown:
+            sys.exit(f"Unknown report(s): {', '.join(unknown)} (available: {', '.join(sorted(layouts))})")
+        layouts = {name: layouts[name] for name in args.reports}
+
+    accounts = [str(90000001 + i) for i in range(args.accounts)]
+    database = f"etl_bench_{time.strftime('%Y%m%d%H%M%S')}_{os.getpid()}"
+    workdir = tempfile.mkdtemp(prefix='etl_bench_')
+    cwd = os.getcwd()
+
+    print(f"Building {len(layouts)} report(s) x {len(accounts)} account(s) x {args.rows} rows...")
+    mock = MockCollaborateMD(layouts, accounts, args.rows)
+    print(f"✓ {mock.payload_bytes / 1024 / 1024:.1f} MB of report payloads")
+
+    base_url = mock.start()
+    create_database(args, database)
+    try:
+        seed_database(args, database, mock)
+        report_ids = write_configs(workdir, args, database, base_url, accounts, list(layouts))
+        mock.report_ids = report_ids
+        print(f"✓ Mock API at {base_url}, database {database}, work dir {workdir}\n")
+
+        steps = run_steps(args, workdir, database, mock)
+    finally:
+        os.chdir(cwd)
+        mock.stop()
+        if args.keep:
+            print(f"\nKept work dir {workdir} and database {database}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+            # The pipelines keep pooled connections open; FORCE closes them
+            drop_database(args, database)
+
+    run = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'params': {
+            'rows': args.rows, 'accounts': args.accounts, 'reports': sorted(layouts),
+            'fetch_workers': args.fetch_workers, 'load_workers': args.load_workers,
+            'chunk_rows': args.chunk_rows, 'vantage_load_method': args.vantage_load_method,
+            'commit_mode': args.commit_mode, 'load_strategy': args.load_strategy,
+        },
+        'payload_bytes': mock.payload_bytes,
+        'steps': steps,
+    }
+
+    regressions = compare_with_previous(run, load_history(), args.threshold)
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        with open(HISTORY_FILE, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(run) + '\n')
+        print(f"\n✓ Results appended to {os.path.relpath(HISTORY_FILE, cwd)}")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
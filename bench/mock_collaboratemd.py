@@ -0,0 +1,192 @@
+"""
+Local stand-in for the CollaborateMD report API, serving synthetic reports.
+
+Report layouts come from the CREATE TABLE statements in vantage/sqlReportApi/psql-create.sql.
+Every (report, account) result is a CSV of `rows` synthetic rows in a ZIP archive,
+base64-encoded in the <Data> element of an XML response, like the real API. Payloads are
+built before the server starts, so benchmarks time the clients, not the generator.
+
+Endpoints (POST, under /v1):
+  /customer/{account}/reports/{report_id}/filter/{filter_id}/run   -> new identifier
+  /customer/{account}/reports/results/{identifier}                  -> report data
+"""
+
+import base64
+import csv
+import io
+import random
+import re
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+API_NAMESPACE = 'http://www.collaboratemd.com/api/v1/'
+FIRST_IDENTIFIER = 20000000
+
+CREATE_TABLE_PATTERN = re.compile(r'CREATE TABLE\s+(\w+)\s*\((.*?)\);', re.IGNORECASE | re.DOTALL)
+RUN_PATH_PATTERN = re.compile(r'^/v1/customer/(\w+)/reports/(\w+)/filter/(\w+)/run$')
+RESULTS_PATH_PATTERN = re.compile(r'^/v1/customer/(\w+)/reports/results/(\w+)$')
+CURRENCY_COLUMN_PATTERN = re.compile(r'(^|_)(amount|balance|payments|paid|adjustments|applied|credits)(_|$)')
+
+
+def load_layouts(create_sql_path):
+    """{report_name: [column, ...]} from a file of CREATE TABLE statements, without customer_account"""
+    with open(create_sql_path, 'r') as f:
+        sql = f.read()
+
+    layouts = {}
+    for table, body in CREATE_TABLE_PATTERN.findall(sql):
+        columns = [line.strip().split()[0] for line in body.splitlines() if line.strip() and not line.strip().startswith('--')]
+        layouts[table] = [col for col in columns if col != 'customer_account']
+    return layouts
+
+
+def header_for(column):
+    """Report header for a snake_case column, e.g. charge_cpt_code -> Charge Cpt Code"""
+    return ' '.join(word.capitalize() for word in column.split('_'))
+
+
+def column_values(column, rows, account_index, rng):
+    """Synthetic values shaped like the real column: dates, ids, money, counts or short text"""
+    if 'date' in column and 'age' not in column:
+        return [f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/{rng.randint(2022, 2025)}" for _ in range(rows)]
+    if column.endswith('_id') or column.endswith('_id_dup'):
+        # Unique across accounts: ar_aging.charge_id is a primary key in the vantage schema
+        return [f"{account_index + 1}{row:07d}" for row in range(rows)]
+    if CURRENCY_COLUMN_PATTERN.search(column):
+        return [f"${rng.uniform(-500, 25000):,.2f}" for _ in range(rows)]
+    if 'days' in column or 'times' in column or column.endswith('_count'):
+        return [str(rng.randint(0, 720)) for _ in range(rows)]
+
+    initials = ''.join(word[0] for word in column.split('_')).upper()
+    return [f"{initials}{rng.randint(0, 49)}" for _ in range(rows)]
+
+
+def build_report_csv(columns, rows, account_index, seed=0):
+    rng = random.Random(f"{seed}-{account_index}-{','.join(columns)}")
+    values = [column_values(col, rows, account_index, rng) for col in columns]
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow([header_for(col) for col in columns])
+    writer.writerows(zip(*values))
+    return buffer.getvalue().encode('utf-8')
+
+
+def results_response(csv_bytes, member_name='report.csv'):
+    """The XML body of a report results response carrying `csv_bytes` as a base64 ZIP"""
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr(member_name, csv_bytes)
+    data = base64.b64encode(archive.getvalue()).decode('ascii')
+    return f"<ReportResultsResponse><Status>SUCCESS</Status><Data>{data}</Data></ReportResultsResponse>".encode('utf-8')
+
+
+def run_response(identifier):
+    return (
+        f'<ns1:ReportRunResponse xmlns:ns1="{API_NAMESPACE}">'
+        f'<ns1:Status>SUCCESS</ns1:Status>'
+        f'<ns1:Identifier>{identifier}</ns1:Identifier>'
+        f'<ns1:StatusMessage>Report run started</ns1:StatusMessage>'
+        f'</ns1:ReportRunResponse>'
+    ).encode('utf-8')
+
+
+class MockCollaborateMD:
+    """
+    Threaded mock API server. `reports` is {report_name: [column, ...]}; each account gets
+    `rows` rows per report. `identifiers` maps the initial identifier of every
+    (account, report) pair, ready to seed account_reports.
+    """
+
+    def __init__(self, reports, accounts, rows, report_ids=None, seed=0):
+        self.reports = reports
+        self.accounts = list(accounts)
+        self.rows = rows
+        # report_id -> report_name, for the run endpoint
+        self.report_ids = report_ids or {}
+        self._lock = threading.Lock()
+        self._next_identifier = FIRST_IDENTIFIER
+        self._payloads = {}
+        self._by_identifier = {}
+        self.identifiers = {}
+        self.requests = 0
+        self.bytes_served = 0
+
+        for account_index, account in enumerate(self.accounts):
+            for report_name, columns in reports.items():
+                csv_bytes = build_report_csv(columns, rows, account_index, seed)
+                self._payloads[(account, report_name)] = results_response(csv_bytes, f"{report_name}.csv")
+                self.identifiers[(account, report_name)] = self._new_identifier(account, report_name)
+
+        self._server = None
+        self._thread = None
+
+    def _new_identifier(self, account, report_name):
+        with self._lock:
+            identifier = str(self._next_identifier)
+            self._next_identifier += 1
+            self._by_identifier[identifier] = (account, report_name)
+        return identifier
+
+    @property
+    def payload_bytes(self):
+        return sum(len(payload) for payload in self._payloads.values())
+
+    def handle(self, path):
+        """(status, body) for a POST to `path`"""
+        match = RESULTS_PATH_PATTERN.match(path)
+        if match:
+            account, identifier = match.groups()
+            key = self._by_identifier.get(identifier)
+            if key is None or key[0] != account:
+                return 404, b'<Error>Unknown identifier</Error>'
+            return 200, self._payloads[key]
+
+        match = RUN_PATH_PATTERN.match(path)
+        if match:
+            account, report_id, _ = match.groups()
+            report_name = self.report_ids.get(report_id)
+            if report_name is None or (account, report_name) not in self._payloads:
+                return 404, b'<Error>Unknown report</Error>'
+            return 200, run_response(self._new_identifier(account, report_name))
+
+        return 404, b'<Error>Not found</Error>'
+
+    def start(self, host='127.0.0.1', port=0):
+        """Serve on a background thread; returns the API base URL"""
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+
+                status, body = mock.handle(self.path)
+                with mock._lock:
+                    mock.requests += 1
+                    mock.bytes_served += len(body)
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/xml')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return f"http://{host}:{self._server.server_port}/v1"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,150 @@
+"""
+Command line entry point for the Enhance Health Group pipeline.
+
+    python cli.py generate [--workers N]
+    python cli.py fetch    [--fetch-workers N] [--refresh] [--format csv|parquet]
+    python cli.py load     [--method copy|insert] [--load-workers N] [--commit-mode ...]
+                           [--strategy swap|truncate] [--view-mode view|materialized] [--chunk-rows N]
+    python cli.py views    [--view-mode view|materialized]
+    python cli.py all      [fetch and load options] [--skip-generate]
+
+Each stage imports only the modules it runs: `--help` and `generate` never import pandas or
+SQLAlchemy. Options left unset fall back to the defaults in fetch_and_load_reports.py.
+fetch, load, views and all record their completed units in run_ledger.sqlite; with
+`--resume` they skip the units the last failed run already completed.
+"""
+
+import argparse
+import sys
+
+from instrumentation import get_run_metrics
+from run_ledger import RunLedger, GENERATED, ALL_UNITS
+
+
+def _options(args, names):
+    """{parameter: value} for the options given on the command line"""
+    return {param: getattr(args, option) for option, param in names.items() if getattr(args, option) is not None}
+
+
+FETCH_OPTIONS = {'fetch_workers': 'max_workers', 'refresh': 'refresh', 'format': 'intermediate_format'}
+LOAD_OPTIONS = {'method': 'load_method', 'load_workers': 'load_workers', 'commit_mode': 'commit_mode',
+                'strategy': 'load_strategy', 'view_mode': 'view_mode', 'chunk_rows': 'chunk_rows'}
+
+
+def run_generate(args):
+    import generate_identifiers
+    generate_identifiers.run_all_reports(max_workers=args.workers)
+
+
+def run_fetch(args):
+    import fetch_and_load_reports
+    fetch_and_load_reports.fetch_reports_to_csv(ledger=args.ledger, **_options(args, FETCH_OPTIONS))
+
+
+def run_load(args):
+    import fetch_and_load_reports
+    from db_pool import get_pool
+    fetch_and_load_reports.load_csvs_to_db(ledger=args.ledger, **_options(args, LOAD_OPTIONS))
+    get_pool(fetch_and_load_reports.config_loader.get_postgres_config()).print_stats()
+
+
+def run_views(args):
+    import fetch_and_load_reports
+    fetch_and_load_reports.rebuild_views(ledger=args.ledger, **_options(args, {'view_mode': 'view_mode'}))
+
+
+def run_all(args):
+    if args.skip_generate:
+        pass
+    elif args.ledger.completed(ALL_UNITS, ALL_UNITS, GENERATED) is not None:
+        print("→ Skipped generate: completed in the resumed run")
+    else:
+        run_generate(args)
+        args.ledger.record(ALL_UNITS, ALL_UNITS, GENERATED)
+    run_fetch(args)
+    run_load(args)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Enhance Health Group ETL pipeline')
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    subparsers.required = True
+
+    fetch_options = argparse.ArgumentParser(add_help=False)
+    fetch_options.add_argument('--fetch-workers', type=int, default=None,
+                               help='Instances fetched concurrently (default: all)')
+    fetch_options.add_argument('--refresh', action='store_true', default=None,
+                               help='Download every report again instead of using report_cache/')
+    fetch_options.add_argument('--format', choices=('csv', 'parquet'), default=None,
+                               help='Intermediate file format (default: csv)')
+
+    load_options = argparse.ArgumentParser(add_help=False)
+    load_options.add_argument('--method', choices=('copy', 'insert'), default=None,
+                              help='COPY FROM STDIN or DataFrame.to_sql (default: copy)')
+    load_options.add_argument('--load-workers', type=int, default=None,
+                              help='Tables loaded concurrently (default: 4)')
+    load_options.add_argument('--commit-mode', choices=('atomic', 'per_table'), default=None,
+                              help='Commit all tables together or one by one (default: atomic)')
+    load_options.add_argument('--strategy', choices=('swap', 'truncate'), default=None,
+                              help='Load through staging tables or in place (default: swap)')
+    load_options.add_argument('--chunk-rows', type=int, default=None,
+                              help='Stream each CSV in chunks of this many rows (default: read whole)')
+
+    resume_options = argparse.ArgumentParser(add_help=False)
+    resume_options.add_argument('--resume', action='store_true',
+                                help='Skip the units the last failed run already completed')
+
+    view_options = argparse.ArgumentParser(add_help=False)
+    view_options.add_argument('--view-mode', choices=('view', 'materialized'), default=None,
+                              help='Plain or materialized reporting views (default: view)')
+
+    generate = subparsers.add_parser('generate', help='Start report runs and record their identifiers')
+    generate.add_argument('--workers', '-w', type=int, default=None,
+                          help='Report runs requested concurrently (default: sum of instance generate_workers up to 32)')
+    generate.set_defaults(func=run_generate, pipeline='generate_identifiers', resume=None)
+
+    fetch = subparsers.add_parser('fetch', parents=[fetch_options, resume_options], help='Download report results to csv_files/')
+    fetch.set_defaults(func=run_fetch, pipeline='etl')
+
+    load = subparsers.add_parser('load', parents=[load_options, view_options, resume_options],
+                                 help='Load csv_files/ into Postgres and rebuild the views')
+    load.set_defaults(func=run_load, pipeline='etl')
+
+    views = subparsers.add_parser('views', parents=[view_options, resume_options], help='Rebuild the reporting views only')
+    views.set_defaults(func=run_views, pipeline='etl')
+
+    run_everything = subparsers.add_parser('all', parents=[fetch_options, load_options, view_options, resume_options],
+                                           help='generate, fetch and load in one run')
+    run_everything.add_argument('--workers', '-w', type=int, default=None, help='Report runs requested concurrently')
+    run_everything.add_argument('--skip-generate', action='store_true', help='Fetch the current identifiers without new runs')
+    run_everything.set_defaults(func=run_all, pipeline='etl')
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    # Timings and row counts end up in run_reports/ (and ETL_PROMETHEUS_TEXTFILE when set)
+    metrics = get_run_metrics(args.pipeline)
+    # Identifier generation always starts new report runs, so it is not checkpointed
+    args.ledger = None
+    if args.resume is not None:
+        args.ledger = RunLedger()
+        args.ledger.start('etl', resume=args.resume)
+
+    status = 'failed'
+    try:
+        args.func(args)
+        status = 'ok'
+    except KeyboardInterrupt:
+        print('\nInterrupted by user')
+        sys.exit(1)
+    finally:
+        if args.ledger is not None:
+            args.ledger.finish(status)
+        metrics.finish(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,10 @@
 # - Define INSTANCES as a dict mapping instance_key -> configuration dict
 # - Each instance dict can include a "report_configs" list which is
 #   a list of {"report_id": "<id>", "name": "<name>"} mappings.
+# - A report config may add "numeric_columns" / "text_columns" lists (snake_case
+#   column names) to force or exempt columns from the money-column parsing at load.
+# - Optional "fetch_workers" (default 4) and "requests_per_second" (default 2.0)
+#   bound the concurrent report result downloads for that instance.
 #
 # Keep secrets out of VCS in production. Use environment variables to override
 # values via the existing ConfigLoader._get_env_override mechanism.
@@ -15,6 +19,8 @@ POSTGRES = {
     'database': 'REVETLCUSPRODDB',
     'port': '5432',
     'schema': 'enhance_health_group',
+    'pool_minconn': 1,   # shared psycopg2 pool used by generate_identifiers and fetch_and_load_reports
+    'pool_maxconn': 10,
 }
 
 INSTANCES = {
@@ -1,9 +1,108 @@
 import ast
 import os
 import importlib.util
+import threading
 from configparser import RawConfigParser
 from typing import Dict, List, Tuple
 
+# Defaults for the concurrent report fetch engine (overridable per instance)
+DEFAULT_FETCH_WORKERS = 4
+DEFAULT_REQUESTS_PER_SECOND = 2.0
+# Report runs generate_identifiers keeps in flight per instance (overridable per instance)
+DEFAULT_GENERATE_WORKERS = 4
+
+# Defaults for the shared psycopg2 connection pool
+DEFAULT_POOL_MINCONN = 1
+DEFAULT_POOL_MAXCONN = 10
+
+
+class _FrozenConfig:
+    """
+    Immutable, slot-based config record with read-only dict-style access, so existing
+    `config['key']` / `config.get('key')` callers keep working. Unset (None) optional
+    fields behave like missing dict keys.
+    """
+    __slots__ = ()
+
+    def __init__(self, **values):
+        for field in self.__slots__:
+            object.__setattr__(self, field, values.get(field))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.__slots__ and getattr(self, key) is not None
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def keys(self):
+        return [field for field in self.__slots__ if getattr(self, field) is not None]
+
+    def items(self):
+        return [(field, getattr(self, field)) for field in self.keys()]
+
+    def to_dict(self) -> Dict:
+        return dict(self.items())
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.__slots__)
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, field) for field in self.__slots__))
+
+    def __repr__(self):
+        fields = ', '.join(
+            f"{field}={'***' if field == 'password' else repr(value)}" for field, value in self.items()
+        )
+        return f"{type(self).__name__}({fields})"
+
+
+def _freeze_list(value):
+    # Lists become tuples; anything else is kept as-is so validate_instances can report it
+    return tuple(value) if isinstance(value, list) else value
+
+
+class ReportConfig(_FrozenConfig):
+    """One report of an instance: {'report_id', 'filter_id', 'name', 'numeric_columns', 'text_columns'}"""
+    __slots__ = ('report_id', 'filter_id', 'name', 'numeric_columns', 'text_columns')
+
+    @classmethod
+    def from_raw(cls, raw):
+        """Build from a report_configs entry; entries that are not dicts are returned unchanged"""
+        if not isinstance(raw, dict):
+            return raw
+        values = dict(raw)
+        for option in ('numeric_columns', 'text_columns'):
+            values[option] = _freeze_list(values.get(option))
+        return cls(**values)
+
+
+class InstanceConfig(_FrozenConfig):
+    """One Collaboratemd instance, as described in ConfigLoader.get_instances"""
+    __slots__ = ('instance_key', 'api_base_url', 'username', 'password', 'accounts', 'report_configs',
+                 'fetch_workers', 'requests_per_second', 'generate_workers')
+
+    @classmethod
+    def from_raw(cls, raw):
+        values = dict(raw)
+        values['accounts'] = _freeze_list(values.get('accounts'))
+        reports = values.get('report_configs')
+        values['report_configs'] = tuple(ReportConfig.from_raw(r) for r in reports) if isinstance(reports, list) else reports
+        return cls(**values)
+
 
 class ConfigLoader:
     """
@@ -11,22 +110,59 @@ class ConfigLoader:
     Supports both legacy single-instance and new multi-instance configurations.
 
     This loader now accepts either an INI file path (default) or a Python module file path (e.g. 'config/config.py').
+
+    Nothing is read until the first lookup. The file and environment overrides are then parsed
+    once into immutable InstanceConfig / ReportConfig objects, and every lookup is served from
+    that cache. Call `invalidate()` to re-read the file and the environment.
     """
 
     def __init__(self, config_path: str = 'config/config.ini'):
         self.config_path = config_path
-        self._py_config = None
-
-        # If the config path ends with .py load it as a python module
-        if config_path.endswith('.py') and os.path.exists(config_path):
-            spec = importlib.util.spec_from_file_location('config_module', config_path)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)  # type: ignore
-            self._py_config = module
-            self.config = RawConfigParser()  # keep for compatibility with INI-based methods
-        else:
-            self.config = RawConfigParser()
-            self.config.read(config_path)
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._py_config_module = None
+        self._ini_config = None
+        self._instances = None
+        self._postgres_config = None
+        self._report_configs = {}
+        self._numeric_column_rules = None
+
+    def invalidate(self):
+        """Drop everything parsed so far; the next lookup re-reads the file and the environment"""
+        with self._lock:
+            self._loaded = False
+            self._py_config_module = None
+            self._ini_config = None
+            self._instances = None
+            self._postgres_config = None
+            self._report_configs = {}
+            self._numeric_column_rules = None
+
+    def _load_source(self):
+        with self._lock:
+            if self._loaded:
+                return
+            # If the config path ends with .py load it as a python module
+            if self.config_path.endswith('.py') and os.path.exists(self.config_path):
+                spec = importlib.util.spec_from_file_location('config_module', self.config_path)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)  # type: ignore
+                self._py_config_module = module
+                self._ini_config = RawConfigParser()  # keep for compatibility with INI-based methods
+            else:
+                self._ini_config = RawConfigParser()
+                self._ini_config.read(self.config_path)
+            self._loaded = True
+
+    @property
+    def _py_config(self):
+        self._load_source()
+        return self._py_config_module
+
+    @property
+    def config(self) -> RawConfigParser:
+        self._load_source()
+        return self._ini_config
 
     def _get_env_override(self, section: str, key: str, fallback=None):
         """Check for environment variable override: SECTION_KEY format"""
@@ -42,9 +178,10 @@ class ConfigLoader:
 
         return self.config.has_section('INSTANCES')
 
-    def get_instances(self) -> Dict[str, Dict]:
+    def get_instances(self) -> Dict[str, InstanceConfig]:
         """
         Returns a dictionary of instances with their configuration.
+        Each value is an InstanceConfig, readable like the dicts below; lists become tuples.
 
         Multi-instance format (INI)
         [INSTANCES]
@@ -64,6 +201,9 @@ class ConfigLoader:
                 'password': '...'
                 'accounts': [...]
                 'report_configs': [ {'report_id': '...', 'name': '...'}, ... ]
+                'fetch_workers': 4,             # optional, concurrent result downloads
+                'requests_per_second': 2.0,     # optional, API rate limit (0 disables)
+                'generate_workers': 4,          # optional, report runs generated concurrently
             }
         }
 
@@ -82,12 +222,23 @@ class ConfigLoader:
                 'username': '...',
                 'password': '...',
                 'accounts': ['...'],
-                'instance_key': 'default'
+                'instance_key': 'default',
+                'fetch_workers': 4,
+                'requests_per_second': 2.0,
+                'generate_workers': 4
             },
             'instance_key1': {...},
             ...
         }
         """
+        with self._lock:
+            if self._instances is None:
+                self._instances = {
+                    key: InstanceConfig.from_raw(raw) for key, raw in self._parse_instances().items()
+                }
+            return dict(self._instances)
+
+    def _parse_instances(self) -> Dict[str, Dict]:
         instances = {}
 
         if self._py_config is not None and hasattr(self._py_config, 'INSTANCES'):
@@ -116,7 +267,17 @@ class ConfigLoader:
                     'username': username,
                     'password': password,
                     'accounts': accounts,
-                    'report_configs': raw.get('report_configs', [])
+                    'report_configs': raw.get('report_configs', []),
+                    'fetch_workers': self._get_env_override(
+                        section_prefix, 'fetch_workers', raw.get('fetch_workers', DEFAULT_FETCH_WORKERS)
+                    ),
+                    'requests_per_second': self._get_env_override(
+                        section_prefix, 'requests_per_second',
+                        raw.get('requests_per_second', DEFAULT_REQUESTS_PER_SECOND)
+                    ),
+                    'generate_workers': self._get_env_override(
+                        section_prefix, 'generate_workers', raw.get('generate_workers', DEFAULT_GENERATE_WORKERS)
+                    ),
                 }
 
         elif self._is_multi_instance_config():
@@ -154,7 +315,22 @@ class ConfigLoader:
                         self.config.get(section, 'accounts')
                     ),
                     # No per-instance reports in INI mode; fallback to global REPORTS
-                    'report_configs': []
+                    'report_configs': [],
+                    'fetch_workers': self._get_env_override(
+                        section.replace(':', '_'),
+                        'fetch_workers',
+                        self.config.get(section, 'fetch_workers', fallback=DEFAULT_FETCH_WORKERS)
+                    ),
+                    'requests_per_second': self._get_env_override(
+                        section.replace(':', '_'),
+                        'requests_per_second',
+                        self.config.get(section, 'requests_per_second', fallback=DEFAULT_REQUESTS_PER_SECOND)
+                    ),
+                    'generate_workers': self._get_env_override(
+                        section.replace(':', '_'),
+                        'generate_workers',
+                        self.config.get(section, 'generate_workers', fallback=DEFAULT_GENERATE_WORKERS)
+                    ),
                 }
         else:
             # Legacy single-instance mode
@@ -178,9 +354,36 @@ class ConfigLoader:
                 'accounts': ast.literal_eval(
                     self.config.get('CUSTOMERS', 'accounts')
                 ),
-                'report_configs': []
+                'report_configs': [],
+                'fetch_workers': self._get_env_override(
+                    'API',
+                    'fetch_workers',
+                    self.config.get('API', 'fetch_workers', fallback=DEFAULT_FETCH_WORKERS)
+                ),
+                'requests_per_second': self._get_env_override(
+                    'API',
+                    'requests_per_second',
+                    self.config.get('API', 'requests_per_second', fallback=DEFAULT_REQUESTS_PER_SECOND)
+                ),
+                'generate_workers': self._get_env_override(
+                    'API',
+                    'generate_workers',
+                    self.config.get('API', 'generate_workers', fallback=DEFAULT_GENERATE_WORKERS)
+                ),
             }
 
+        # Env overrides and INI values arrive as strings
+        for instance in instances.values():
+            for option in ('fetch_workers', 'generate_workers'):
+                try:
+                    instance[option] = int(instance[option])
+                except (TypeError, ValueError):
+                    pass
+            try:
+                instance['requests_per_second'] = float(instance['requests_per_second'])
+            except (TypeError, ValueError):
+                pass
+
         return instances
 
     def get_instance(self, instance_key: str) -> Dict:
@@ -195,6 +398,12 @@ class ConfigLoader:
 
     def get_postgres_config(self) -> Dict:
         """Get PostgreSQL configuration (shared across all instances)"""
+        with self._lock:
+            if self._postgres_config is None:
+                self._postgres_config = self._parse_postgres_config()
+            return dict(self._postgres_config)
+
+    def _parse_postgres_config(self) -> Dict:
         # If python config module provides POSTGRES, prefer it
         if self._py_config is not None and hasattr(self._py_config, 'POSTGRES'):
             pg = getattr(self._py_config, 'POSTGRES')
@@ -205,6 +414,12 @@ class ConfigLoader:
                 'database': self._get_env_override('POSTGRES', 'database', pg.get('database')),
                 'port': self._get_env_override('POSTGRES', 'port', pg.get('port', '5432')),
                 'schema': self._get_env_override('POSTGRES', 'schema', pg.get('schema', 'public')),
+                'pool_minconn': int(self._get_env_override(
+                    'POSTGRES', 'pool_minconn', pg.get('pool_minconn', DEFAULT_POOL_MINCONN)
+                )),
+                'pool_maxconn': int(self._get_env_override(
+                    'POSTGRES', 'pool_maxconn', pg.get('pool_maxconn', DEFAULT_POOL_MAXCONN)
+                )),
             }
 
         return {
@@ -238,28 +453,44 @@ class ConfigLoader:
                 'schema',
                 self.config.get('POSTGRES', 'schema', fallback='public')
             ),
+            'pool_minconn': int(self._get_env_override(
+                'POSTGRES',
+                'pool_minconn',
+                self.config.get('POSTGRES', 'pool_minconn', fallback=DEFAULT_POOL_MINCONN)
+            )),
+            'pool_maxconn': int(self._get_env_override(
+                'POSTGRES',
+                'pool_maxconn',
+                self.config.get('POSTGRES', 'pool_maxconn', fallback=DEFAULT_POOL_MAXCONN)
+            )),
         }
 
-    def get_report_configs(self, instance_key: str = None) -> List[Dict]:
+    def get_report_configs(self, instance_key: str = None) -> List[ReportConfig]:
         """Get report configurations.
 
         If instance_key is provided and the configuration is python-module-based, return
         that instance's `report_configs`. For INI-based configs this method falls back
         to the legacy REPORTS section (global across instances).
         """
+        with self._lock:
+            if instance_key not in self._report_configs:
+                self._report_configs[instance_key] = self._parse_report_configs(instance_key)
+            return list(self._report_configs[instance_key])
+
+    def _parse_report_configs(self, instance_key: str = None) -> Tuple:
         # Python module per-instance reports
         if self._py_config is not None:
             if instance_key:
                 instances = self.get_instances()
                 if instance_key not in instances:
                     raise ValueError(f"Instance '{instance_key}' not found")
-                return instances[instance_key].get('report_configs', []) or []
+                return tuple(instances[instance_key].get('report_configs', ()))
 
             # No instance key provided: try GLOBAL_REPORTS in python config
             if hasattr(self._py_config, 'GLOBAL_REPORTS'):
-                return getattr(self._py_config, 'GLOBAL_REPORTS') or []
+                return tuple(ReportConfig.from_raw(r) for r in getattr(self._py_config, 'GLOBAL_REPORTS') or [])
 
-            return []
+            return ()
 
         # INI-based legacy behavior: return global REPORTS if present
         if self.config.has_section('REPORTS'):
@@ -272,14 +503,41 @@ class ConfigLoader:
             for report_id in report_ids:
                 report_id_str = str(report_id)
                 if report_id_str in report_names:
-                    report_configs.append({
-                        'report_id': report_id_str,
-                        'name': self.config.get('REPORT_NAMES', report_id_str)
-                    })
+                    report_configs.append(ReportConfig(
+                        report_id=report_id_str,
+                        name=self.config.get('REPORT_NAMES', report_id_str)
+                    ))
 
-            return report_configs
+            return tuple(report_configs)
 
-        return []
+        return ()
+
+    def get_numeric_column_rules(self) -> Dict[str, Dict[str, set]]:
+        """Per-report column type overrides, merged across instances.
+
+        Returns {report_name: {'numeric_columns': set, 'text_columns': set}} from the optional
+        "numeric_columns" / "text_columns" lists in each instance's report_configs.
+        """
+        with self._lock:
+            if self._numeric_column_rules is None:
+                self._numeric_column_rules = self._parse_numeric_column_rules()
+            return {name: {option: set(columns) for option, columns in entry.items()}
+                    for name, entry in self._numeric_column_rules.items()}
+
+    def _parse_numeric_column_rules(self) -> Dict[str, Dict[str, set]]:
+        rules = {}
+        if self._py_config is None:
+            return rules
+
+        for instance in self.get_instances().values():
+            for report in instance.get('report_configs', ()):
+                if not isinstance(report, ReportConfig) or not report.get('name'):
+                    continue
+                entry = rules.setdefault(report['name'], {'numeric_columns': set(), 'text_columns': set()})
+                entry['numeric_columns'].update(report.get('numeric_columns', []))
+                entry['text_columns'].update(report.get('text_columns', []))
+
+        return rules
 
     def list_instances(self) -> List[str]:
         """Get list of all available instance keys"""
@@ -300,19 +558,28 @@ class ConfigLoader:
                 errors.append(f"Instance '{key}': missing username")
             if not config.get('password'):
                 errors.append(f"Instance '{key}': missing password")
-            if not config.get('accounts') or not isinstance(config['accounts'], list):
+            if not config.get('accounts') or not isinstance(config['accounts'], tuple):
                 errors.append(f"Instance '{key}': missing or invalid accounts list")
+            if not isinstance(config.get('fetch_workers'), int) or config['fetch_workers'] < 1:
+                errors.append(f"Instance '{key}': fetch_workers must be a positive integer")
+            if not isinstance(config.get('generate_workers'), int) or config['generate_workers'] < 1:
+                errors.append(f"Instance '{key}': generate_workers must be a positive integer")
+            if not isinstance(config.get('requests_per_second'), float) or config['requests_per_second'] < 0:
+                errors.append(f"Instance '{key}': requests_per_second must be a non-negative number")
 
             # Validate per-instance report_configs if present
-            reports = config.get('report_configs', [])
-            if reports and not isinstance(reports, list):
+            reports = config.get('report_configs', ())
+            if reports and not isinstance(reports, tuple):
                 errors.append(f"Instance '{key}': report_configs must be a list")
-            elif isinstance(reports, list):
+            elif isinstance(reports, tuple):
                 seen_ids = set()
                 for r in reports:
-                    if not isinstance(r, dict) or 'report_id' not in r:
+                    if not isinstance(r, ReportConfig) or 'report_id' not in r:
                         errors.append(f"Instance '{key}': each report must be a dict with 'report_id'")
                         continue
+                    for option in ('numeric_columns', 'text_columns'):
+                        if option in r and not isinstance(r[option], tuple):
+                            errors.append(f"Instance '{key}': {option} for report {r['report_id']} must be a list")
                     if r['report_id'] in seen_ids:
                         errors.append(f"Instance '{key}': duplicate report_id {r['report_id']} in report_configs")
                     seen_ids.add(r['report_id'])
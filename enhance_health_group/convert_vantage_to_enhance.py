@@ -6,11 +6,16 @@ Only 3 files need conversion:
   - payment_trend.csv:    drop extra column "Payment Applied Amount"
   - user_time_spread.csv: drop extra columns "Facility Name", "Office Name", "Audit ID"
   - write_off_trend.csv:  add missing column "Patient Credits"
+
+Reports fetched as Parquet (<name>.parquet instead of <name>.csv) are converted in place
+the same way, keeping their column types.
 """
 
 import pandas as pd
 from pathlib import Path
 
+from parquet_store import read_parquet, read_structure, write_parquet
+
 # Define the base paths
 BASE_DIR = Path(__file__).parent / "csv_files"
 VANTAGE_DIR = BASE_DIR / "vantage"
@@ -68,17 +73,26 @@ TARGET_COLUMN_ORDER = {
 
 
 def convert_csv(filename: str) -> None:
-    """Convert a single vantage CSV to enhance_health format."""
+    """Convert a single vantage CSV (or its Parquet counterpart) to enhance_health format."""
     vantage_path = VANTAGE_DIR / filename
     output_path = OUTPUT_DIR / filename
 
+    parquet_path = vantage_path.with_suffix(".parquet")
+    if not vantage_path.exists() and parquet_path.exists():
+        vantage_path = parquet_path
+        output_path = OUTPUT_DIR / parquet_path.name
+
     if not vantage_path.exists():
         print(f"  Skipping {filename} - not found in vantage folder")
         return
 
-    print(f"  Processing {filename}...")
+    print(f"  Processing {vantage_path.name}...")
 
-    df = pd.read_csv(vantage_path, dtype=str)
+    if vantage_path.suffix == ".parquet":
+        df = read_parquet(vantage_path)
+        column_types = dict(read_structure(vantage_path))
+    else:
+        df = pd.read_csv(vantage_path, dtype=str)
     original_col_count = len(df.columns)
 
     # Drop columns not needed in enhance_health
@@ -106,7 +120,11 @@ def convert_csv(filename: str) -> None:
         remaining = [c for c in df.columns if c not in ordered]
         df = df[ordered + remaining]
 
-    df.to_csv(output_path, index=False)
+    if vantage_path.suffix == ".parquet":
+        # Added columns are empty text, like the loader infers them from a CSV
+        write_parquet(output_path, [df], [(col, column_types.get(col, "text")) for col in df.columns])
+    else:
+        df.to_csv(output_path, index=False)
     print(f"    Done: {original_col_count} cols -> {len(df.columns)} cols")
 
 
@@ -0,0 +1,29 @@
+import io
+
+
+class IteratorFile(io.TextIOBase):
+    """
+    Read-only file object over an iterator of text chunks.
+    Lets psycopg2's copy_expert pull COPY data lazily instead of from one big buffer.
+    vantage/pipeline/load_data.py keeps its own copy, as vantage runs without this package.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = ''
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size is None or size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._chunks)
+            except StopIteration:
+                break
+
+        if size is None or size < 0:
+            data, self._buffer = self._buffer, ''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
@@ -0,0 +1,119 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from psycopg2.pool import ThreadedConnectionPool
+
+
+class ConnectionPool:
+    """
+    Thread-safe psycopg2 connection pool shared by the identifier generator and the
+    fetch/load pipeline.
+
+    Unlike a bare ThreadedConnectionPool, checkouts block until a connection is free
+    instead of raising when `maxconn` are in use. Checkout counts and time spent waiting
+    are tracked so the pool size can be tuned (see `stats()`).
+    """
+
+    def __init__(self, minconn: int, maxconn: int, **connect_kwargs):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self._pool = ThreadedConnectionPool(minconn, maxconn, **connect_kwargs)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._stats_lock = threading.Lock()
+        self._checkouts = 0
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @contextmanager
+    def connection(self):
+        """
+        Check out a connection for the duration of the block.
+        Uncommitted work is rolled back before the connection is returned to the pool.
+        """
+        started = time.perf_counter()
+        self._slots.acquire()
+        try:
+            conn = self._pool.getconn()
+            if conn.closed:
+                self._pool.putconn(conn, close=True)
+                conn = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+        waited = time.perf_counter() - started
+        with self._stats_lock:
+            self._checkouts += 1
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        try:
+            yield conn
+        finally:
+            broken = False
+            try:
+                if not conn.closed:
+                    conn.rollback()
+            except Exception:
+                broken = True
+            self._pool.putconn(conn, close=broken or bool(conn.closed))
+            with self._stats_lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        """Checkout count, current/peak connections in use, and wait times in seconds"""
+        with self._stats_lock:
+            return {
+                'minconn': self.minconn,
+                'maxconn': self.maxconn,
+                'checkouts': self._checkouts,
+                'in_use': self._in_use,
+                'peak_in_use': self._peak_in_use,
+                'wait_total': round(self._wait_total, 4),
+                'wait_max': round(self._wait_max, 4),
+                'wait_avg': round(self._wait_total / self._checkouts, 4) if self._checkouts else 0.0,
+            }
+
+    def print_stats(self, label: str = 'DB pool'):
+        stats = self.stats()
+        print(f"{label}: {stats['checkouts']} checkout(s), peak {stats['peak_in_use']}/{stats['maxconn']} in use, "
+              f"wait total {stats['wait_total']:.3f}s (avg {stats['wait_avg']:.3f}s, max {stats['wait_max']:.3f}s)")
+
+    def closeall(self):
+        self._pool.closeall()
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_pool(postgres_config: dict) -> ConnectionPool:
+    """Return the process-wide pool, creating it from `postgres_config` on first use"""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = ConnectionPool(
+                int(postgres_config['pool_minconn']),
+                int(postgres_config['pool_maxconn']),
+                host=postgres_config['host'],
+                user=postgres_config['user'],
+                password=postgres_config['password'],
+                dbname=postgres_config['database'],
+                port=postgres_config['port']
+            )
+        return _shared_pool
+
+
+def close_pool():
+    """Close every pooled connection; the next get_pool() call builds a new pool"""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is not None:
+            _shared_pool.closeall()
+            _shared_pool = None
@@ -1,36 +1,104 @@
 import os
-import io
+import time
+import uuid
+import hashlib
 import zipfile
 import base64
-from datetime import date
+import tempfile
+import sys
+import concurrent.futures
+from xml.parsers import expat
 
 import requests
 import logging
-import xml.etree.ElementTree as ET
-import psycopg2
 import csv
 import pandas as pd
 import re
 from sqlalchemy import create_engine, text
+from sqlalchemy.types import Date
 import glob
 from config_loader import ConfigLoader
-from enhance_health_group.convert_vantage_to_enhance import convert_vantage_to_enhance
+from rate_limiter import TokenBucket
+from metadata_cache import MetadataCache
+from db_pool import get_pool
+from copy_stream import IteratorFile
+from instrumentation import get_run_metrics
+from report_cache import ReportCache
+from run_ledger import FETCHED, TRANSFORMED, LOADED, VIEWS_REFRESHED, ALL_UNITS, fingerprint, files_fingerprint
+from schema_registry import SchemaRegistry
+from parquet_store import require_pyarrow, write_parquet, read_parquet, iter_parquet
+from table_swap import (staging_name, create_staging_table, finish_staging_table, swap_in_staging, drop_staging_table,
+                        populate_materialized_views)
 
 # Load config using multi-instance aware loader
 # Prefer the new Python config if present, otherwise fall back to the old INI
+# The file is read on first use and parsed once, so importing this module does no config I/O
 config_path = 'config/config.py'
 config_loader = ConfigLoader(config_path)
-postgres_config = config_loader.get_postgres_config()
+
+# Decoded report archives larger than this spill from memory to a temp file
+REPORT_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+RESPONSE_CHUNK_SIZE = 64 * 1024
+# (connect, read) timeouts in seconds; the read timeout applies between chunks, not to the whole body
+REPORT_TIMEOUT = (30, 300)
+REPORT_CACHE_DIR = 'report_cache'
+
+# Seconds before cached account_reports metadata is reloaded (None keeps it for the whole run)
+METADATA_CACHE_TTL = None
+
+# Bulk load settings: 'copy' streams rows with COPY FROM STDIN, 'insert' uses DataFrame.to_sql
+DEFAULT_LOAD_METHOD = 'copy'
+COPY_CHUNK_ROWS = 50000
+COPY_NULL = '\\N'
+# Tables loaded concurrently; 'atomic' commits all tables together, 'per_table' one by one
+DEFAULT_LOAD_WORKERS = 4
+DEFAULT_COMMIT_MODE = 'atomic'
+# COPY loads: 'swap' fills a staging table and renames it over the live one, 'truncate' reloads in place
+DEFAULT_LOAD_STRATEGY = 'swap'
+# Rows per chunk when streaming CSVs into the database; None reads each CSV whole
+DEFAULT_CHUNK_ROWS = None
+# Fetched reports are kept as 'csv' text, or as typed 'parquet' files (needs pyarrow)
+DEFAULT_INTERMEDIATE_FORMAT = 'csv'
+INTERMEDIATE_FORMATS = ('csv', 'parquet')
+# Rows typed per pass when converting a fetched CSV to Parquet; types are inferred on the first pass
+PARQUET_CHUNK_ROWS = 100000
+
+# Reporting views: 'view' keeps plain views, 'materialized' stores them and refreshes after each load
+DEFAULT_VIEW_MODE = 'view'
+VIEW_STATEMENT_PATTERN = re.compile(
+    r'^CREATE\s+(?:OR\s+REPLACE\s+)?VIEW\s+([\w."]+)\s*(\([^)]*\))?\s*AS\s+(.*)$', re.IGNORECASE | re.DOTALL
+)
+UNIQUE_KEY_PATTERN = re.compile(r'^--\s*materialized unique key:\s*(.+)$', re.IGNORECASE | re.MULTILINE)
+MATVIEW_COMMENT_PREFIX = 'etl-definition:'
+
+# Type inference: values sampled per column before confirming a promotion on the full column
+TYPE_SAMPLE_SIZE = 100
+DATE_PATTERN = r'^\d{1,2}/\d{1,2}/\d{4}$'
+# Formatted numbers such as $1,234.56, ($12.00), -5 or 45% are parsed at ingest (percentages keep
+# their displayed value). Money columns are matched by name and always stored as double precision.
+FORMATTED_NUMBER_PATTERN = r'^(?=.*\d)\(?[-+]?\$?\s*[-+]?(\d{1,3}(,\d{3})+|\d*)(\.\d+)?\)?%?$'
+CURRENCY_COLUMN_PATTERN = re.compile(r'(^|_)(amount|balance|payments|paid|adjustments|applied)(_|$)')
 
 
 def postgres_connection():
-    return psycopg2.connect(
-        host=postgres_config['host'],
-        user=postgres_config['user'],
-        password=postgres_config['password'],
-        dbname=postgres_config['database'],
-        port=postgres_config['port']
-    )
+    """Check out a connection from the shared pool; use as a context manager"""
+    return get_pool(config_loader.get_postgres_config()).connection()
+
+
+# Decoded report results keyed by identifier, reused across runs until the identifier rotates
+report_cache = ReportCache(REPORT_CACHE_DIR)
+
+# Identifier matrix and account_reports column probe, loaded once per run
+_metadata_cache = None
+
+
+def get_metadata_cache():
+    """Return the module's MetadataCache, creating it on first use"""
+    global _metadata_cache
+    if _metadata_cache is None:
+        _metadata_cache = MetadataCache(postgres_connection, config_loader.get_postgres_config()['schema'],
+                                        ttl=METADATA_CACHE_TTL)
+    return _metadata_cache
 
 
 def load_report_matrix(instance_key=None):
@@ -39,150 +107,421 @@ def load_report_matrix(instance_key=None):
     If instance_key is provided, only load reports for that instance.
     Otherwise, load all reports.
 
+    The matrix for all instances is read in one query and memoized in `get_metadata_cache()`;
+    call `get_metadata_cache().invalidate()` to force a reload.
+
     Returns: {
         'account_id': {
             'report_name': 'identifier'
         }
     }
     """
-    conn = postgres_connection()
-    cursor = conn.cursor()
-    schema = postgres_config['schema']
+    return get_metadata_cache().report_matrix(instance_key)
+
+
+def stream_report_data(response, spool):
+    """
+    Decode the base64 <Data> element of a report results response into `spool`.
 
-    # Check if instance_key column exists
-    cursor.execute(f"""
-        SELECT column_name 
-        FROM information_schema.columns 
-        WHERE table_schema = %s AND table_name = 'account_reports' AND column_name = 'instance_key'
-    """, (schema,))
+    The response body is fed to an expat parser chunk by chunk and the base64 text is
+    decoded as it arrives, so neither the XML document nor the encoded payload is ever
+    held in memory as a whole. Returns the number of decoded bytes written.
+    """
+    parser = expat.ParserCreate()
+    depth = 0
+    in_data = False
+    pending = ''
+    written = 0
+
+    def start_element(name, attrs):
+        nonlocal depth, in_data
+        depth += 1
+        # Only the <Data> element directly under the root carries the payload
+        if depth == 2 and name == 'Data':
+            in_data = True
+
+    def end_element(name):
+        nonlocal depth, in_data
+        if depth == 2:
+            in_data = False
+        depth -= 1
+
+    def char_data(text_chunk):
+        nonlocal pending, written
+        if not in_data:
+            return
+        pending += ''.join(text_chunk.split())
+        # base64 decodes in 4-character groups; keep the remainder for the next chunk
+        usable = len(pending) - len(pending) % 4
+        if usable:
+            decoded = base64.b64decode(pending[:usable])
+            spool.write(decoded)
+            written += len(decoded)
+            pending = pending[usable:]
+
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    parser.CharacterDataHandler = char_data
+    parser.buffer_text = True
+
+    for chunk in response.iter_content(chunk_size=RESPONSE_CHUNK_SIZE):
+        parser.Parse(chunk, False)
+    parser.Parse(b'', True)
+
+    if pending:
+        decoded = base64.b64decode(pending)
+        spool.write(decoded)
+        written += len(decoded)
+
+    return written
+
+
+def iter_report_csvs(csv_paths):
+    """
+    Yield (headers, rows) for each extracted report CSV file.
+    `rows` is a lazy iterator of cleaned row values, read as it is consumed.
+    """
+    for csv_path in csv_paths:
+        with open(csv_path, 'r', newline='', encoding='utf-8') as csv_file:
+            csv_reader = csv.reader(csv_file)
 
-    has_instance_column = cursor.fetchone() is not None
+            try:
+                headers = [h.strip() for h in next(csv_reader)]
+            except StopIteration:
+                continue
 
-    if has_instance_column and instance_key:
-        cursor.execute(
-            f"SELECT customer_account, report_name, identifier FROM {schema}.account_reports WHERE status = 1 AND instance_key = %s",
-            (instance_key,)
-        )
-    else:
-        cursor.execute(
-            f"SELECT customer_account, report_name, identifier FROM {schema}.account_reports WHERE status = 1"
-        )
+            yield headers, _iter_report_rows(csv_reader, len(headers))
 
-    report_matrix = {}
-    for customer_account, report_name, identifier in cursor.fetchall():
-        report_matrix.setdefault(customer_account, {})[report_name] = identifier
 
-    cursor.close()
-    conn.close()
-    return report_matrix
+def _iter_report_rows(csv_reader, header_count):
+    for row in csv_reader:
+        row_values = [v.strip() if v.strip() else None for v in row]
+        while len(row_values) < header_count:
+            row_values.append(None)
+        yield row_values
 
 
-def fetch_reports_to_csv():
+def download_report(url, username, password, rate_limiter, cache_key, refresh=False, labels=None):
+    """
+    Return the extracted CSV files for one report result as (csv_paths, from_cache).
+
+    Results are looked up in `report_cache` by (instance, account, report, identifier)
+    first. On a miss the result is downloaded into a spooled temp file holding the decoded
+    ZIP archive and its CSV members are stored in the cache. `refresh` skips the lookup.
+    Downloaded bytes and cache hits are counted in the run metrics under `labels`.
+    Raises RuntimeError on a non-200 response, so a report is never written without an account.
+    """
+    metrics = get_run_metrics()
+    labels = labels or {}
+    if not refresh:
+        cached = report_cache.get(cache_key)
+        if cached is not None:
+            metrics.add('report_cache_hits', **labels)
+            return cached, True
+
+    rate_limiter.acquire()
+    with tempfile.SpooledTemporaryFile(max_size=REPORT_SPOOL_MAX_SIZE) as spool:
+        with requests.post(url, auth=(username, password), stream=True, timeout=REPORT_TIMEOUT) as response:
+            if response.status_code != 200:
+                logging.error(f"Failed to fetch {url}: HTTP {response.status_code}")
+                raise RuntimeError(f"Failed to fetch {url}: HTTP {response.status_code}")
+
+            etag = response.headers.get('ETag')
+            written = stream_report_data(response, spool)
+            metrics.add('bytes_downloaded', written, **labels)
+            if not written:
+                # An identifier with no data stays empty; remember that too
+                spool.seek(0)
+                spool.truncate()
+                zipfile.ZipFile(spool, 'w').close()
+
+        spool.seek(0)
+        return report_cache.put_archive(cache_key, spool, etag), False
+
+
+def write_report_csv(file_path, instance_key, downloads):
+    """
+    Write one report's CSV from `downloads`, a list of (customer_id, future) pairs.
+    Rows are written in list order regardless of which download finishes first.
+    A failed download raises, leaving any earlier file in place and no partial file.
+    Returns (row_count, account_count, cache_hits).
+    """
+    # Rows are streamed to a partial file and only moved into place once the report has data
+    part_path = f"{file_path}.part"
+    out_file = None
+    writer = None
+    row_count = 0
+    account_count = 0
+    cache_hits = 0
+
+    try:
+        for customer_id, future in downloads:
+            csv_paths, from_cache = future.result()
+            cache_hits += from_cache
+
+            for headers, rows in iter_report_csvs(csv_paths):
+                if writer is None:
+                    out_file = open(part_path, 'w', newline='', encoding='utf-8')
+                    writer = csv.writer(out_file)
+                    writer.writerow(['customer_account', 'instance_key'] + headers)
+
+                customer_rows = 0
+                for row_values in rows:
+                    writer.writerow([customer_id, instance_key] + row_values)
+                    customer_rows += 1
+
+                if customer_rows:
+                    row_count += customer_rows
+                    account_count += 1
+    except Exception:
+        if out_file is not None:
+            out_file.close()
+            os.remove(part_path)
+        raise
+    if out_file is not None:
+        out_file.close()
+
+    if row_count:
+        os.replace(part_path, file_path)
+    elif out_file is not None:
+        os.remove(part_path)
+
+    return row_count, account_count, cache_hits
+
+
+def write_report_parquet(csv_path, parquet_path, column_rules):
+    """
+    Convert a fetched report CSV to a typed Parquet file, `PARQUET_CHUNK_ROWS` rows at a time.
+
+    Column types are inferred once on the first chunk, exactly as the loader would, and
+    embedded in the file with the original headers, so loading, conversion and analysis
+    read typed columns instead of parsing text again. Raises ValueError when a later chunk
+    does not fit the inferred types; the CSV is left in place in that case.
+    """
+    # Headers as pandas reads them (duplicates already de-duplicated), kept for the file's columns
+    headers = list(pd.read_csv(csv_path, dtype=str, nrows=0).columns)
+
+    table = ChunkedTable(os.path.basename(csv_path), [csv_path], PARQUET_CHUNK_ROWS, column_rules)
+    table.structure = infer_df_structure(table.first_chunk())
+    structure = [(header, data_type) for header, (_, data_type) in zip(headers, table.structure)]
+
+    def frames():
+        for chunk in table.iter_chunks():
+            chunk.columns = headers
+            yield chunk
+
+    return write_parquet(parquet_path, frames(), structure)
+
+
+def fetch_instance_reports(instance_key, instance_config, report_matrix, csv_dir, refresh=False,
+                           intermediate_format=DEFAULT_INTERMEDIATE_FORMAT, ledger=None):
+    """
+    Fetch every report result of one instance through a bounded, rate-limited worker pool.
+    Downloads for all (report, account) pairs run concurrently; CSVs are assembled per
+    report in account order. Results whose identifier is unchanged come from `report_cache`.
+    With intermediate_format 'parquet' each CSV is then converted to a typed Parquet file.
+    Each report's fetched and transformed stages are recorded in `ledger`; reports the
+    resumed run already completed with the same identifiers are skipped.
+    Returns the set of cache keys for the instance's active identifiers.
+    """
+    base_url = instance_config['api_base_url']
+    username = instance_config['username']
+    password = instance_config['password']
+    customers = instance_config['accounts']
+
+    rate_limiter = TokenBucket(instance_config['requests_per_second'])
+    # Money-column rules for typing Parquet files, keyed like the loader's table names
+    column_rules = config_loader.get_numeric_column_rules()
+    metrics = get_run_metrics()
+    report_ids = {r['name']: r['report_id'] for r in instance_config.get('report_configs', []) if 'name' in r}
+
+    all_report_names = set()
+    for customer in customers:
+        all_report_names.update(report_matrix.get(customer, {}).keys())
+
+    cache_keys = set()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=instance_config['fetch_workers']) as executor:
+        # Submit in report order so the writer below mostly consumes downloads as they finish
+        report_downloads = {}
+        report_fingerprints = {}
+        resumed_stages = {}
+        for report_name in sorted(all_report_names):
+            identifiers = [(customer_id, report_matrix.get(customer_id, {}).get(report_name)) for customer_id in customers]
+            report_fingerprints[report_name] = fingerprint(identifiers, intermediate_format)
+            resumed_stages[report_name] = resumed_report_stage(ledger, instance_key, report_name,
+                                                               report_fingerprints[report_name])
+
+            downloads = []
+            for customer_id in customers:
+                identifier = report_matrix.get(customer_id, {}).get(report_name)
+                if not identifier:
+                    continue
+
+                cache_key = ReportCache.make_key(instance_key, customer_id, report_ids.get(report_name, report_name), identifier)
+                cache_keys.add(cache_key)
+                if resumed_stages[report_name] is not None:
+                    continue
+
+                url = f"{base_url}/customer/{customer_id}/reports/results/{identifier}"
+                downloads.append((customer_id, executor.submit(
+                    download_report, url, username, password, rate_limiter, cache_key, refresh,
+                    {'instance': instance_key, 'report': report_name}
+                )))
+            report_downloads[report_name] = downloads
+
+        try:
+            for report_name, downloads in report_downloads.items():
+                file_path = os.path.join(csv_dir, f"{report_name}.csv")
+                parquet_path = os.path.join(csv_dir, f"{report_name}.parquet")
+                report_fingerprint = report_fingerprints[report_name]
+
+                if resumed_stages[report_name] == TRANSFORMED:
+                    print(f"→ Skipped {instance_key}/{report_name}: completed in the resumed run")
+                    continue
+
+                if resumed_stages[report_name] == FETCHED:
+                    print(f"→ Reusing {file_path} fetched in the resumed run")
+                else:
+                    # Includes waiting for the report's downloads, which run ahead in the pool
+                    with metrics.stage('fetch_report', instance=instance_key, report=report_name):
+                        row_count, account_count, cache_hits = write_report_csv(file_path, instance_key, downloads)
+                    metrics.add('rows_parsed', row_count, instance=instance_key, report=report_name)
+
+                    if not row_count:
+                        print(f"⊘ No data for report: {instance_key}/{report_name}")
+                        if ledger is not None:
+                            ledger.record(instance_key, report_name, TRANSFORMED, report_fingerprint)
+                        continue
+
+                    logging.info(f"CSV file written: {file_path}")
+                    print(f"✓ Fetched {instance_key}/{report_name}: {row_count} rows from {account_count} account(s) "
+                          f"({cache_hits}/{len(downloads)} from cache)")
+                    if ledger is not None:
+                        ledger.record(instance_key, report_name, FETCHED, report_fingerprint, file_path)
+
+                # Only one file per report may remain, or the loader would load it twice
+                output_path = file_path
+                if intermediate_format == 'parquet':
+                    try:
+                        with metrics.stage('parquet_convert', instance=instance_key, report=report_name):
+                            write_report_parquet(file_path, parquet_path,
+                                                 column_rules.get(to_snake_case(report_name), {}))
+                        os.remove(file_path)
+                        output_path = parquet_path
+                        logging.info(f"Parquet file written: {parquet_path}")
+                    except ValueError as e:
+                        print(f"  ⚠ Kept {file_path} as CSV: {e}")
+                        if os.path.exists(parquet_path):
+                            os.remove(parquet_path)
+                elif os.path.exists(parquet_path):
+                    os.remove(parquet_path)
+
+                if ledger is not None:
+                    ledger.record(instance_key, report_name, TRANSFORMED, report_fingerprint, output_path)
+        except Exception:
+            # Drop downloads that have not started yet
+            for downloads in report_downloads.values():
+                for _, future in downloads:
+                    future.cancel()
+            raise
+
+    return cache_keys
+
+
+def resumed_report_stage(ledger, instance_key, report_name, report_fingerprint):
+    """
+    The last stage of a report the resumed run completed with the same identifiers and
+    whose output is still on disk: TRANSFORMED, FETCHED or None (fetch it again).
+    """
+    if ledger is None:
+        return None
+    for stage in (TRANSFORMED, FETCHED):
+        output_path = ledger.completed(instance_key, report_name, stage, report_fingerprint)
+        # An empty report leaves no file behind
+        if output_path is not None and (output_path == '' or os.path.exists(output_path)):
+            return stage
+    return None
+
+
+def fetch_reports_to_csv(max_workers=None, refresh=False, intermediate_format=DEFAULT_INTERMEDIATE_FORMAT,
+                         ledger=None):
     """
     Fetch reports for all instances and write to CSV files.
     Creates separate CSV files per instance if multiple instances exist.
+    Instances are fetched concurrently; per-instance concurrency and request rate come
+    from each instance's `fetch_workers` and `requests_per_second` settings.
+    Report results whose identifier has not been rotated since the last run are read from
+    the local report cache; pass refresh=True to download everything again.
+    With intermediate_format 'parquet' reports are stored as typed Parquet files instead.
+    Completed reports are recorded in `ledger` (a started RunLedger), and reports the
+    resumed run already completed are skipped.
     """
+    if intermediate_format not in INTERMEDIATE_FORMATS:
+        raise ValueError(f"Unknown intermediate format '{intermediate_format}' (expected 'csv' or 'parquet')")
+    if intermediate_format == 'parquet':
+        require_pyarrow()
+
     instances = config_loader.get_instances()
     instance_list = config_loader.list_instances()
-    schema = postgres_config['schema']
 
     print(f"\n{'=' * 80}")
     print(f"FETCH REPORTS TO CSV - MULTI-INSTANCE MODE")
     print(f"{'=' * 80}")
     print(f"Processing {len(instance_list)} instance(s): {', '.join(instance_list)}\n")
 
-    # Check if account_reports table has instance_key column for data isolation
-    conn = postgres_connection()
-    cursor = conn.cursor()
-    cursor.execute(f"""
-        SELECT column_name 
-        FROM information_schema.columns 
-        WHERE table_schema = %s AND table_name = 'account_reports' AND column_name = 'instance_key'
-    """, (schema,))
-    has_instance_column = cursor.fetchone() is not None
-    cursor.close()
-    conn.close()
+    metrics = get_run_metrics()
+
+    # Warm the identifier cache once before the instance workers read from it
+    metadata_cache = get_metadata_cache()
+    metadata_cache.invalidate()
+    with metrics.stage('load_report_matrix'):
+        metadata_cache.report_matrix()
 
     csv_dir = 'csv_files'
     os.makedirs(csv_dir, exist_ok=True)
 
-    for instance_key in instance_list:
+    def process_instance(instance_key):
         instance_config = instances[instance_key]
-        print(f"\n{'-' * 80}")
-        print(f"INSTANCE: {instance_key}")
-        print(f"{'-' * 80}")
-
-        base_url = instance_config['api_base_url']
-        username = instance_config['username']
-        password = instance_config['password']
-        customers = instance_config['accounts']
+        print(f"INSTANCE: {instance_key} | workers: {instance_config['fetch_workers']} | "
+              f"rate limit: {instance_config['requests_per_second']}/s")
 
         # Load reports for this instance
-        report_matrix = load_report_matrix(instance_key if has_instance_column else None)
+        report_matrix = load_report_matrix(instance_key)
 
         if not report_matrix:
             print(f"No reports found for instance {instance_key}")
-            continue
+            return
 
-        all_report_names = set()
-        for customer in customers:
-            all_report_names.update(report_matrix.get(customer, {}).keys())
+        # Create subdirectory for instance if multiple instances
+        instance_csv_dir = csv_dir
+        if len(instance_list) > 1:
+            instance_csv_dir = os.path.join(csv_dir, instance_key)
+            os.makedirs(instance_csv_dir, exist_ok=True)
 
-        for report_name in sorted(all_report_names):
-            all_rows = []
-            headers_with_customer = None
+        with metrics.stage('fetch_instance', instance=instance_key):
+            return fetch_instance_reports(instance_key, instance_config, report_matrix, instance_csv_dir, refresh,
+                                          intermediate_format, ledger)
 
-            for customer_id in customers:
-                report_id = report_matrix.get(customer_id, {}).get(report_name)
-                if not report_id:
-                    continue
+    if max_workers is None:
+        max_workers = min(32, max(1, len(instance_list)))
 
-                url = f"{base_url}/customer/{customer_id}/reports/results/{report_id}"
-                response = requests.post(url, auth=(username, password))
-
-                if response.status_code == 200:
-                    root = ET.fromstring(response.content)
-                    data_element = root.find('Data')
-                    if data_element is not None and data_element.text:
-                        zip_bytes = base64.b64decode(data_element.text)
-                        with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zip_file:
-                            for zip_info in zip_file.infolist():
-                                if zip_info.filename.endswith('.csv'):
-                                    with zip_file.open(zip_info) as csv_file:
-                                        decoded = io.TextIOWrapper(csv_file, encoding='utf-8')
-                                        csv_reader = csv.reader(decoded)
-
-                                        try:
-                                            headers = [h.strip() for h in next(csv_reader)]
-                                        except StopIteration:
-                                            continue
-
-                                        if headers_with_customer is None:
-                                            headers_with_customer = ['customer_account', 'instance_key'] + headers
-
-                                        for row in csv_reader:
-                                            row_values = [v.strip() if v.strip() else None for v in row]
-                                            while len(row_values) < len(headers):
-                                                row_values.append(None)
-                                            all_rows.append([customer_id, instance_key] + row_values)
-
-            if all_rows and headers_with_customer:
-                # Create subdirectory for instance if multiple instances
-                if len(instance_list) > 1:
-                    instance_csv_dir = os.path.join(csv_dir, instance_key)
-                    os.makedirs(instance_csv_dir, exist_ok=True)
-                    file_path = os.path.join(instance_csv_dir, f"{report_name}.csv")
-                else:
-                    file_path = os.path.join(csv_dir, f"{report_name}.csv")
-
-                with open(file_path, 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.writer(f)
-                    writer.writerow(headers_with_customer)
-                    writer.writerows(all_rows)
-                logging.info(f"CSV file written: {file_path}")
-                print(f"✓ Fetched {report_name}: {len(all_rows)} rows from {len([r for r in all_rows if r[0]])}")
-            else:
-                print(f"⊘ No data for report: {report_name}")
+    errors = []
+    active_cache_keys = set()
+    with metrics.stage('fetch'), concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_to_instance = {executor.submit(process_instance, key): key for key in instance_list}
+        for fut in concurrent.futures.as_completed(future_to_instance):
+            key = future_to_instance[fut]
+            try:
+                active_cache_keys.update(fut.result() or ())
+            except Exception as e:
+                print(f"✗ Instance {key} raised an exception: {e}")
+                errors.append(key)
+
+    if errors:
+        raise RuntimeError(f"Report fetch failed for instance(s): {', '.join(sorted(errors))}")
+
+    # Results for rotated identifiers will never be requested again
+    report_cache.prune(active_cache_keys)
 
 
 def to_snake_case(name):
@@ -219,110 +558,407 @@ def get_db_structure(engine, schema, table_name):
     return [(r.column_name, r.data_type) for r in rows]
 
 
-def promote_numeric_columns(df):
+NUMERIC_PG_TYPES = ('bigint', 'double precision')
+
+
+def pg_type_for_dtype(dtype):
+    """Map a pandas dtype to the Postgres type the loaders create for it"""
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "date"
+    if dtype == 'int64' or dtype == 'Int64':
+        return "bigint"
+    if dtype == 'float64':
+        return "double precision"
+    return "text"
+
+
+def parse_formatted_numbers(series):
     """
-    Attempt to promote text columns to numeric types.
-    This ensures consistent type inference across runs.
+    Vectorized parse of '$1,234.56' / '(12.00)' / '45%' style strings to float; unparseable values become NaN.
+    Symbols are only stripped from values matching FORMATTED_NUMBER_PATTERN with balanced parentheses,
+    so '1,2' or '(5' become NaN rather than 12 or 5; anything else must parse as a plain number.
     """
+    text_values = series.astype(str).str.strip()
+    formatted = (text_values.str.match(FORMATTED_NUMBER_PATTERN)
+                 & (text_values.str.count(r'\(') == text_values.str.count(r'\)')))
+    negative = formatted & text_values.str.startswith('(')
+    stripped = text_values.str.replace(r'[$,%()\s]', '', regex=True)
+    numbers = pd.to_numeric(stripped.where(formatted, text_values), errors='coerce')
+    return numbers.where(~negative, -numbers).astype('float64')
+
+
+def is_currency_column(col, numeric_columns=(), text_columns=()):
+    """Whether a column is always stored as a number: listed in `numeric_columns`, or named like a money column"""
+    if col in text_columns:
+        return False
+    if col in numeric_columns:
+        return True
+    return 'date' not in col and CURRENCY_COLUMN_PATTERN.search(col) is not None
+
+
+def infer_column_types(df, sample_size=TYPE_SAMPLE_SIZE, numeric_columns=(), text_columns=()):
+    """
+    Promote text columns to numeric or date types in a single pass and return the
+    resulting structure as [(column_name, data_type), ...].
+
+    Each object column is first checked against a small sample of its non-empty values;
+    only columns whose sample looks fully numeric (and whose name has no 'date') or fully
+    mm/dd/yyyy are converted and confirmed over the whole column with vectorized
+    pd.to_numeric / pd.to_datetime. Dates stay datetime64 rather than Python date objects.
+    Samples of formatted numbers ('$1,234.56', '(12.00)', '45%') are parsed the same way.
+    Columns with no values at all become empty text columns.
+
+    Money columns (see is_currency_column) are always parsed to float64, even when empty,
+    so their type does not change from one load to the next; values that do not parse
+    become NULL with a warning.
+    """
+    structure = []
     for col in df.columns:
-        # Skip if already numeric or date
-        if df[col].dtype != 'object':
-            continue
+        series = df[col]
 
-        # Skip if it's a date column (will be handled by promote_date_columns)
-        if 'date' in col.lower():
-            continue
+        if is_currency_column(col, numeric_columns, text_columns):
+            if pd.api.types.is_numeric_dtype(series.dtype):
+                df[col] = series.astype('float64')
+            else:
+                non_empty_mask = series.notna() & (series.astype(str).str.strip() != '')
+                parsed = parse_formatted_numbers(series.where(non_empty_mask))
+                unparsed = int((non_empty_mask & parsed.isna()).sum())
+                if unparsed:
+                    print(f"  ⚠ {unparsed} non-numeric value(s) in '{col}' stored as NULL")
+                df[col] = parsed
+
+        elif series.dtype == 'object':
+            non_empty_mask = series.notna() & (series != '')
 
-        # Try converting to numeric
-        numeric_series = pd.to_numeric(df[col], errors='coerce')
+            if not non_empty_mask.any():
+                df[col] = ""
+            else:
+                sample = series[non_empty_mask].head(sample_size).astype(str)
 
-        # Count how many values successfully converted
-        non_null_original = df[col].notna() & (df[col] != '')
-        non_null_converted = numeric_series.notna()
+                if sample.str.match(DATE_PATTERN).all():
+                    parsed = pd.to_datetime(series.where(non_empty_mask), format="%m/%d/%Y", errors="coerce")
+                    if parsed[non_empty_mask].notna().all():
+                        df[col] = parsed
+                        print(f"  → Converted '{col}' to date type")
 
-        # If all non-empty values successfully converted to numeric, use it
-        if non_null_original.sum() > 0 and (non_null_original <= non_null_converted).all():
-            df[col] = numeric_series
+                elif 'date' not in col.lower() and pd.to_numeric(sample, errors='coerce').notna().all():
+                    numeric = pd.to_numeric(series.where(non_empty_mask), errors='coerce')
+                    if numeric[non_empty_mask].notna().all():
+                        df[col] = numeric
 
-    return df
+                elif 'date' not in col.lower() and sample.str.strip().str.match(FORMATTED_NUMBER_PATTERN).all():
+                    numeric = parse_formatted_numbers(series.where(non_empty_mask))
+                    if numeric[non_empty_mask].notna().all():
+                        df[col] = numeric
+                        print(f"  → Parsed formatted numbers in '{col}'")
+
+        elif series.isna().all():
+            df[col] = ""
 
+        structure.append((col, pg_type_for_dtype(df[col].dtype)))
 
-def promote_date_columns(df):
+    return structure
+
+
+def infer_df_structure(df):
     """
-    Promote column to date if:
-    1. Column name contains 'date', OR
-    2. All non-null/non-empty values match mm/dd/yyyy format
+    Infer expected DB structure from DataFrame based on actual pandas dtypes.
+    This matches what the COPY loader and pandas.to_sql() create.
     """
-    for col in df.columns:
-        # Treat empty strings as NaN
-        cleaned = df[col].replace("", pd.NA)
+    return [(col, pg_type_for_dtype(df[col].dtype)) for col in df.columns]
 
-        # Skip if all values are null/empty
-        if cleaned.isna().all():
-            continue
 
-        # Try to parse as date
-        parsed = pd.to_datetime(cleaned, format="%m/%d/%Y", errors="coerce")
+def transform_frame(df, column_rules, infer=True):
+    """
+    Snake-case the headers and promote column types, keeping instance_key as the second column.
+    Frames read from Parquet are already typed and pass infer=False.
+    """
+    # Preserve instance_key column if it exists
+    instance_key_col = None
+    if 'instance_key' in df.columns:
+        instance_key_col = df['instance_key'].copy()
+        # Remove it temporarily for processing
+        df = df.drop(columns=['instance_key'])
+
+    df.columns = [to_snake_case(c) for c in df.columns]
+
+    # Promote numeric/date types (full-null columns become empty text)
+    if infer:
+        infer_column_types(
+            df,
+            numeric_columns=column_rules.get('numeric_columns', ()),
+            text_columns=column_rules.get('text_columns', ())
+        )
+
+    # Add instance_key column back if it existed
+    if instance_key_col is not None:
+        df.insert(1, 'instance_key', instance_key_col)
+
+    return df
 
-        # Check if all non-null values successfully parsed
-        non_null_mask = cleaned.notna()
-        invalid = non_null_mask & parsed.isna()
 
-        # If all non-null values parsed successfully, it's a date column
-        if not invalid.any():
-            # Check if column name contains 'date' OR if data looks like dates
-            has_date_in_name = "date" in col.lower()
+def convert_chunk(df, structure, column_rules):
+    """
+    Convert a chunk read as text (or already typed, from Parquet) to a registered
+    [(column, type), ...] structure.
 
-            # Additional check: do the values actually look like dates?
-            # Sample a few non-null values to verify they match mm/dd/yyyy pattern
-            sample_values = cleaned.dropna().head(10)
-            looks_like_date = False
+    Columns missing from the chunk are added as NULL and extra ones dropped. Values that do
+    not fit a numeric or date column raise ValueError, except in money columns where they
+    become NULL with a warning, as in infer_column_types.
+    """
+    df.columns = [to_snake_case(c) for c in df.columns]
+    columns = [col for col, _ in structure]
+    df = df.reindex(columns=columns)
+
+    for col, data_type in structure:
+        series = df[col]
+        non_empty = series.notna() & (series.astype(str).str.strip() != '')
+        raw = series.where(non_empty)
+
+        # Typed Parquet columns are only cast; text is parsed
+        typed_number = pd.api.types.is_numeric_dtype(series.dtype)
+        if data_type == 'double precision':
+            values = series.astype('float64') if typed_number else parse_formatted_numbers(raw)
+            unparsed = non_empty & values.isna()
+        elif data_type == 'bigint':
+            values = series.astype('float64') if typed_number else pd.to_numeric(raw, errors='coerce')
+            unparsed = non_empty & (values.isna() | (values % 1 != 0))
+        elif data_type == 'date':
+            if pd.api.types.is_datetime64_any_dtype(series.dtype):
+                values = series
+            else:
+                values = pd.to_datetime(raw, format="%m/%d/%Y", errors='coerce')
+            unparsed = non_empty & values.isna()
+        else:
+            continue
 
-            if len(sample_values) > 0:
-                # Check if values match mm/dd/yyyy pattern (rough check)
-                date_pattern = re.compile(r'^\d{1,2}/\d{1,2}/\d{4}$')
-                looks_like_date = sample_values.astype(str).apply(
-                    lambda x: bool(date_pattern.match(x))
-                ).any()
+        if unparsed.any():
+            if not is_currency_column(col, column_rules.get('numeric_columns', ()), column_rules.get('text_columns', ())):
+                raise ValueError(
+                    f"Column '{col}' is {data_type} but has values such as {series[unparsed].iloc[0]!r}; "
+                    f"use a larger chunk size or list it in the report's text_columns"
+                )
+            print(f"  ⚠ {int(unparsed.sum())} non-numeric value(s) in '{col}' stored as NULL")
+            values = values.where(~unparsed)
 
-            # Convert to date if column name suggests it OR data looks like dates
-            if has_date_in_name or looks_like_date:
-                df[col] = parsed.dt.date
-                print(f"  → Converted '{col}' to date type")
+        df[col] = values.astype('Int64') if data_type == 'bigint' else values
 
     return df
 
 
-def infer_df_structure(df):
+class ChunkedTable:
     """
-    Infer expected DB structure from DataFrame based on actual pandas dtypes.
-    This matches what pandas.to_sql() will create.
+    The CSV or Parquet files of one table (one per instance), read `chunk_rows` rows at a
+    time so memory is bounded by the chunk size rather than by the data.
+
+    `structure` is fixed by the SchemaRegistry from the first chunk before any chunk is loaded.
     """
-    structure = []
-    for col in df.columns:
-        dtype = df[col].dtype
-
-        # Check if it's a date column (from promote_date_columns)
-        is_date = False
-        if len(df[col].dropna()) > 0:
-            is_date = df[col].dropna().apply(lambda v: isinstance(v, date)).all()
-
-        if is_date:
-            structure.append((col, "date"))
-        elif dtype == 'int64' or dtype == 'Int64':
-            structure.append((col, "bigint"))
-        elif dtype == 'float64':
-            structure.append((col, "double precision"))
+
+    def __init__(self, table_name, csv_files, chunk_rows, column_rules):
+        self.table_name = table_name
+        self.csv_files = csv_files
+        self.chunk_rows = chunk_rows
+        self.column_rules = column_rules
+        self.structure = None
+
+    def first_chunk(self):
+        """The first chunk of the first file, transformed and type-inferred like a whole CSV"""
+        first_file = self.csv_files[0]
+        if first_file.endswith('.parquet'):
+            chunk = next(iter_parquet(first_file, self.chunk_rows))
+            return transform_frame(chunk, self.column_rules, infer=False)
+
+        chunk = pd.read_csv(first_file, dtype=str, nrows=self.chunk_rows)
+        return transform_frame(chunk, self.column_rules)
+
+    def _read_chunks(self, path):
+        if path.endswith('.parquet'):
+            yield from iter_parquet(path, self.chunk_rows)
         else:
-            structure.append((col, "text"))
+            with pd.read_csv(path, dtype=str, chunksize=self.chunk_rows) as reader:
+                yield from reader
+
+    def iter_chunks(self):
+        """Yield every file's rows as DataFrames converted to `structure`"""
+        columns = [col for col, _ in self.structure]
+        for csv_file in self.csv_files:
+            for i, chunk in enumerate(self._read_chunks(csv_file)):
+                if i == 0:
+                    file_columns = {to_snake_case(c) for c in chunk.columns}
+                    missing_cols = set(columns) - file_columns
+                    extra_cols = file_columns - set(columns)
+                    if missing_cols:
+                        print(f"  ⚠ Added missing columns to {csv_file}: {', '.join(sorted(missing_cols))}")
+                    if extra_cols:
+                        print(f"  ⚠ Removing extra columns from {csv_file}: {', '.join(sorted(extra_cols))}")
+
+                get_run_metrics().add('rows_parsed', len(chunk), table=self.table_name)
+                yield convert_chunk(chunk, self.structure, self.column_rules)
+
+
+def table_structure(source):
+    """[(column, type), ...] of a table loaded from a DataFrame or a ChunkedTable"""
+    if isinstance(source, ChunkedTable):
+        return source.structure
+    return infer_df_structure(source)
+
+
+def iter_table_frames(source):
+    """The DataFrames to load for a table: the whole DataFrame, or each chunk of a ChunkedTable"""
+    if isinstance(source, ChunkedTable):
+        return source.iter_chunks()
+    return [source]
+
+
+def strip_leading_comments(stmt):
+    lines = stmt.splitlines()
+    while lines and (not lines[0].strip() or lines[0].strip().startswith('--')):
+        lines.pop(0)
+    return '\n'.join(lines).strip()
+
+
+def relation_kind(conn, name):
+    """(relkind, comment, populated) of a relation on the current search_path, or (None, None, None)"""
+    row = conn.execute(
+        text("SELECT c.relkind, obj_description(c.oid, 'pg_class'), c.relispopulated "
+             "FROM pg_class c WHERE c.oid = to_regclass(:name)"),
+        {"name": name}
+    ).fetchone()
+    return (row[0], row[1], row[2]) if row else (None, None, None)
+
+
+def materialized_view_sql(name, columns, body, unique_key):
+    """
+    CREATE statements for the materialized form of a view.
+    The unique index on `unique_key` is what allows REFRESH ... CONCURRENTLY; without a
+    declared key there is no index and the view is refreshed with a plain REFRESH.
+    """
+    statements = [f"CREATE MATERIALIZED VIEW {name} {columns or ''} AS {body}"]
+    if unique_key:
+        index_name = name.split('.')[-1].strip('"') + '_unique_key'
+        statements.append(f'CREATE UNIQUE INDEX "{index_name}" ON {name} ({unique_key})')
+    return statements
+
+
+def view_create_statements(stmt, materialized, with_data=True):
+    """
+    Statements creating the view defined by a CREATE VIEW statement from the SQL folder,
+    plus the definition hash recorded on materialized views (None for plain views).
+    With `with_data` False a materialized view is created unpopulated (the hash is the same).
+    """
+    match = VIEW_STATEMENT_PATTERN.match(strip_leading_comments(stmt))
+    name, columns, body = match.group(1), match.group(2), match.group(3).strip()
+
+    if not materialized:
+        return [stmt], None
+
+    key_match = UNIQUE_KEY_PATTERN.search(stmt)
+    statements = materialized_view_sql(name, columns, body, key_match.group(1).strip() if key_match else None)
+    definition_hash = MATVIEW_COMMENT_PREFIX + hashlib.sha256('\n'.join(statements).encode('utf-8')).hexdigest()
+    if not with_data:
+        statements[0] += ' WITH NO DATA'
+    statements.append(f"COMMENT ON MATERIALIZED VIEW {name} IS '{definition_hash}'")
+    return statements, definition_hash
 
-    return structure
+
+def execute_view_statement(conn, stmt, view_mode, fresh=False):
+    """
+    Execute one CREATE VIEW statement in the requested mode.
+
+    In 'materialized' mode the view is stored as a materialized view. A hash of its
+    definition is kept in the relation comment: while it matches, later runs only refresh
+    it; when the SQL changes, the view is rebuilt. Views with a declared unique key are
+    refreshed CONCURRENTLY (dashboards keep reading during the refresh), the others with
+    a plain REFRESH. `fresh` skips the refresh of a view that was already populated from
+    the newly loaded tables by the swap (see populate_materialized_views). Returns what was done, for the log.
+    """
+    name = VIEW_STATEMENT_PATTERN.match(strip_leading_comments(stmt)).group(1)
+    kind, comment, populated = relation_kind(conn, name)
+    statements, definition_hash = view_create_statements(stmt, view_mode == 'materialized')
+
+    if view_mode == 'view':
+        if kind == 'm':
+            conn.execute(text(f"DROP MATERIALIZED VIEW {name}"))
+        conn.execute(text(stmt))
+        return f"view {name}"
+
+    if kind == 'm' and comment == definition_hash:
+        if fresh and populated:
+            return f"materialized view {name} already populated by the swap"
+        if populated and UNIQUE_KEY_PATTERN.search(stmt):
+            conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {name}"))
+            return f"refreshed materialized view {name} concurrently"
+        conn.execute(text(f"REFRESH MATERIALIZED VIEW {name}"))
+        return f"refreshed materialized view {name}"
+
+    if kind == 'm':
+        conn.execute(text(f"DROP MATERIALIZED VIEW {name}"))
+    elif kind == 'v':
+        conn.execute(text(f"DROP VIEW {name}"))
+
+    for statement in statements:
+        conn.execute(text(statement))
+    conn.execute(text(f"ANALYZE {name}"))
+    return f"created materialized view {name}"
+
+
+def iter_sql_statements(sql):
+    """Split a SQL file on ';', skipping empty and comment-only statements"""
+    for statement in sql.split(';'):
+        stmt = statement.strip()
+        if not stmt:
+            continue
+
+        # Check if statement is just comments to avoid empty query error
+        for line in stmt.splitlines():
+            stripped_line = line.strip()
+            if stripped_line and not stripped_line.startswith('--'):
+                yield stmt
+                break
 
 
-def run_sql_files(engine, schema, sql_folder='sql'):
+def load_view_statements(sql_folder='sql'):
+    """CREATE VIEW statements from the SQL folder, keyed by unqualified view name"""
+    views = {}
+    for sql_file in sorted(glob.glob(os.path.join(sql_folder, '*.sql'))):
+        with open(sql_file, 'r') as f:
+            for stmt in iter_sql_statements(f.read()):
+                match = VIEW_STATEMENT_PATTERN.match(strip_leading_comments(stmt))
+                if match:
+                    views[match.group(1).split('.')[-1].strip('"')] = stmt
+    return views
+
+
+def view_rebuilder(sql_folder='sql'):
+    """
+    Callback for swap_in_staging: re-creates a dependent view from its SQL-folder
+    definition when its saved definition no longer fits the swapped-in table
+    (e.g. after a text column was promoted to a number). Materialized views are
+    created unpopulated, like the other views re-created by the swap.
+    """
+    views = load_view_statements(sql_folder)
+
+    def rebuild_view(cursor, view_name, relkind):
+        stmt = views.get(view_name)
+        if stmt is None:
+            return False
+        statements, _ = view_create_statements(stmt, relkind == 'm', with_data=False)
+        for statement in statements:
+            cursor.execute(statement)
+        return True
+
+    return rebuild_view
+
+
+def run_sql_files(engine, schema, sql_folder='sql', view_mode=DEFAULT_VIEW_MODE, fresh_views=()):
     """
     Execute all SQL files in the specified folder.
+    CREATE VIEW statements follow `view_mode` (see execute_view_statement); materialized
+    views in `fresh_views` ("schema"."name" relations populated by a swap) are not refreshed again.
     """
+    if view_mode not in ('view', 'materialized'):
+        raise ValueError(f"Unknown view mode '{view_mode}' (expected 'view' or 'materialized')")
+
     print("\n" + "=" * 80)
     print("RUNNING SQL FILES")
     print("=" * 80 + "\n")
@@ -336,6 +972,7 @@ def run_sql_files(engine, schema, sql_folder='sql'):
 
     # Sort files for consistent execution order
     sql_files.sort()
+    metrics = get_run_metrics()
 
     for sql_file in sql_files:
         print(f"Executing: {os.path.basename(sql_file)}")
@@ -347,20 +984,19 @@ def run_sql_files(engine, schema, sql_folder='sql'):
             # Prepend search_path setting
             sql = f"SET search_path TO {schema};\n" + sql
 
-            with engine.begin() as conn:
-                for statement in sql.split(';'):
-                    stmt = statement.strip()
-                    if stmt:
-                        # Check if statement is just comments to avoid empty query error
-                        is_comment_only = True
-                        for line in stmt.splitlines():
-                            stripped_line = line.strip()
-                            if stripped_line and not stripped_line.startswith('--'):
-                                is_comment_only = False
-                                break
-
-                        if not is_comment_only:
-                            conn.execute(text(stmt))
+            with metrics.stage('sql_file', file=os.path.basename(sql_file)), engine.begin() as conn:
+                for stmt in iter_sql_statements(sql):
+                    view_match = VIEW_STATEMENT_PATTERN.match(strip_leading_comments(stmt))
+                    if view_match:
+                        started = time.perf_counter()
+                        view_name = view_match.group(1).split('.')[-1].strip('"')
+                        fresh = f'"{schema}"."{view_name}"' in fresh_views
+                        action = execute_view_statement(conn, stmt, view_mode, fresh=fresh)
+                        elapsed = time.perf_counter() - started
+                        metrics.record('view', elapsed, view=view_match.group(1), mode=view_mode)
+                        print(f"  ✓ {action} ({elapsed:.2f}s)")
+                    else:
+                        conn.execute(text(stmt))
 
             print(f"✓ Successfully executed: {os.path.basename(sql_file)}")
 
@@ -378,6 +1014,10 @@ def validate_all_tables(engine, schema, tables):
     - Column names differ
     - Column order differs
     - Data types differ
+
+    bigint and double precision columns are interchangeable: whether a numeric column has
+    blanks decides which one is inferred, so such a column is cast to the live table's type
+    (integral values only, for bigint) instead of being rejected.
     """
     errors = []
 
@@ -390,6 +1030,27 @@ def validate_all_tables(engine, schema, tables):
 
         df_struct = infer_df_structure(df)
 
+        for (db_col, db_type), (csv_col, csv_type) in zip(db_struct, df_struct):
+            if db_col != csv_col or db_type == csv_type or {db_type, csv_type} != set(NUMERIC_PG_TYPES):
+                continue
+            if db_type == 'double precision':
+                df[db_col] = df[db_col].astype('float64')
+            elif (df[db_col].dropna() % 1 == 0).all():
+                df[db_col] = df[db_col].astype('Int64')
+        df_struct = infer_df_structure(df)
+
+        # Text columns now parsed to numbers are promoted rather than rejected
+        promoted = [
+            (db_col, csv_type)
+            for (db_col, db_type), (csv_col, csv_type) in zip(db_struct, df_struct)
+            if db_col == csv_col and db_type == 'text' and csv_type in NUMERIC_PG_TYPES
+        ]
+        if promoted and len(db_struct) == len(df_struct):
+            promoted_types = dict(promoted)
+            db_struct = [(col, promoted_types.get(col, data_type)) for col, data_type in db_struct]
+            for col, data_type in promoted:
+                print(f"  → {schema}.{table_name}.{col} will be promoted from text to {data_type}")
+
         # Check if structures are exactly the same
         if db_struct != df_struct:
             # Build detailed error message
@@ -462,57 +1123,296 @@ def truncate_table(engine, schema, table_name):
     print(f"✓ Truncated {schema}.{table_name}")
 
 
-# ---------- Main ETL ----------
+def iter_dataframe_csv(df, chunk_rows=COPY_CHUNK_ROWS):
+    """Render a DataFrame as COPY-ready CSV text, one slice of rows at a time"""
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(
+            index=False, header=False, na_rep=COPY_NULL, date_format='%Y-%m-%d'
+        )
 
-def load_csvs_to_db():
-    schema = postgres_config['schema']
 
-    engine = create_engine(
-        f"postgresql://{postgres_config['user']}:"
-        f"{postgres_config['password']}@"
-        f"{postgres_config['host']}:"
-        f"{postgres_config['port']}/"
-        f"{postgres_config['database']}"
+def create_table_from_structure(cursor, schema, table_name, structure):
+    """Create a table from an infer_df_structure() column list"""
+    columns = ', '.join(f'"{col}" {data_type}' for col, data_type in structure)
+    cursor.execute(f'CREATE TABLE "{schema}"."{table_name}" ({columns})')
+
+
+def copy_dataframe(cursor, schema, table_name, df, freeze=False):
+    """
+    Stream a DataFrame into an existing table with COPY ... FROM STDIN.
+    `freeze` writes the rows already frozen; the table must have been created or truncated
+    in the same transaction.
+    """
+    columns = ', '.join(f'"{col}"' for col in df.columns)
+    cursor.copy_expert(
+        f'COPY "{schema}"."{table_name}" ({columns}) '
+        f"FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}'{', FREEZE' if freeze else ''})",
+        IteratorFile(iter_dataframe_csv(df))
     )
 
-    # Get CSV files from all subdirectories (instances) or root csv_files dir
-    csv_files = glob.glob("csv_files/**/*.csv", recursive=True)
 
-    tables = {}
+def copy_table_frames(cursor, schema, table_name, source, freeze=False):
+    """COPY a DataFrame, or every chunk of a ChunkedTable, into a table; returns the row count"""
+    row_count = 0
+    for df in iter_table_frames(source):
+        copy_dataframe(cursor, schema, table_name, df, freeze)
+        row_count += len(df)
+    return row_count
 
-    print("\n" + "=" * 80)
-    print("EXTRACT & TRANSFORM PHASE")
-    print("=" * 80 + "\n")
 
-    # ---------- Extract + Transform (NO DB TOUCH) ----------
-    print("csv_files", csv_files)
-    for csv_file in csv_files:
-        # Extract table name from filename
-        table_name = to_snake_case(os.path.splitext(os.path.basename(csv_file))[0])
+def replace_table_contents(cursor, schema, table_name, source, db_struct):
+    """
+    Truncate (or create, if `db_struct` is None) a table and COPY the DataFrame (or chunks)
+    into it, all on the caller's open transaction. New tables use table_structure() so column
+    types match what validate_all_tables() checks. Returns the row count.
+    """
+    if db_struct is None:
+        create_table_from_structure(cursor, schema, table_name, table_structure(source))
+        print(f"✓ Created {schema}.{table_name}")
+    else:
+        cursor.execute(f'TRUNCATE TABLE "{schema}"."{table_name}" RESTART IDENTITY CASCADE')
+        print(f"✓ Truncated {schema}.{table_name}")
+
+    return copy_table_frames(cursor, schema, table_name, source)
+
+
+def record_load_rate(schema, table_name, row_count, elapsed, load_method, target=None):
+    """Print a table's load rate and record it in the run metrics; `target` is the staging table loaded, if any"""
+    rate = row_count / elapsed if elapsed > 0 else 0
+    print(f"✓ Loaded {schema}.{target or table_name} ({row_count} rows in {elapsed:.2f}s, {rate:,.0f} rows/s, {load_method})")
+
+    metrics = get_run_metrics()
+    metrics.record('load_table', elapsed, table=table_name, method=load_method)
+    metrics.add('rows_loaded', row_count, table=table_name)
+
+
+def load_table(engine, schema, table_name, source):
+    """Truncate and load one table (DataFrame or ChunkedTable) with DataFrame.to_sql (load_method='insert')"""
+    truncate_table(engine, schema, table_name)
+    started = time.perf_counter()
+
+    # Dates are held as datetime64; keep them as DATE rather than TIMESTAMP
+    date_columns = {col: Date() for col, data_type in table_structure(source) if data_type == "date"}
+    row_count = 0
+    for df in iter_table_frames(source):
+        df.to_sql(
+            table_name,
+            engine,
+            schema=schema,
+            if_exists="append",
+            index=False,
+            dtype=date_columns
+        )
+        row_count += len(df)
 
-        df = pd.read_csv(csv_file, low_memory=False)
+    record_load_rate(schema, table_name, row_count, time.perf_counter() - started, 'insert')
 
-        # Preserve instance_key column if it exists
-        instance_key_col = None
-        if 'instance_key' in df.columns:
-            instance_key_col = df['instance_key'].copy()
-            # Remove it temporarily for processing
-            df = df.drop(columns=['instance_key'])
 
-        df.columns = [to_snake_case(c) for c in df.columns]
+def supports_two_phase_commit(engine):
+    """Whether the server allows PREPARE TRANSACTION (max_prepared_transactions > 0)"""
+    with engine.connect() as conn:
+        return int(conn.execute(text("SHOW max_prepared_transactions")).scalar()) > 0
 
-        # Promote types in correct order
-        df = promote_numeric_columns(df)
-        df = promote_date_columns(df)
 
-        # Replace full-null columns
-        for col in df.columns:
-            if df[col].isna().all():
-                df[col] = ""
+def load_tables_parallel(engine, schema, tables, workers=DEFAULT_LOAD_WORKERS, commit_mode=DEFAULT_COMMIT_MODE,
+                         load_strategy=DEFAULT_LOAD_STRATEGY, rebuild_view=None, on_loaded=None):
+    """
+    COPY every table concurrently, each on its own connection.
+
+    load_strategy 'swap' COPYs into a new staging table, builds its indexes and then
+    renames it over the live table in one short transaction, so readers never see an empty
+    or half-loaded table. 'truncate' truncates and reloads the live tables in place.
+
+    commit_mode 'atomic' makes all tables change together: every swap runs in a single
+    transaction, or with 'truncate' every table's transaction is held open until all loads
+    succeed (two-phase commit when the server allows it). Any failure leaves every table
+    as it was. 'per_table' commits each table as soon as it is loaded.
+
+    `rebuild_view` is passed to swap_in_staging for dependent views that must be rebuilt.
+    `on_loaded(table_names)` is called with the tables whose new data was committed, also
+    when the load fails.
 
-        # Add instance_key column back if it existed
-        if instance_key_col is not None:
-            df.insert(1, 'instance_key', instance_key_col)
+    Materialized views depending on swapped tables are re-created empty inside the swap and
+    populated once before it commits; a view that cannot be populated fails the swap.
+    Returns the materialized views populated that way.
+    """
+    if commit_mode not in ('atomic', 'per_table'):
+        raise ValueError(f"Unknown commit mode '{commit_mode}' (expected 'atomic' or 'per_table')")
+    if load_strategy not in ('swap', 'truncate'):
+        raise ValueError(f"Unknown load strategy '{load_strategy}' (expected 'swap' or 'truncate')")
+
+    use_tpc = load_strategy == 'truncate' and commit_mode == 'atomic' and supports_two_phase_commit(engine)
+    run_id = uuid.uuid4().hex[:12]
+    if load_strategy == 'swap':
+        print(f"Loading {len(tables)} table(s) on {workers} connection(s), staging swap, "
+              f"{'atomic' if commit_mode == 'atomic' else 'per-table'} commit")
+    elif commit_mode == 'atomic':
+        print(f"Loading {len(tables)} table(s) on {workers} connection(s), "
+              f"atomic commit ({'two-phase' if use_tpc else 'coordinated'})")
+    else:
+        print(f"Loading {len(tables)} table(s) on {workers} connection(s), per-table commit")
+
+    def stage_one(table_name, source):
+        raw_conn = engine.raw_connection()
+        try:
+            started = time.perf_counter()
+            cursor = raw_conn.cursor()
+            create_staging_table(cursor, schema, table_name, table_structure(source))
+            # The staging table is created in this transaction, so its rows can be COPYed frozen
+            row_count = copy_table_frames(cursor, schema, staging_name(table_name), source, freeze=True)
+            finish_staging_table(cursor, schema, table_name)
+            raw_conn.commit()
+            record_load_rate(schema, table_name, row_count, time.perf_counter() - started, 'copy',
+                             target=staging_name(table_name))
+
+            populated = []
+            if commit_mode == 'per_table':
+                matviews = swap_in_staging(cursor, schema, table_name, rebuild_view)
+                populated = populate_materialized_views(cursor, matviews)
+                raw_conn.commit()
+                print(f"✓ Swapped in {schema}.{table_name}")
+            cursor.close()
+            return populated
+        except Exception:
+            raw_conn.rollback()
+            raise
+        finally:
+            raw_conn.close()
+
+    def load_one(table_name, source):
+        db_struct = get_db_structure(engine, schema, table_name)
+        raw_conn = engine.raw_connection()
+        try:
+            if use_tpc:
+                raw_conn.tpc_begin(raw_conn.xid(0, f"etl-{run_id}-{table_name}", schema))
+
+            started = time.perf_counter()
+            cursor = raw_conn.cursor()
+            row_count = replace_table_contents(cursor, schema, table_name, source, db_struct)
+            cursor.close()
+
+            if use_tpc:
+                raw_conn.tpc_prepare()
+            elif commit_mode == 'per_table':
+                raw_conn.commit()
+
+            record_load_rate(schema, table_name, row_count, time.perf_counter() - started, 'copy')
+            return raw_conn
+        except Exception:
+            if use_tpc:
+                raw_conn.tpc_rollback()
+            else:
+                raw_conn.rollback()
+            raw_conn.close()
+            raise
+
+    task = stage_one if load_strategy == 'swap' else load_one
+    pending = {}
+    failures = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        future_to_table = {executor.submit(task, name, source): name for name, source in tables.items()}
+        for fut in concurrent.futures.as_completed(future_to_table):
+            table_name = future_to_table[fut]
+            try:
+                pending[table_name] = fut.result()
+            except Exception as e:
+                print(f"✗ Failed to load {schema}.{table_name}: {str(e)}")
+                failures.append(table_name)
+
+    populated = []
+    if load_strategy == 'swap':
+        for table_populated in pending.values():
+            populated.extend(table_populated)
+        populated.extend(swap_staging_tables(engine, schema, list(tables), commit_mode, failures, rebuild_view))
+    else:
+        # Finish the open transactions: commit everything, or roll everything back on failure
+        for table_name, raw_conn in pending.items():
+            try:
+                if commit_mode == 'per_table':
+                    continue
+                if failures and use_tpc:
+                    raw_conn.tpc_rollback()
+                elif failures:
+                    raw_conn.rollback()
+                elif use_tpc:
+                    raw_conn.tpc_commit()
+                else:
+                    raw_conn.commit()
+            finally:
+                raw_conn.close()
+
+    if on_loaded is not None:
+        if commit_mode == 'per_table':
+            on_loaded([name for name in tables if name not in failures])
+        elif not failures:
+            on_loaded(list(tables))
+
+    if failures:
+        if commit_mode == 'atomic':
+            print(f"✗ Rolled back all {len(tables)} table(s)")
+        raise RuntimeError(f"Load failed for table(s): {', '.join(sorted(failures))}")
+
+    if commit_mode == 'atomic':
+        print(f"✓ Committed {len(tables)} table(s)")
+    return populated
+
+
+def swap_staging_tables(engine, schema, table_names, commit_mode, failures, rebuild_view=None):
+    """
+    After the staging loads: swap every table in one transaction (atomic mode, only when
+    nothing failed), populating the materialized views it re-created before committing,
+    then drop whatever staging tables are left over. Returns the materialized views populated.
+    """
+    populated = []
+    raw_conn = engine.raw_connection()
+    try:
+        cursor = raw_conn.cursor()
+        if commit_mode == 'atomic' and not failures:
+            started = time.perf_counter()
+            try:
+                matviews = []
+                for table_name in table_names:
+                    matviews.extend(swap_in_staging(cursor, schema, table_name, rebuild_view))
+                populated = populate_materialized_views(cursor, matviews)
+                raw_conn.commit()
+                elapsed = time.perf_counter() - started
+                get_run_metrics().record('swap', elapsed)
+                print(f"✓ Swapped in {len(table_names)} table(s) in {elapsed:.2f}s")
+            except Exception as e:
+                raw_conn.rollback()
+                print(f"✗ Failed to swap in staging tables: {str(e)}")
+                failures.append('(swap)')
+                populated = []
+
+        for table_name in table_names:
+            drop_staging_table(cursor, schema, table_name)
+        raw_conn.commit()
+        cursor.close()
+    finally:
+        raw_conn.close()
+    return populated
+
+
+# ---------- Main ETL ----------
+
+def extract_tables(csv_files, numeric_column_rules):
+    """
+    Read and transform every CSV whole, merging the files of each table (one per instance)
+    into a single DataFrame. Parquet files are read already typed. Returns {table_name: DataFrame}.
+    """
+    tables = {}
+    for csv_file in csv_files:
+        # Extract table name from filename
+        table_name = to_snake_case(os.path.splitext(os.path.basename(csv_file))[0])
+
+        file_kind = 'Parquet' if csv_file.endswith('.parquet') else 'CSV'
+        with get_run_metrics().stage('extract_file', table=table_name):
+            if csv_file.endswith('.parquet'):
+                df = transform_frame(read_parquet(csv_file), numeric_column_rules.get(table_name, {}), infer=False)
+            else:
+                df = pd.read_csv(csv_file, low_memory=False)
+                df = transform_frame(df, numeric_column_rules.get(table_name, {}))
+        get_run_metrics().add('rows_parsed', len(df), table=table_name)
 
         # Merge with existing dataframe if table name already exists
         if table_name in tables:
@@ -540,56 +1440,219 @@ def load_csvs_to_db():
 
             # Safe to merge - structures are now identical
             df = pd.concat([existing_df, df], ignore_index=True)
-            print(f"✓ Merged CSV: {csv_file} ({len(df)} rows total in table '{table_name}')")
+            print(f"✓ Merged {file_kind}: {csv_file} ({len(df)} rows total in table '{table_name}')")
         else:
-            print(f"✓ Loaded CSV: {csv_file} ({len(df)} rows, {len(df.columns)} columns)")
+            print(f"✓ Loaded {file_kind}: {csv_file} ({len(df)} rows, {len(df.columns)} columns)")
 
         tables[table_name] = df
 
+    return tables
+
+
+def extract_chunked_tables(csv_files, chunk_rows, numeric_column_rules):
+    """Group the CSVs by table for streaming; nothing is read yet. Returns {table_name: ChunkedTable}"""
+    files_by_table = {}
+    for csv_file in csv_files:
+        table_name = to_snake_case(os.path.splitext(os.path.basename(csv_file))[0])
+        files_by_table.setdefault(table_name, []).append(csv_file)
+
+    tables = {}
+    for table_name, table_files in files_by_table.items():
+        tables[table_name] = ChunkedTable(table_name, table_files, chunk_rows, numeric_column_rules.get(table_name, {}))
+        print(f"✓ Found {len(table_files)} file(s) for '{table_name}' (streamed in chunks of {chunk_rows} rows)")
+
+    return tables
+
+
+def validate_chunked_tables(engine, schema, tables):
+    """
+    Fix each ChunkedTable's structure in a SchemaRegistry: the live table's, or the types
+    inferred from the first chunk for new tables. Raises if a table cannot be loaded.
+    """
+    registry = SchemaRegistry(lambda table_name: get_db_structure(engine, schema, table_name))
+    errors = []
+
+    for table_name, table in tables.items():
+        try:
+            table.structure = registry.register(table_name, infer_df_structure(table.first_chunk()))
+            print(f"✓ Registered {schema}.{table_name} ({len(table.structure)} columns)")
+        except ValueError as e:
+            errors.append(str(e))
+
+    if errors:
+        raise RuntimeError(
+            "\n\n" + "=" * 80 + "\n" +
+            "SCHEMA VALIDATION FAILED\n" +
+            "=" * 80 + "\n\n" +
+            "\n\n".join(errors) +
+            "\n\n" + "=" * 80 + "\n"
+        )
+
+    print("✓ All table schemas validated successfully")
+
+
+def create_db_engine(load_workers=DEFAULT_LOAD_WORKERS, table_count=0):
+    """SQLAlchemy engine for the configured database, sized for `load_workers` parallel loads of `table_count` tables"""
+    postgres_config = config_loader.get_postgres_config()
+    return create_engine(
+        f"postgresql://{postgres_config['user']}:"
+        f"{postgres_config['password']}@"
+        f"{postgres_config['host']}:"
+        f"{postgres_config['port']}/"
+        f"{postgres_config['database']}",
+        # A truncate + atomic load holds one connection per table until the coordinated commit,
+        # while up to `load_workers` more read table structures; one spare for the coordinator
+        pool_size=max(5, load_workers),
+        max_overflow=table_count + 1
+    )
+
+
+def rebuild_views(view_mode=DEFAULT_VIEW_MODE, ledger=None):
+    """(Re)build the reporting views from sql/ without loading any data"""
+    schema = config_loader.get_postgres_config()['schema']
+    engine = create_db_engine()
+    try:
+        refresh_views(engine, schema, view_mode, ledger)
+    finally:
+        engine.dispose()
+
+
+def refresh_views(engine, schema, view_mode=DEFAULT_VIEW_MODE, ledger=None, tables_loaded=False, fresh_views=()):
+    """
+    Run the SQL files and record it in `ledger`. Skipped when the resumed run already
+    refreshed the views in this mode and no table has been loaded since.
+    `fresh_views` are passed to run_sql_files.
+    """
+    if ledger is not None and not tables_loaded and \
+            ledger.completed(ALL_UNITS, ALL_UNITS, VIEWS_REFRESHED, view_mode) is not None:
+        print("→ Skipped views: refreshed in the resumed run")
+        return
+
+    with get_run_metrics().stage('views', mode=view_mode):
+        run_sql_files(engine, schema, view_mode=view_mode, fresh_views=fresh_views)
+    if ledger is not None:
+        ledger.record(ALL_UNITS, ALL_UNITS, VIEWS_REFRESHED, view_mode)
+
+
+def load_csvs_to_db(load_method=DEFAULT_LOAD_METHOD, load_workers=DEFAULT_LOAD_WORKERS, commit_mode=DEFAULT_COMMIT_MODE,
+                    load_strategy=DEFAULT_LOAD_STRATEGY, view_mode=DEFAULT_VIEW_MODE,
+                    chunk_rows=DEFAULT_CHUNK_ROWS, ledger=None):
+    """
+    Extract, transform, validate and load every CSV or Parquet file in csv_files/ into Postgres.
+
+    With load_method 'copy' the tables are loaded in parallel on `load_workers`
+    connections, through staging tables swapped in (load_strategy 'swap') or in place
+    ('truncate'), and committed together (commit_mode 'atomic') or one by one
+    ('per_table'). load_method 'insert' loads them sequentially with DataFrame.to_sql.
+    The reporting views are then (re)built as plain or materialized views per `view_mode`.
+
+    With `chunk_rows` set, each CSV is streamed `chunk_rows` rows at a time straight into
+    the database instead of being read whole, so memory is bounded by the chunk size
+    (times `load_workers`). Column types come from the live table or the first chunk.
+
+    Loaded tables and the view refresh are recorded in `ledger` (a started RunLedger).
+    Tables the resumed run already loaded from the same files are skipped.
+    """
+    schema = config_loader.get_postgres_config()['schema']
+
+    # Get CSV and Parquet files from all subdirectories (instances) or root csv_files dir
+    csv_files = sorted(glob.glob("csv_files/**/*.csv", recursive=True) +
+                       glob.glob("csv_files/**/*.parquet", recursive=True))
+
+    # A table counts as loaded only while its source files are unchanged
+    files_by_table = {}
+    for csv_file in csv_files:
+        files_by_table.setdefault(to_snake_case(os.path.splitext(os.path.basename(csv_file))[0]), []).append(csv_file)
+    table_fingerprints = {name: files_fingerprint(paths) for name, paths in files_by_table.items()}
+    engine = create_db_engine(load_workers, table_count=len(files_by_table))
+
+    if ledger is not None:
+        for table_name, table_fingerprint in table_fingerprints.items():
+            if ledger.completed(ALL_UNITS, table_name, LOADED, table_fingerprint) is not None:
+                print(f"→ Skipped {schema}.{table_name}: loaded in the resumed run")
+                csv_files = [f for f in csv_files if f not in files_by_table[table_name]]
+
+    def record_loaded(table_names):
+        if ledger is not None:
+            for table_name in table_names:
+                ledger.record(ALL_UNITS, table_name, LOADED, table_fingerprints[table_name])
+
+    # Per-report numeric_columns / text_columns overrides for the money-column rules
+    numeric_column_rules = config_loader.get_numeric_column_rules()
+
+    print("\n" + "=" * 80)
+    print("EXTRACT & TRANSFORM PHASE")
+    print("=" * 80 + "\n")
+
+    metrics = get_run_metrics()
+
+    # ---------- Extract + Transform (NO DB TOUCH) ----------
+    print("csv_files", csv_files)
+    with metrics.stage('extract'):
+        if chunk_rows:
+            tables = extract_chunked_tables(csv_files, chunk_rows, numeric_column_rules)
+        else:
+            tables = extract_tables(csv_files, numeric_column_rules)
+
     print("\n" + "=" * 80)
     print("VALIDATION PHASE")
     print("=" * 80 + "\n")
 
     # ---------- Pre-flight schema validation (STRICT) ----------
-    validate_all_tables(engine, schema, tables)
+    with metrics.stage('validate'):
+        if chunk_rows:
+            validate_chunked_tables(engine, schema, tables)
+        else:
+            validate_all_tables(engine, schema, tables)
 
     print("\n" + "=" * 80)
     print("LOAD PHASE")
     print("=" * 80 + "\n")
 
     # ---------- Load (safe) ----------
-    for table_name, df in tables.items():
-        try:
-            truncate_table(engine, schema, table_name)
-            df.to_sql(
-                table_name,
-                engine,
-                schema=schema,
-                if_exists="append",
-                index=False
-            )
-            print(f"✓ Loaded {schema}.{table_name} ({len(df)} rows)")
-        except Exception as e:
-            print(f"✗ Failed to load {schema}.{table_name}: {str(e)}")
-            engine.dispose()  # Close all connections
-            raise
+    fresh_views = []
+    with metrics.stage('load', method=load_method):
+        if not tables:
+            print("Nothing to load")
+        elif load_method == 'copy':
+            try:
+                fresh_views = load_tables_parallel(engine, schema, tables, load_workers, commit_mode, load_strategy,
+                                                   rebuild_view=view_rebuilder(), on_loaded=record_loaded)
+            except Exception:
+                engine.dispose()  # Close all connections
+                raise
+        elif load_method == 'insert':
+            for table_name, source in tables.items():
+                try:
+                    load_table(engine, schema, table_name, source)
+                    record_loaded([table_name])
+                except Exception as e:
+                    print(f"✗ Failed to load {schema}.{table_name}: {str(e)}")
+                    engine.dispose()  # Close all connections
+                    raise
+        else:
+            raise ValueError(f"Unknown load method '{load_method}' (expected 'copy' or 'insert')")
 
-    run_sql_files(engine, schema)
+    refresh_views(engine, schema, view_mode, ledger, tables_loaded=bool(tables), fresh_views=fresh_views)
 
     print("\n" + "=" * 80)
     print("ETL COMPLETE")
     print("=" * 80 + "\n")
 
 
-def main():
+def main(argv=None):
+    """
+    Fetch the report results and load them, i.e. `python cli.py all --skip-generate`.
+    `argv` (default: the command line) takes that command's options, such as --resume.
+    """
+    import cli
+
     print("\n" + "=" * 80)
     print("STARTING ETL PIPELINE")
     print("=" * 80 + "\n")
 
-    fetch_reports_to_csv()
-
-    load_csvs_to_db()
+    cli.main(['all', '--skip-generate', *(sys.argv[1:] if argv is None else argv)])
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
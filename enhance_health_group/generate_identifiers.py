@@ -1,3 +1,6 @@
+import collections
+import heapq
+import random
 import time
 import xml.etree.ElementTree as ET
 
@@ -5,33 +8,85 @@ import psycopg2
 import requests
 
 from config_loader import ConfigLoader
+from db_pool import get_pool
+from instrumentation import get_run_metrics
+from rate_limiter import TokenBucket
 import concurrent.futures
 import argparse
 import sys
 
 # Load config using multi-instance aware loader
 # Prefer the new Python config if present, otherwise fall back to the old INI
+# The file is read on first use and parsed once, so importing this module does no config I/O
 config_path = 'config/config.py'
 config_loader = ConfigLoader(config_path)
-postgres_config = config_loader.get_postgres_config()
-schema = postgres_config['schema']
 
-# Validate configuration
-is_valid, errors = config_loader.validate_instances()
-if not is_valid:
-    print("Configuration validation failed:")
-    for error in errors:
-        print(f"  - {error}")
-    exit(1)
+# Rotate the active identifier in one round trip. `retired` is read by the insert so the
+# old row is switched off before the new one hits uq_account_reports_active; a concurrent
+# rotation of the same report makes the insert a no-op (inserted_id is NULL).
+ROTATE_IDENTIFIER_SQL = """
+    WITH duplicate AS (
+        SELECT 1
+        FROM {schema}.account_reports
+        WHERE customer_account = %(customer_account)s AND report_name = %(report_name)s
+          AND identifier = %(identifier)s AND instance_key = %(instance_key)s
+    ), retired AS (
+        UPDATE {schema}.account_reports
+        SET status = 0
+        WHERE customer_account = %(customer_account)s AND report_name = %(report_name)s
+          AND status = 1 AND instance_key = %(instance_key)s
+          AND NOT EXISTS (SELECT 1 FROM duplicate)
+        RETURNING id
+    ), inserted AS (
+        INSERT INTO {schema}.account_reports (customer_account, report_name, identifier, status, instance_key)
+        SELECT %(customer_account)s, %(report_name)s, %(identifier)s, 1, %(instance_key)s
+        WHERE NOT EXISTS (SELECT 1 FROM duplicate)
+          AND (SELECT count(*) FROM retired) >= 0
+        ON CONFLICT (instance_key, customer_account, report_name) WHERE status = 1 DO NOTHING
+        RETURNING id
+    )
+    SELECT EXISTS (SELECT 1 FROM duplicate), (SELECT id FROM inserted)
+"""
+
+# Index from vantage/sqlReportApi/psql-account-reports-active-index.sql, schema-qualified.
+# Existing duplicate active rows are only retired by that migration, never here.
+ACTIVE_INDEX_MIGRATION = 'vantage/sqlReportApi/psql-account-reports-active-index.sql'
+ACTIVE_INDEX_SQL = """
+    CREATE UNIQUE INDEX IF NOT EXISTS uq_account_reports_active
+        ON {schema}.account_reports (instance_key, customer_account, report_name)
+        WHERE status = 1
+"""
+DUPLICATE_ACTIVE_SQL = """
+    SELECT instance_key, customer_account, report_name, count(*)
+    FROM {schema}.account_reports
+    WHERE status = 1
+    GROUP BY instance_key, customer_account, report_name
+    HAVING count(*) > 1
+    ORDER BY instance_key, customer_account, report_name
+"""
+
+
+# Backoff for report runs that are still running or returned a duplicate identifier
+POLL_INITIAL_DELAY = 10
+POLL_MAX_DELAY = 120
+POLL_MAX_ATTEMPTS = 60
+# Upper bound on the default worker pool, whatever the instances' generate_workers add up to
+MAX_GENERATE_WORKERS = 32
+
 
 def postgres_connection():
-    return psycopg2.connect(
-        host=postgres_config['host'],
-        user=postgres_config['user'],
-        password=postgres_config['password'],
-        dbname=postgres_config['database'],
-        port=postgres_config['port']
-    )
+    """Check out a connection from the shared pool; use as a context manager"""
+    return get_pool(config_loader.get_postgres_config()).connection()
+
+
+def validate_config():
+    """Exit with the list of problems if the instance configuration is invalid"""
+    is_valid, errors = config_loader.validate_instances()
+    if not is_valid:
+        print("Configuration validation failed:")
+        for error in errors:
+            print(f"  - {error}")
+        exit(1)
 
 def handle_report_response(response_text, customer_account, report_name, instance_key):
     try:
@@ -56,27 +111,28 @@ def handle_report_response(response_text, customer_account, report_name, instanc
         if status not in ('SUCCESS', 'REPORT RUNNING'):
             return False, None
 
-        conn = postgres_connection()
-        cur = conn.cursor()
-
-        cur.execute(f"SELECT 1 FROM {schema}.account_reports WHERE customer_account = %s AND report_name = %s AND identifier = %s AND instance_key = %s",
-                    (customer_account, report_name, identifier, instance_key))
+        schema = config_loader.get_postgres_config()['schema']
+        with postgres_connection() as conn:
+            cur = conn.cursor()
+            # Duplicate check, retirement of the active row and the insert run as one statement
+            cur.execute(ROTATE_IDENTIFIER_SQL.format(schema=schema), {
+                'customer_account': customer_account,
+                'report_name': report_name,
+                'identifier': identifier,
+                'instance_key': instance_key,
+            })
+            duplicate, inserted_id = cur.fetchone()
+            conn.commit()
+            cur.close()
 
-        if cur.fetchone():
+        if duplicate:
             print(f"Duplicate identifier {identifier} detected for {report_name} - account {customer_account} - instance {instance_key}")
-            cur.close()
-            conn.close()
             return "DUPLICATE", identifier
 
-        cur.execute(f"UPDATE {schema}.account_reports SET status = 0 WHERE customer_account = %s AND report_name = %s AND status = 1 AND instance_key = %s",
-                    (customer_account, report_name, instance_key))
-
-        cur.execute(f"INSERT INTO {schema}.account_reports (customer_account, report_name, identifier, status, instance_key) VALUES (%s, %s, %s, 1, %s)",
-                    (customer_account, report_name, identifier, instance_key))
+        if inserted_id is None:
+            print(f"Identifier for {report_name} - account {customer_account} - instance {instance_key} was rotated concurrently")
+            return "DUPLICATE", identifier
 
-        conn.commit()
-        cur.close()
-        conn.close()
         return True, identifier
     except ET.ParseError as e:
         print(f"ERROR: Failed to parse XML response for {report_name} - account {customer_account} - instance {instance_key}: {e}")
@@ -89,48 +145,172 @@ def handle_report_response(response_text, customer_account, report_name, instanc
         return "ERROR", None
 
 
-def generate_report_for_all_accounts(report_id, filter_id, report_name, instance_key, base_url, username, password, accounts):
-    for account in accounts:
-        while True:
-            url = f"{base_url}/customer/{account}/reports/{report_id}/filter/{filter_id}/run"
-            payload = f"<Run><Nonce>{time.time()}</Nonce></Run>"
-            headers = {"Content-Type": "application/xml"}
-
-            response = requests.post(url, data=payload, headers=headers, auth=(username, password))
-            print(response.text)
-            print(f"{report_name.upper()} | {report_id} | Status: {response.status_code} | Instance: {instance_key} | Account: {account}")
-
-            if response.status_code == 200:
-                result, identifier = handle_report_response(response.text, account, report_name, instance_key)
-                if result is True:
-                    print(f"{report_name} report started and DB updated for account {account} - instance {instance_key}")
-                    break
-                elif result == "RUNNING":
-                    print(f"Report for {account} ({instance_key}) is still running. Waiting 60 seconds before retrying...")
-                    time.sleep(60)
+def ensure_active_identifier_index():
+    """
+    Create the unique partial index the identifier upsert depends on, if it is missing.
+    Raises RuntimeError, listing the reports concerned, when several identifiers of one
+    report are active: retiring them is left to the explicit migration.
+    """
+    schema = config_loader.get_postgres_config()['schema']
+    with postgres_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                "SELECT 1 FROM pg_indexes WHERE schemaname = %s AND indexname = 'uq_account_reports_active'",
+                (schema,)
+            )
+            if cur.fetchone() is not None:
+                return
+
+            cur.execute(DUPLICATE_ACTIVE_SQL.format(schema=schema))
+            duplicates = cur.fetchall()
+            if duplicates:
+                for instance_key, customer_account, report_name, count in duplicates:
+                    print(f"✗ {count} active identifiers for {report_name} - account {customer_account} - instance {instance_key}")
+                raise RuntimeError(
+                    f"Cannot create uq_account_reports_active: {len(duplicates)} report(s) have several active "
+                    f"identifiers. Run {ACTIVE_INDEX_MIGRATION} to keep only the newest of each."
+                )
+
+            print("Creating unique index uq_account_reports_active on account_reports")
+            cur.execute(ACTIVE_INDEX_SQL.format(schema=schema))
+            conn.commit()
+        finally:
+            cur.close()
+
+
+def request_report_run(run):
+    """
+    Make one attempt at starting a report run for a single account.
+    Returns True when the run is finished (started, skipped or failed) and False when it
+    should be polled again later (report still running or a duplicate identifier came back).
+    """
+    report_name = run['report_name']
+    instance_key = run['instance_key']
+    account = run['account']
+
+    url = f"{run['base_url']}/customer/{account}/reports/{run['report_id']}/filter/{run['filter_id']}/run"
+    payload = f"<Run><Nonce>{time.time()}</Nonce></Run>"
+    headers = {"Content-Type": "application/xml"}
+
+    labels = {'instance': instance_key, 'report': report_name}
+    metrics = get_run_metrics()
+    metrics.add('report_run_attempts', **labels)
+
+    run['rate_limiter'].acquire()
+    with metrics.stage('report_run_request', **labels):
+        response = requests.post(url, data=payload, headers=headers, auth=(run['username'], run['password']))
+    print(response.text)
+    print(f"{report_name.upper()} | {run['report_id']} | Status: {response.status_code} | Instance: {instance_key} | Account: {account}")
+
+    if response.status_code != 200:
+        print(f"API call failed for {report_name} - account {account} - instance {instance_key} - Status: {response.status_code}")
+        metrics.add('report_run_failures', **labels)
+        return True
+
+    result, identifier = handle_report_response(response.text, account, report_name, instance_key)
+    if result is True:
+        print(f"{report_name} report started and DB updated for account {account} - instance {instance_key}")
+        return True
+    elif result == "RUNNING":
+        print(f"Report for {account} ({instance_key}) - {report_name} is still running. Will poll again...")
+        return False
+    elif result == "DUPLICATE":
+        print(f"Duplicate report identifier {identifier} returned {account} ({instance_key}) - {report_name}. Will poll again...")
+        return False
+    elif result == "ERROR":
+        print(f"Skipping {report_name} for account {account} - instance {instance_key} due to error")
+    else:
+        print(f"Failed to handle response for {report_name} - account {account} - instance {instance_key}")
+    return True
+
+
+def poll_delay(attempt):
+    """Exponential backoff with jitter for the given retry attempt (1-based)"""
+    delay = min(POLL_MAX_DELAY, POLL_INITIAL_DELAY * (2 ** (attempt - 1)))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def run_report_schedule(runs, max_workers, instance_workers=None):
+    """
+    Drive every report run to completion on a shared worker pool.
+
+    All runs are due immediately. A run that comes back still running or duplicated is
+    pushed back onto a due-time heap with exponential backoff, so one slow report never
+    holds up the others and total time is bounded by the slowest report.
+    `instance_workers` optionally caps the runs in flight per instance key.
+    """
+    instance_workers = instance_workers or {}
+    active = collections.Counter()
+
+    def has_capacity(run):
+        return active[run['instance_key']] < instance_workers.get(run['instance_key'], max_workers)
+
+    heap = []
+    for seq, run in enumerate(runs):
+        run['attempt'] = 0
+        heapq.heappush(heap, (0.0, seq, run))
+    seq = len(runs)
+
+    in_flight = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while heap or in_flight:
+            now = time.monotonic()
+            waiting = []
+            while heap and heap[0][0] <= now and len(in_flight) < max_workers:
+                entry = heapq.heappop(heap)
+                run = entry[2]
+                if not has_capacity(run):
+                    waiting.append(entry)
+                    continue
+                active[run['instance_key']] += 1
+                in_flight[executor.submit(request_report_run, run)] = run
+            for entry in waiting:
+                heapq.heappush(heap, entry)
+
+            # Wake for the next finished attempt, or when the next queued run that can start is due
+            timeout = None
+            if len(in_flight) < max_workers:
+                due_times = [due for due, _, run in heap if has_capacity(run)]
+                if due_times:
+                    timeout = max(0.0, min(due_times) - now)
+
+            if not in_flight:
+                time.sleep(timeout)
+                continue
+
+            done, _ = concurrent.futures.wait(in_flight, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED)
+            for fut in done:
+                run = in_flight.pop(fut)
+                active[run['instance_key']] -= 1
+                try:
+                    finished = fut.result()
+                except Exception as e:
+                    print(f"Report run {run['report_name']} - account {run['account']} - instance {run['instance_key']} raised an exception: {e}")
                     continue
-                elif result == "DUPLICATE":
-                    print(f"Duplicate report identifier {identifier} returned {account} ({instance_key}) - {report_name}. Waiting 60 seconds before retrying...")
-                    time.sleep(60)
+
+                if finished:
                     continue
-                elif result == "ERROR":
-                    print(f"Skipping {report_name} for account {account} - instance {instance_key} due to error")
-                    break
-                else:
-                    print(f"Failed to handle response for {report_name} - account {account} - instance {instance_key}")
-                    break
-            else:
-                print(f"API call failed for {report_name} - account {account} - instance {instance_key} - Status: {response.status_code}")
-                break
 
-        time.sleep(5)
+                run['attempt'] += 1
+                if run['attempt'] >= POLL_MAX_ATTEMPTS:
+                    print(f"Giving up on {run['report_name']} - account {run['account']} - instance {run['instance_key']} after {run['attempt']} attempts")
+                    continue
+
+                seq += 1
+                heapq.heappush(heap, (time.monotonic() + poll_delay(run['attempt']), seq, run))
 
 
 def run_all_reports(max_workers=None):
     """
     Generate reports for all configured instances.
-    Runs each instance in parallel using a thread pool. Per-instance behavior is unchanged (reports are run for each account sequentially).
+    Every (instance, report, account) run is started up front on a shared worker pool and
+    polled with exponential backoff while it is still running. Each instance keeps at most
+    its `generate_workers` runs in flight, and its API calls are paced by its
+    `requests_per_second` limit. The pool defaults to the sum of `generate_workers`, up to
+    MAX_GENERATE_WORKERS.
     """
+    validate_config()
     instances = config_loader.get_instances()
     instance_list = config_loader.list_instances()
 
@@ -139,50 +319,55 @@ def run_all_reports(max_workers=None):
     print(f"{'=' * 80}")
     print(f"Processing {len(instance_list)} instance(s): {', '.join(instance_list)}\n")
 
-    # Determine worker count
-    if max_workers is None:
-        max_workers = min(32, max(1, len(instance_list)))
-
-    def process_instance(instance_key):
+    runs = []
+    for instance_key in instance_list:
         instance_config = instances[instance_key]
-        print(f"\n{'=' * 80}")
-        print(f"INSTANCE: {instance_key}")
-        print(f"{'=' * 80}")
-        print(f"API URL: {instance_config['api_base_url']}")
-        print(f"Accounts: {instance_config['accounts']}\n")
+        print(f"INSTANCE: {instance_key} | API URL: {instance_config['api_base_url']} | Accounts: {list(instance_config['accounts'])}")
+
+        rate_limiter = TokenBucket(instance_config['requests_per_second'])
 
         # Fetch per-instance report configs or fall back to global/legacy
         report_configs = config_loader.get_report_configs(instance_key=instance_key)
 
         for report_config in report_configs:
-            generate_report_for_all_accounts(
-                report_id=report_config["report_id"],
-                filter_id=report_config["filter_id"],
-                report_name=report_config["name"],
-                instance_key=instance_key,
-                base_url=instance_config['api_base_url'],
-                username=instance_config['username'],
-                password=instance_config['password'],
-                accounts=instance_config['accounts']
-            )
+            for account in instance_config['accounts']:
+                runs.append({
+                    'report_id': report_config["report_id"],
+                    'filter_id': report_config["filter_id"],
+                    'report_name': report_config["name"],
+                    'instance_key': instance_key,
+                    'base_url': instance_config['api_base_url'],
+                    'username': instance_config['username'],
+                    'password': instance_config['password'],
+                    'account': account,
+                    'rate_limiter': rate_limiter,
+                })
 
-    # Run instances concurrently
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_instance = {executor.submit(process_instance, key): key for key in instance_list}
-        for fut in concurrent.futures.as_completed(future_to_instance):
-            key = future_to_instance[fut]
-            try:
-                fut.result()
-            except Exception as e:
-                print(f"Instance {key} raised an exception: {e}")
+    instance_workers = {key: instances[key]['generate_workers'] for key in instance_list}
+    if max_workers is None:
+        max_workers = min(MAX_GENERATE_WORKERS, max(1, sum(instance_workers.values())))
+
+    metrics = get_run_metrics('generate_identifiers')
+    ensure_active_identifier_index()
+
+    print(f"\nScheduling {len(runs)} report run(s) on {max_workers} worker(s)\n")
+    with metrics.stage('generate_identifiers'):
+        run_report_schedule(runs, max_workers, instance_workers)
+
+    get_pool(config_loader.get_postgres_config()).print_stats()
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Run generate_identifiers for multiple instances concurrently')
-    parser.add_argument('--workers', '-w', type=int, default=None, help='Number of instances to process concurrently (default=len(instances) up to 32)')
+    parser.add_argument('--workers', '-w', type=int, default=None, help='Number of report runs to request concurrently (default=sum of instance generate_workers up to 32)')
     args = parser.parse_args()
+    metrics = get_run_metrics('generate_identifiers')
+    status = 'failed'
     try:
         run_all_reports(max_workers=args.workers)
+        status = 'ok'
     except KeyboardInterrupt:
         print('\nInterrupted by user')
         sys.exit(1)
+    finally:
+        metrics.finish(status)
@@ -0,0 +1,172 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# JSON run reports are written here, one file per run
+RUN_REPORT_DIR = 'run_reports'
+# Path of a node_exporter textfile-collector file (*.prom) to update after each run; unset disables it
+PROMETHEUS_TEXTFILE = os.getenv('ETL_PROMETHEUS_TEXTFILE')
+METRIC_PREFIX = 'enhance_etl'
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+class RunMetrics:
+    """
+    Thread-safe timings and counters for one pipeline run.
+
+    `stage(name, instance=..., report=...)` times a block; repeated stages with the same
+    labels are summed. `add(name, value, ...)` accumulates counters such as bytes_downloaded,
+    rows_parsed and rows_loaded. `write_report()` saves everything as a JSON run report and
+    `write_prometheus()` as textfile-collector metrics.
+    """
+
+    def __init__(self, pipeline: str = 'etl'):
+        self.pipeline = pipeline
+        self.run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+
+    @contextmanager
+    def stage(self, name: str, **labels):
+        """Time the block as stage `name`; a block that raises is recorded with status 'failed'"""
+        started = time.perf_counter()
+        status = 'failed'
+        try:
+            yield
+            status = 'ok'
+        finally:
+            self.record(name, time.perf_counter() - started, status, **labels)
+
+    def record(self, name: str, seconds: float, status: str = 'ok', **labels):
+        """Record an already measured stage duration"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            entry = self._stages.setdefault(key, {'seconds': 0.0, 'count': 0, 'failed': 0})
+            entry['seconds'] += seconds
+            entry['count'] += 1
+            entry['failed'] += status != 'ok'
+
+    def add(self, name: str, value=1, **labels):
+        """Add `value` to counter `name`"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def report(self, status: str = 'ok') -> dict:
+        """The run as a JSON-serializable dict"""
+        with self._lock:
+            stages = [
+                {'stage': name, 'labels': dict(labels), 'seconds': round(entry['seconds'], 4),
+                 'count': entry['count'], 'failed': entry['failed']}
+                for (name, labels), entry in self._stages.items()
+            ]
+            counters = [
+                {'counter': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in self._counters.items()
+            ]
+
+        return {
+            'pipeline': self.pipeline,
+            'run_id': self.run_id,
+            'status': status,
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+            'duration_seconds': round(time.perf_counter() - self._started, 4),
+            'stages': sorted(stages, key=lambda s: -s['seconds']),
+            'counters': sorted(counters, key=lambda c: (c['counter'], sorted(c['labels'].items()))),
+        }
+
+    def write_report(self, status: str = 'ok', report_dir: str = RUN_REPORT_DIR) -> str:
+        """Write the JSON run report to `report_dir` and return its path"""
+        path = os.path.join(report_dir, f"{self.pipeline}-{self.run_id}.json")
+        _write_atomic(path, json.dumps(self.report(status), indent=2))
+        return path
+
+    def write_prometheus(self, path: str, status: str = 'ok'):
+        """
+        Write the run as Prometheus textfile-collector metrics. Every value describes the last
+        run only, so all metrics are gauges.
+        """
+        report = self.report(status)
+        pipeline = {'pipeline': self.pipeline}
+        lines = []
+
+        def metric(name, help_text, samples):
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+            for labels, value in samples:
+                label_text = ','.join(f'{k}="{_escape(v)}"' for k, v in {**pipeline, **labels}.items())
+                lines.append(f"{METRIC_PREFIX}_{name}{{{label_text}}} {value}")
+
+        metric('last_run_timestamp_seconds', 'Start time of the last run.', [({}, round(self.started_at, 3))])
+        metric('last_run_duration_seconds', 'Wall time of the last run.', [({}, report['duration_seconds'])])
+        metric('last_run_success', '1 if the last run completed, 0 if it failed.',
+               [({}, int(status == 'ok'))])
+        metric('stage_duration_seconds', 'Time spent in each stage during the last run.',
+               [({'stage': s['stage'], **s['labels']}, s['seconds']) for s in report['stages']])
+
+        for name in sorted({c['counter'] for c in report['counters']}):
+            metric(name, f"{name.replace('_', ' ').capitalize()} during the last run.",
+                   [(c['labels'], c['value']) for c in report['counters'] if c['counter'] == name])
+
+        _write_atomic(path, '\n'.join(lines) + '\n')
+
+    def print_summary(self, limit: int = 10):
+        """Print the slowest stages"""
+        report = self.report()
+        print(f"Run {self.run_id}: {report['duration_seconds']:.2f}s")
+        for entry in report['stages'][:limit]:
+            labels = ', '.join(f"{k}={v}" for k, v in entry['labels'].items())
+            print(f"  {entry['seconds']:>9.2f}s  {entry['stage']}{f' ({labels})' if labels else ''}")
+
+    def finish(self, status: str = 'ok', report_dir: str = RUN_REPORT_DIR, prometheus_textfile: str = PROMETHEUS_TEXTFILE):
+        """Print the summary and write the JSON report (and the textfile metrics when configured)"""
+        self.print_summary()
+        path = self.write_report(status, report_dir)
+        print(f"✓ Run report written: {path}")
+        if prometheus_textfile:
+            self.write_prometheus(prometheus_textfile, status)
+            print(f"✓ Prometheus metrics written: {prometheus_textfile}")
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _write_atomic(path, content):
+    # The textfile collector may read at any time; never let it see a half-written file
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+_run_metrics = None
+_run_metrics_lock = threading.Lock()
+
+
+def get_run_metrics(pipeline: str = 'etl') -> RunMetrics:
+    """Return the process-wide RunMetrics, creating it on first use"""
+    global _run_metrics
+    with _run_metrics_lock:
+        if _run_metrics is None:
+            _run_metrics = RunMetrics(pipeline)
+        return _run_metrics
+
+
+def reset_run_metrics():
+    """Discard the current metrics; the next get_run_metrics() call starts a new run"""
+    global _run_metrics
+    with _run_metrics_lock:
+        _run_metrics = None
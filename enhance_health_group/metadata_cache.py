@@ -0,0 +1,101 @@
+import threading
+import time
+
+
+class MetadataCache:
+    """
+    Per-run memo for account_reports metadata.
+
+    The active identifier matrix for every instance, together with whether the table has
+    an instance_key column, is loaded with a single query and partitioned in memory.
+    Entries are kept for the life of the cache, or for `ttl` seconds when given.
+    Call `invalidate()` after identifiers are rotated to force a reload.
+    """
+
+    def __init__(self, connection, schema: str, ttl: float = None):
+        # `connection` is a callable returning a context manager that yields a connection
+        self._connection = connection
+        self.schema = schema
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entry = None
+        self._loaded_at = None
+
+    def _is_fresh(self) -> bool:
+        if self._entry is None:
+            return False
+        return self.ttl is None or (time.monotonic() - self._loaded_at) < self.ttl
+
+    def _load(self):
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            # to_jsonb(row) exposes instance_key when the column exists, so the column probe
+            # and the matrix load share one round trip
+            cursor.execute(f"""
+                SELECT customer_account, report_name, identifier,
+                       to_jsonb(ar) ? 'instance_key' AS has_instance_column,
+                       to_jsonb(ar) ->> 'instance_key' AS instance_key
+                FROM {self.schema}.account_reports ar
+                WHERE status = 1
+            """)
+            rows = cursor.fetchall()
+            cursor.close()
+
+        has_instance_column = any(row[3] for row in rows)
+        if not rows:
+            # Empty table: fall back to an explicit probe so later filters stay correct
+            has_instance_column = self._probe_instance_column()
+
+        all_reports = {}
+        by_instance = {}
+        for customer_account, report_name, identifier, _, instance_key in rows:
+            all_reports.setdefault(customer_account, {})[report_name] = identifier
+            if instance_key is not None:
+                by_instance.setdefault(instance_key, {}).setdefault(customer_account, {})[report_name] = identifier
+
+        return {
+            'has_instance_column': has_instance_column,
+            'all_reports': all_reports,
+            'by_instance': by_instance,
+        }
+
+    def _probe_instance_column(self) -> bool:
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT column_name
+                FROM information_schema.columns
+                WHERE table_schema = %s AND table_name = 'account_reports' AND column_name = 'instance_key'
+            """, (self.schema,))
+            found = cursor.fetchone() is not None
+            cursor.close()
+        return found
+
+    def _get(self):
+        with self._lock:
+            if not self._is_fresh():
+                self._entry = self._load()
+                self._loaded_at = time.monotonic()
+            return self._entry
+
+    def has_instance_column(self) -> bool:
+        """Whether account_reports has an instance_key column"""
+        return self._get()['has_instance_column']
+
+    def report_matrix(self, instance_key: str = None) -> dict:
+        """
+        Active identifiers as {account_id: {report_name: identifier}}.
+        Filtered to `instance_key` when given and the table is instance-aware.
+        """
+        entry = self._get()
+        if instance_key and entry['has_instance_column']:
+            matrix = entry['by_instance'].get(instance_key, {})
+        else:
+            matrix = entry['all_reports']
+        return {account: dict(reports) for account, reports in matrix.items()}
+
+    def invalidate(self):
+        """Drop cached metadata so the next access reloads it"""
+        with self._lock:
+            self._entry = None
+            self._loaded_at = None
@@ -0,0 +1,86 @@
+import json
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet intermediates are optional; CSV works without pyarrow
+    pa = None
+    pq = None
+
+# Schema metadata key holding the [(column, postgres_type), ...] structure inferred at fetch time
+STRUCTURE_METADATA_KEY = b'enhance.structure'
+
+
+def require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Parquet intermediate files need pyarrow (pip install pyarrow)")
+
+
+def _arrow_type(data_type):
+    return {
+        'bigint': pa.int64(),
+        'double precision': pa.float64(),
+        'date': pa.date32(),
+    }.get(data_type, pa.string())
+
+
+def arrow_schema(structure):
+    """Arrow schema for a [(column, postgres_type), ...] structure, with the structure embedded"""
+    require_pyarrow()
+    return pa.schema(
+        [pa.field(col, _arrow_type(data_type)) for col, data_type in structure],
+        metadata={STRUCTURE_METADATA_KEY: json.dumps(structure).encode('utf-8')}
+    )
+
+
+def write_parquet(path, frames, structure):
+    """
+    Write DataFrames (e.g. the chunks of one report) to a single Parquet file typed by
+    `structure`. The file is written next to `path` and moved into place when complete.
+    Returns the row count.
+    """
+    schema = arrow_schema(structure)
+    part_path = f"{path}.part"
+    row_count = 0
+
+    try:
+        with pq.ParquetWriter(part_path, schema, compression='zstd') as writer:
+            for df in frames:
+                writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+                row_count += len(df)
+        os.replace(part_path, path)
+    except Exception:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+    return row_count
+
+
+def read_structure(path):
+    """The [(column, postgres_type), ...] structure embedded in a Parquet file"""
+    require_pyarrow()
+    metadata = pq.read_schema(path).metadata or {}
+    return [tuple(entry) for entry in json.loads(metadata.get(STRUCTURE_METADATA_KEY, b'[]'))]
+
+
+def _to_pandas(table):
+    # Keep integer columns with nulls as Int64 and dates as datetime64, matching the CSV path
+    return table.to_pandas(date_as_object=False, types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+
+
+def read_parquet(path, columns=None):
+    """Read a Parquet intermediate into a typed DataFrame"""
+    require_pyarrow()
+    return _to_pandas(pq.read_table(path, columns=columns))
+
+
+def iter_parquet(path, batch_size):
+    """Yield a Parquet intermediate as typed DataFrames of at most `batch_size` rows"""
+    require_pyarrow()
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_size):
+        yield _to_pandas(pa.Table.from_batches([batch], schema=parquet_file.schema_arrow))
@@ -0,0 +1,39 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket used to pace calls to the CollaborateMD API.
+
+    Tokens refill continuously at `rate` per second up to `capacity`. Each call to
+    `acquire` takes one token and blocks until one is available. A rate of 0 or None
+    disables limiting.
+    """
+
+    def __init__(self, rate: float = None, capacity: int = None):
+        self.rate = float(rate) if rate else 0.0
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a token is available, then consume it"""
+        if not self.rate:
+            return
+
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
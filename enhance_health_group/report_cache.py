@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+
+
+class ReportCache:
+    """
+    Local content-addressed store for decoded report results.
+
+    Each CSV member of a downloaded report archive is stored once under
+    `<root>/objects/<sha256>.csv`. `<root>/manifest.json` maps a result key
+    (instance_key, customer_account, report_id, identifier) to its CSV objects plus the
+    size, hash and HTTP ETag recorded at download time. An identifier that has not been
+    rotated since the last run is then served from disk instead of downloaded again.
+    """
+
+    def __init__(self, root: str = 'report_cache'):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.manifest_path = os.path.join(root, 'manifest.json')
+        self._lock = threading.Lock()
+        self._manifest = None
+
+    @staticmethod
+    def make_key(instance_key, customer_account, report_id, identifier) -> str:
+        return f"{instance_key}/{customer_account}/{report_id}/{identifier}"
+
+    def _load_manifest(self) -> dict:
+        if self._manifest is None:
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    self._manifest = json.load(f)
+            except FileNotFoundError:
+                self._manifest = {}
+            except ValueError:
+                # A corrupt manifest only costs a re-download
+                self._manifest = {}
+        return self._manifest
+
+    def _save_manifest(self):
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self._manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _object_path(self, sha256: str) -> str:
+        return os.path.join(self.objects_dir, f"{sha256}.csv")
+
+    def get(self, key: str):
+        """
+        Return the cached CSV paths for `key`, or None on a miss.
+        An entry whose objects are missing or have the wrong size counts as a miss.
+        """
+        with self._lock:
+            entry = self._load_manifest().get(key)
+            if entry is None:
+                return None
+
+            paths = []
+            for member in entry['members']:
+                path = self._object_path(member['sha256'])
+                try:
+                    if os.path.getsize(path) != member['size']:
+                        return None
+                except OSError:
+                    return None
+                paths.append(path)
+            return paths
+
+    def _store_member(self, source) -> dict:
+        """Stream one file object into the object store, hashing as it is copied"""
+        os.makedirs(self.objects_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.objects_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while True:
+                    chunk = source.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    size += len(chunk)
+                    out.write(chunk)
+
+            sha256 = digest.hexdigest()
+            os.replace(tmp_path, self._object_path(sha256))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return {'sha256': sha256, 'size': size}
+
+    def put_archive(self, key: str, zip_source, etag: str = None):
+        """
+        Store every CSV member of a report ZIP archive under `key`.
+        Returns the list of cached CSV paths.
+        """
+        members = []
+        with zipfile.ZipFile(zip_source) as zip_file:
+            for zip_info in zip_file.infolist():
+                if zip_info.filename.endswith('.csv'):
+                    with zip_file.open(zip_info) as member:
+                        members.append(self._store_member(member))
+
+        with self._lock:
+            self._load_manifest()[key] = {
+                'members': members,
+                'etag': etag,
+                'fetched_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            }
+            self._save_manifest()
+
+        return [self._object_path(member['sha256']) for member in members]
+
+    def prune(self, active_keys):
+        """Drop manifest entries not in `active_keys` and delete objects no entry uses"""
+        with self._lock:
+            manifest = self._load_manifest()
+            for key in list(manifest):
+                if key not in active_keys:
+                    del manifest[key]
+            self._save_manifest()
+
+            in_use = {member['sha256'] for entry in manifest.values() for member in entry['members']}
+            if not os.path.isdir(self.objects_dir):
+                return
+
+            for filename in os.listdir(self.objects_dir):
+                sha256, ext = os.path.splitext(filename)
+                if ext == '.csv' and sha256 not in in_use:
+                    os.remove(os.path.join(self.objects_dir, filename))
+
+    def clear(self):
+        """Remove the whole cache"""
+        with self._lock:
+            shutil.rmtree(self.root, ignore_errors=True)
+            self._manifest = None
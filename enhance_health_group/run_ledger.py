@@ -0,0 +1,125 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+# Completed units of every run, so a failed run can be resumed with the remaining work only
+RUN_LEDGER_PATH = 'run_ledger.sqlite'
+
+# Units are (instance, report, stage); loads and views are not per instance
+GENERATED = 'generated'
+FETCHED = 'fetched'
+TRANSFORMED = 'transformed'
+LOADED = 'loaded'
+VIEWS_REFRESHED = 'views_refreshed'
+ALL_UNITS = '*'
+
+LEDGER_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS runs (
+        run_id TEXT PRIMARY KEY,
+        pipeline TEXT NOT NULL,
+        started_at REAL NOT NULL,
+        finished_at REAL,
+        status TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS units (
+        run_id TEXT NOT NULL REFERENCES runs (run_id),
+        instance_key TEXT NOT NULL,
+        report_name TEXT NOT NULL,
+        stage TEXT NOT NULL,
+        fingerprint TEXT,
+        detail TEXT,
+        completed_at REAL NOT NULL,
+        PRIMARY KEY (run_id, instance_key, report_name, stage)
+    );
+"""
+
+
+def fingerprint(*parts) -> str:
+    """Short stable digest of `parts`, used to tell whether a completed unit is still valid"""
+    return hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def files_fingerprint(paths) -> str:
+    """Digest of the paths, sizes and modification times of `paths`"""
+    stats = []
+    for path in sorted(paths):
+        stat = os.stat(path)
+        stats.append((path, stat.st_size, stat.st_mtime_ns))
+    return fingerprint(*stats)
+
+
+class RunLedger:
+    """
+    SQLite ledger of the units each pipeline run has completed.
+
+    `start(resume=True)` continues the most recent run of the pipeline if it did not finish,
+    so `completed()` reports the units that run already did and they can be skipped;
+    otherwise a new run is started and nothing is skipped. Units are recorded as they
+    complete, with a fingerprint of their inputs: a unit only counts as completed while
+    its fingerprint still matches.
+    """
+
+    def __init__(self, path: str = RUN_LEDGER_PATH):
+        self.path = path
+        self.run_id = None
+        self.resumed = False
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(LEDGER_SCHEMA)
+        self._conn.commit()
+
+    def start(self, pipeline: str = 'etl', resume: bool = False) -> str:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT run_id, status FROM runs WHERE pipeline = ? ORDER BY started_at DESC LIMIT 1", (pipeline,)
+            ).fetchone()
+
+            if resume and row is not None and row[1] != 'ok':
+                self.run_id, self.resumed = row[0], True
+                self._conn.execute("UPDATE runs SET status = 'running', finished_at = NULL WHERE run_id = ?", (self.run_id,))
+                units = self._conn.execute("SELECT COUNT(*) FROM units WHERE run_id = ?", (self.run_id,)).fetchone()[0]
+                print(f"→ Resuming run {self.run_id} ({units} completed unit(s) will be skipped)")
+            else:
+                if resume:
+                    print("→ Nothing to resume: the last run finished, starting a new run")
+                self.run_id, self.resumed = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}", False
+                self._conn.execute(
+                    "INSERT INTO runs (run_id, pipeline, started_at, status) VALUES (?, ?, ?, 'running')",
+                    (self.run_id, pipeline, time.time())
+                )
+            self._conn.commit()
+            return self.run_id
+
+    def completed(self, instance_key: str, report_name: str, stage: str, fingerprint: str = None):
+        """The detail recorded for the unit in this run ('' when none), or None if it still has to be done"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint, detail FROM units WHERE run_id = ? AND instance_key = ? AND report_name = ? AND stage = ?",
+                (self.run_id, instance_key, report_name, stage)
+            ).fetchone()
+        if row is None or row[0] != fingerprint:
+            return None
+        return row[1] or ''
+
+    def record(self, instance_key: str, report_name: str, stage: str, fingerprint: str = None, detail: str = None):
+        """Mark a unit completed; committed immediately so it survives a crash later in the run"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO units (run_id, instance_key, report_name, stage, fingerprint, detail, completed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.run_id, instance_key, report_name, stage, fingerprint, detail, time.time())
+            )
+            self._conn.commit()
+
+    def finish(self, status: str = 'ok'):
+        with self._lock:
+            self._conn.execute("UPDATE runs SET status = ?, finished_at = ? WHERE run_id = ?",
+                               (status, time.time(), self.run_id))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,63 @@
+NUMERIC_TYPES = ('bigint', 'double precision')
+
+
+class SchemaRegistry:
+    """
+    Column structure of each table for chunked loads.
+
+    A table's structure is fixed once, before any of its rows are loaded: from the live
+    table when it exists, otherwise from the types inferred on its first chunk. Every later
+    chunk, including the files of other instances, is converted to that structure instead
+    of being inferred again, so all chunks of a table agree on their column types.
+    """
+
+    def __init__(self, db_structure):
+        # `db_structure(table_name)` returns the live [(column, type), ...] or None
+        self._db_structure = db_structure
+        self._structures = {}
+
+    def register(self, table_name, inferred):
+        """
+        Fix and return the structure of `table_name`.
+        Raises ValueError when the inferred first chunk cannot be loaded into the live table.
+        """
+        if table_name not in self._structures:
+            live = self._db_structure(table_name)
+            self._structures[table_name] = inferred if live is None else self._reconcile(table_name, live, inferred)
+        return self._structures[table_name]
+
+    @staticmethod
+    def _reconcile(table_name, live, inferred):
+        """
+        Live column types win, except that a text column whose first chunk parsed as numbers
+        is promoted (the staging swap migrates it). A chunk inferred as text only means no
+        values in it proved the type, so it does not conflict, and bigint and double precision
+        only differ by whether the chunk had blanks (convert_chunk rejects fractional values
+        for a bigint column).
+        """
+        live_columns = [col for col, _ in live]
+        inferred_columns = [col for col, _ in inferred]
+        if live_columns != inferred_columns:
+            missing = sorted(set(live_columns) - set(inferred_columns))
+            extra = sorted(set(inferred_columns) - set(live_columns))
+            raise ValueError(
+                f"Schema mismatch for {table_name}: columns differ from the live table "
+                f"(missing in CSV: {missing}, not in DB: {extra}, order differs: {not missing and not extra})"
+            )
+
+        structure = []
+        mismatches = []
+        for (col, live_type), (_, inferred_type) in zip(live, inferred):
+            if live_type == 'text' and inferred_type in NUMERIC_TYPES:
+                print(f"  → {table_name}.{col} will be promoted from text to {inferred_type}")
+                structure.append((col, inferred_type))
+            elif live_type == inferred_type or inferred_type == 'text' or (
+                    live_type in NUMERIC_TYPES and inferred_type in NUMERIC_TYPES):
+                structure.append((col, live_type))
+            else:
+                mismatches.append(f"'{col}': DB={live_type}, CSV={inferred_type}")
+
+        if mismatches:
+            raise ValueError(f"Schema mismatch for {table_name}: {', '.join(mismatches)}")
+
+        return structure
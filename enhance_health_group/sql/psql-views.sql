@@ -35,11 +35,11 @@ WITH ar_aging_cte AS (
         aa.patient_stmts_sent_electronically,
         aa.patient_statements_printed,
         -- numeric conversions
-        replace(replace(aa.charge_balance_due_ins::text, '$', ''), ',', '')::numeric AS int_charge_balance_due_ins,
-        replace(replace(aa.charge_balance_due_other::text, '$', ''), ',', '')::numeric AS int_charge_balance_due_other,
+        aa.charge_balance_due_ins::numeric AS int_charge_balance_due_ins,
+        aa.charge_balance_due_other::numeric AS int_charge_balance_due_other,
         aa.patient_stmts_sent_electronically::numeric AS int_patient_stmts_sent_electronically,
         aa.patient_statements_printed::numeric AS int_patient_statements_printed,
-        replace(replace(aa.charge_balance_due_pat::text, '$', ''), ',', '')::numeric AS int_charge_balance_due_pat
+        aa.charge_balance_due_pat::numeric AS int_charge_balance_due_pat
     FROM ar_aging aa
 )
 SELECT
@@ -133,7 +133,7 @@ WITH gross_billing_cte AS (
         to_char(gb.claim_first_billed_date::date::timestamp with time zone, 'Month') AS claim_first_billed_month,
         to_char(gb.claim_first_billed_date::date::timestamp with time zone, 'YYYY') AS claim_first_billed_year,
         lc.level_of_care AS loc,
-        replace(replace(gb.charge_amount::text, '$', ''), ',', '')::numeric AS int_charge_amount,
+        gb.charge_amount::numeric AS int_charge_amount,
         gb.claim_first_billed_date::date - EXTRACT(dow FROM gb.claim_first_billed_date::date)::integer AS first_billed_week_date,
                 gb.instance_key
     FROM gross_billing gb
@@ -242,20 +242,18 @@ SELECT pt.customer_account,
        to_char(pt.charge_from_date::date::timestamp with time zone,
                'YYYY'::text)                                                                                  AS charge_from_year,
        CASE
-           WHEN replace(replace(pt.payment_allowed_amount::text, '$'::text, ''::text), ','::text, ''::text)::numeric > 0::numeric
+           WHEN pt.payment_allowed_amount::numeric > 0::numeric
                THEN 'Paid'::text
            ELSE 'Not Paid'::text
            END                                                                                                AS payment_status,
-       replace(replace(pt.payment_allowed_amount::text, '$'::text, ''::text), ','::text,
-               ''::text)::numeric                                                                             AS int_payment_allowed_amount,
+       pt.payment_allowed_amount::numeric                                                                     AS int_payment_allowed_amount,
        lc.level_of_care,
        CASE
-           WHEN replace(replace(pt.insurance_paid_amount::text, '$'::text, ''::text), ','::text, ''::text)::numeric > 0::numeric
+           WHEN pt.insurance_paid_amount::numeric > 0::numeric
                THEN true
            ELSE false
            END                                                                                                AS has_insurance_payment,
-       replace(replace(pt.insurance_paid_amount::text, '$'::text, ''::text), ','::text,
-               ''::text)::numeric                                                                             AS int_insurance_paid_amount,
+       pt.insurance_paid_amount::numeric                                                                      AS int_insurance_paid_amount,
        initcap(to_char(pt.payment_received::date::timestamp with time zone,
                        'day'::text))                                                                          AS payment_received_day,
        'Week'::text || to_char(pt.payment_received::date::timestamp with time zone,
@@ -265,36 +263,34 @@ SELECT pt.customer_account,
        to_char(pt.payment_received::date::timestamp with time zone,
                'YYYY'::text)                                                                                  AS payment_received_year,
        pt.payment_received::date - pt.payment_entered::date                                                   AS payment_posting_tat,
-       replace(replace(pt.patient_applied_amount::text, '$'::text, ''::text), ','::text,
-               ''::text)::numeric                                                                             AS int_payment_applied_amount,
-       replace(replace(pt.payment_total_applied::text, '$'::text, ''::text), ','::text,
-               ''::text)::numeric                                                                             AS int_payment_total_applied,
-       replace(replace(pt.payment_total_paid::text, '$'::text, ''::text), ','::text,
-               ''::text)::numeric                                                                             AS int_payment_total_paid,
-       replace(replace(pt.payment_unapplied_amount::text, '$'::text, ''::text), ','::text,
-               ''::text)::numeric                                                                             AS int_payment_unapplied_amount,
+       pt.patient_applied_amount::numeric                                                                     AS int_payment_applied_amount,
+       pt.payment_total_applied::numeric                                                                      AS int_payment_total_applied,
+       pt.payment_total_paid::numeric                                                                         AS int_payment_total_paid,
+       pt.payment_unapplied_amount::numeric                                                                   AS int_payment_unapplied_amount,
     instance_key
 FROM payment_trend pt
          LEFT JOIN loc_crosswalk lc ON lc.rev_code::text = pt.charge_rev_code::text;
 
 ------
+-- materialized unique key: facility_name, claim_status, level_of_care, instance_key
 CREATE OR REPLACE VIEW chage_on_hold(facility_name, claim_status, level_of_care, total_amount) as
 SELECT practice_name as facility_name,
        claim_status,
        charge_cpt_code                                                                               AS level_of_care,
-       sum(replace(replace(charge_amount::text, '$'::text, ''::text), ','::text, ''::text)::numeric) AS total_amount,
+       sum(charge_amount::numeric) AS total_amount,
        instance_key
 FROM charges_on_hold coh
-GROUP BY  coh.practice_name, facility_name, claim_status, charge_cpt_code, instance_key;
+GROUP BY  coh.practice_name, claim_status, charge_cpt_code, instance_key;
 
 ------
+-- materialized unique key: facility_name, claim_status, level_of_care, instance_key
 CREATE OR REPLACE VIEW v_charges_on_hold(facility_name, claim_status, level_of_care, total_amount) as
 SELECT practice_name as facility_name,
        claim_status,
        charge_cpt_code                                                                               AS level_of_care,
-       sum(replace(replace(charge_amount::text, '$'::text, ''::text), ','::text, ''::text)::numeric) AS total_amount,
+       sum(charge_amount::numeric) AS total_amount,
         instance_key
 FROM charges_on_hold coh
-GROUP BY  coh.practice_name, facility_name, claim_status, charge_cpt_code, instance_key;
+GROUP BY  coh.practice_name, claim_status, charge_cpt_code, instance_key;
 
 ------
\ No newline at end of file
@@ -0,0 +1,401 @@
+import re
+import time
+
+# Postgres truncates identifiers longer than this
+MAX_IDENTIFIER_LENGTH = 63
+STAGING_SUFFIX = '__staging'
+# How long the swap waits for readers to release the live table before giving up
+SWAP_LOCK_TIMEOUT = '10s'
+
+INDEX_DEF_PATTERN = re.compile(r'^(CREATE (?:UNIQUE )?INDEX )\S+ ON (?:ONLY )?\S+ ')
+
+
+def staging_name(name: str) -> str:
+    """Name of the staging twin of a table, index or constraint"""
+    return name[:MAX_IDENTIFIER_LENGTH - len(STAGING_SUFFIX)] + STAGING_SUFFIX
+
+
+def _qualified(schema: str, name: str) -> str:
+    return f'"{schema}"."{name}"'
+
+
+def _table_exists(cursor, schema, table_name) -> bool:
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (_qualified(schema, table_name),))
+    return cursor.fetchone()[0]
+
+
+def _grants(cursor, relation):
+    """GRANT statements re-creating the non-owner privileges on `relation`"""
+    cursor.execute("""
+        SELECT CASE WHEN a.grantee = 0 THEN 'PUBLIC' ELSE quote_ident(pg_get_userbyid(a.grantee)) END,
+               a.privilege_type
+        FROM pg_class c, aclexplode(c.relacl) a
+        WHERE c.oid = %s::regclass AND a.grantee <> c.relowner
+    """, (relation,))
+    return [f"GRANT {privilege} ON {{relation}} TO {grantee}" for grantee, privilege in cursor.fetchall()]
+
+
+def _check_swappable(cursor, live):
+    """
+    Raise if dropping `live` for its staging twin would lose something the swap does not
+    carry over: foreign keys from other tables, triggers, row level security, or objects
+    other than views and materialized views that depend on the table or its row type.
+    """
+    cursor.execute("""
+        SELECT conrelid::regclass::text
+        FROM pg_constraint
+        WHERE contype = 'f' AND confrelid = %s::regclass AND conrelid <> confrelid
+    """, (live,))
+    referencing = [row[0] for row in cursor.fetchall()]
+    if referencing:
+        raise RuntimeError(
+            f"{live} is referenced by foreign keys from {', '.join(referencing)}; "
+            f"use load_strategy='truncate' for it"
+        )
+
+    cursor.execute("""
+        SELECT (SELECT count(*) FROM pg_trigger WHERE tgrelid = c.oid AND NOT tgisinternal),
+               c.relrowsecurity OR EXISTS (SELECT 1 FROM pg_policy WHERE polrelid = c.oid)
+        FROM pg_class c
+        WHERE c.oid = %s::regclass
+    """, (live,))
+    triggers, row_security = cursor.fetchone()
+    if triggers or row_security:
+        raise RuntimeError(
+            f"{live} has {'triggers' if triggers else 'row level security policies'}, which the swap "
+            f"does not carry over; use load_strategy='truncate' for it"
+        )
+
+    # Whatever DROP ... CASCADE would take along besides the views it re-creates
+    cursor.execute("""
+        SELECT DISTINCT pg_describe_object(d.classid, d.objid, d.objsubid)
+        FROM pg_class t
+        JOIN pg_depend d ON d.deptype = 'n'
+                        AND ((d.refclassid = 'pg_class'::regclass AND d.refobjid = t.oid)
+                             OR (d.refclassid = 'pg_type'::regclass AND d.refobjid = t.reltype))
+        WHERE t.oid = %s::regclass
+          AND NOT (d.classid = 'pg_rewrite'::regclass AND EXISTS (
+                SELECT 1 FROM pg_rewrite r JOIN pg_class v ON v.oid = r.ev_class
+                WHERE r.oid = d.objid AND (v.relkind IN ('v', 'm') OR v.oid = t.oid)))
+          AND NOT (d.classid = 'pg_constraint'::regclass AND EXISTS (
+                SELECT 1 FROM pg_constraint con WHERE con.oid = d.objid AND con.conrelid = t.oid))
+        ORDER BY 1
+    """, (live,))
+    dependents = [row[0] for row in cursor.fetchall()]
+    if dependents:
+        raise RuntimeError(
+            f"Swapping {live} would drop its dependents {', '.join(dependents)}; "
+            f"use load_strategy='truncate' for it"
+        )
+
+
+def drop_staging_table(cursor, schema, table_name):
+    cursor.execute(f"DROP TABLE IF EXISTS {_qualified(schema, staging_name(table_name))}")
+
+
+def create_staging_table(cursor, schema, table_name, structure):
+    """
+    Create an empty staging table for `table_name`, on the caller's transaction.
+    It copies the live table's columns, defaults, check constraints, comments, storage
+    settings and statistics targets when the live table exists (retyping columns whose type
+    differs from `structure`), and is built from the (column, type) `structure` list
+    otherwise. A live table the swap cannot replace (see _check_swappable) raises here,
+    before anything is loaded.
+
+    The table is logged, so its data is written to WAL once, by the COPY. Loading it in the
+    same transaction lets COPY ... FREEZE skip the later hint-bit and freeze rewrites.
+    """
+    staging = _qualified(schema, staging_name(table_name))
+    drop_staging_table(cursor, schema, table_name)
+
+    if _table_exists(cursor, schema, table_name):
+        live = _qualified(schema, table_name)
+        _check_swappable(cursor, live)
+        cursor.execute(
+            f"CREATE TABLE {staging} (LIKE {live} "
+            f"INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING IDENTITY INCLUDING GENERATED "
+            f"INCLUDING COMMENTS INCLUDING STATISTICS INCLUDING STORAGE)"
+        )
+
+        # LIKE leaves out the table's own comment and options and the per-column statistics settings
+        cursor.execute("""
+            SELECT quote_literal(obj_description(oid, 'pg_class')), reloptions
+            FROM pg_class
+            WHERE oid = %s::regclass
+        """, (live,))
+        comment, reloptions = cursor.fetchone()
+        if comment is not None:
+            cursor.execute(f"COMMENT ON TABLE {staging} IS {comment}")
+        if reloptions:
+            cursor.execute(f"ALTER TABLE {staging} SET ({', '.join(reloptions)})")
+        cursor.execute("""
+            SELECT attname, attstattarget, attoptions
+            FROM pg_attribute
+            WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+              AND (attstattarget >= 0 OR attoptions IS NOT NULL)
+        """, (live,))
+        for col, stat_target, options in cursor.fetchall():
+            if stat_target is not None and stat_target >= 0:
+                cursor.execute(f'ALTER TABLE {staging} ALTER COLUMN "{col}" SET STATISTICS {stat_target}')
+            if options:
+                cursor.execute(f'ALTER TABLE {staging} ALTER COLUMN "{col}" SET ({", ".join(options)})')
+
+        # Column type changes (e.g. text promoted to a number) are applied to the still-empty staging table
+        cursor.execute("""
+            SELECT attname, format_type(atttypid, atttypmod)
+            FROM pg_attribute
+            WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+        """, (staging,))
+        current_types = dict(cursor.fetchall())
+        for col, data_type in structure:
+            if col in current_types and current_types[col] != data_type:
+                cursor.execute(f'ALTER TABLE {staging} ALTER COLUMN "{col}" TYPE {data_type} USING NULL')
+    else:
+        columns = ', '.join(f'"{col}" {data_type}' for col, data_type in structure)
+        cursor.execute(f"CREATE TABLE {staging} ({columns})")
+
+    return staging
+
+
+def finish_staging_table(cursor, schema, table_name):
+    """
+    Build the live table's indexes and keys (with their comments) on the loaded staging
+    table, refresh its statistics and hand it to the live table's owner, so the swap itself
+    only has to rename.
+    """
+    live = _qualified(schema, table_name)
+    staging = _qualified(schema, staging_name(table_name))
+
+    if _table_exists(cursor, schema, table_name):
+        # Primary/unique/exclusion/foreign keys, added after the data so they are built once
+        cursor.execute("""
+            SELECT conname, pg_get_constraintdef(oid), quote_literal(obj_description(oid, 'pg_constraint')),
+                   CASE WHEN confrelid = conrelid THEN conrelid::regclass::text END
+            FROM pg_constraint
+            WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'x', 'f')
+            ORDER BY contype <> 'p', conname
+        """, (live,))
+        for conname, definition, comment, self_reference in cursor.fetchall():
+            if self_reference:
+                # A self-referencing foreign key must point at the staging table, not the live one
+                definition = definition.replace(f"REFERENCES {self_reference}(", f"REFERENCES {staging}(", 1)
+            cursor.execute(f'ALTER TABLE {staging} ADD CONSTRAINT "{staging_name(conname)}" {definition}')
+            if comment is not None:
+                cursor.execute(f'COMMENT ON CONSTRAINT "{staging_name(conname)}" ON {staging} IS {comment}')
+
+        # Plain indexes not backing a constraint
+        cursor.execute("""
+            SELECT ic.relname, pg_get_indexdef(i.indexrelid), quote_literal(obj_description(ic.oid, 'pg_class'))
+            FROM pg_index i
+            JOIN pg_class ic ON ic.oid = i.indexrelid
+            WHERE i.indrelid = %s::regclass
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint con WHERE con.conindid = i.indexrelid)
+        """, (live,))
+        for index_name, definition, comment in cursor.fetchall():
+            definition = INDEX_DEF_PATTERN.sub(
+                lambda m: f'{m.group(1)}"{staging_name(index_name)}" ON {staging} ', definition
+            )
+            cursor.execute(definition)
+            if comment is not None:
+                cursor.execute(f'COMMENT ON INDEX {_qualified(schema, staging_name(index_name))} IS {comment}')
+
+    cursor.execute(f"ANALYZE {staging}")
+
+    if _table_exists(cursor, schema, table_name):
+        cursor.execute("""
+            SELECT quote_ident(pg_get_userbyid(relowner))
+            FROM pg_class
+            WHERE oid = %s::regclass AND relowner <> (SELECT oid FROM pg_roles WHERE rolname = current_user)
+        """, (live,))
+        row = cursor.fetchone()
+        if row:
+            cursor.execute(f"ALTER TABLE {staging} OWNER TO {row[0]}")
+
+
+def _dependent_views(cursor, live):
+    """
+    Views and materialized views that depend on `live`, directly or through other views,
+    in the order they must be re-created. Materialized views are re-created WITH NO DATA.
+    """
+    cursor.execute("""
+        WITH RECURSIVE deps(oid, depth) AS (
+            SELECT r.ev_class, 1
+            FROM pg_depend d
+            JOIN pg_rewrite r ON r.oid = d.objid
+            WHERE d.classid = 'pg_rewrite'::regclass
+              AND d.refclassid = 'pg_class'::regclass
+              AND d.refobjid = %s::regclass
+              AND r.ev_class <> d.refobjid
+            UNION
+            SELECT r.ev_class, deps.depth + 1
+            FROM deps
+            JOIN pg_depend d ON d.refobjid = deps.oid
+                            AND d.classid = 'pg_rewrite'::regclass
+                            AND d.refclassid = 'pg_class'::regclass
+            JOIN pg_rewrite r ON r.oid = d.objid
+            WHERE r.ev_class <> deps.oid
+        )
+        SELECT c.oid, n.nspname, c.relname, c.relkind, c.reloptions, pg_get_viewdef(c.oid),
+               quote_literal(obj_description(c.oid, 'pg_class'))
+        FROM deps
+        JOIN pg_class c ON c.oid = deps.oid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        GROUP BY c.oid, n.nspname, c.relname, c.relkind, c.reloptions
+        ORDER BY max(deps.depth), c.relname
+    """, (live,))
+
+    views = []
+    for oid, view_schema, view_name, relkind, reloptions, definition, comment in cursor.fetchall():
+        relation = _qualified(view_schema, view_name)
+        options = f" WITH ({', '.join(reloptions)})" if reloptions else ''
+        kind = 'MATERIALIZED VIEW' if relkind == 'm' else 'VIEW'
+        no_data = ' WITH NO DATA' if relkind == 'm' else ''
+        create = [f"CREATE {kind} {relation}{options} AS {definition.rstrip().rstrip(';')}{no_data}"]
+
+        if relkind == 'm':
+            cursor.execute("SELECT pg_get_indexdef(indexrelid) FROM pg_index WHERE indrelid = %s", (oid,))
+            create.extend(row[0] for row in cursor.fetchall())
+
+        if comment is not None:
+            create.append(f"COMMENT ON {kind} {relation} IS {comment}")
+
+        views.append({
+            'name': view_name,
+            'relation': relation,
+            'relkind': relkind,
+            'create': create,
+            'grants': [grant.format(relation=relation) for grant in _grants(cursor, relation)],
+        })
+
+    return views
+
+
+def _recreate_view(cursor, view, rebuild_view):
+    """
+    Re-create a dropped dependent view from its saved definition. If that no longer fits
+    the new table (a column changed type), fall back to `rebuild_view(cursor, name, relkind)`,
+    which must also create materialized views WITH NO DATA.
+    """
+    cursor.execute("SAVEPOINT recreate_view")
+    try:
+        for statement in view['create']:
+            cursor.execute(statement)
+    except Exception as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT recreate_view")
+        if rebuild_view is None or not rebuild_view(cursor, view['name'], view['relkind']):
+            raise RuntimeError(f"Cannot re-create dependent view {view['name']}: {str(e).strip()}") from e
+        print(f"  → Rebuilt view {view['name']} from its SQL definition")
+    cursor.execute("RELEASE SAVEPOINT recreate_view")
+
+    for grant in view['grants']:
+        cursor.execute(grant)
+
+
+def swap_in_staging(cursor, schema, table_name, rebuild_view=None):
+    """
+    Replace the live table with its loaded staging table, on the caller's transaction.
+
+    The live table is dropped and the staging table renamed into its place, together with
+    its indexes and keys. Grants, owned sequences and dependent views (with their comments
+    and indexes) are carried over, so readers see either the old rows or the new ones and
+    never an empty or partial table; a table with anything else the drop would lose raises
+    (see _check_swappable). `rebuild_view` re-creates a view whose saved definition
+    no longer applies (see _recreate_view).
+
+    Dependent materialized views are re-created empty, so a view depending on several
+    swapped tables is computed only once. Returns them as quoted "schema"."name" relations;
+    populate them with populate_materialized_views() before the swap commits, so readers
+    never see them unpopulated.
+    """
+    live = _qualified(schema, table_name)
+    staging = _qualified(schema, staging_name(table_name))
+
+    cursor.execute(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'")
+    # Saved view definitions and rebuilt ones both resolve unqualified names in this schema
+    cursor.execute(f'SET LOCAL search_path TO "{schema}"')
+
+    if not _table_exists(cursor, schema, table_name):
+        cursor.execute(f'ALTER TABLE {staging} RENAME TO "{table_name}"')
+        return []
+
+    # Take the exclusive lock first so the catalog snapshot below cannot go stale
+    cursor.execute(f"LOCK TABLE {live} IN ACCESS EXCLUSIVE MODE")
+    _check_swappable(cursor, live)
+
+    grants = _grants(cursor, live)
+    views = _dependent_views(cursor, live)
+
+    cursor.execute("""
+        SELECT quote_ident(sn.nspname) || '.' || quote_ident(s.relname), quote_ident(a.attname)
+        FROM pg_depend d
+        JOIN pg_class s ON s.oid = d.objid AND s.relkind = 'S'
+        JOIN pg_namespace sn ON sn.oid = s.relnamespace
+        JOIN pg_attribute a ON a.attrelid = d.refobjid AND a.attnum = d.refobjsubid
+        WHERE d.classid = 'pg_class'::regclass AND d.refobjid = %s::regclass AND d.deptype = 'a'
+    """, (live,))
+    owned_sequences = cursor.fetchall()
+
+    # Names of the live keys and indexes; their staging twins take them over after the swap
+    cursor.execute("SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'x', 'f')",
+                   (live,))
+    constraint_names = [row[0] for row in cursor.fetchall()]
+    cursor.execute("""
+        SELECT ic.relname
+        FROM pg_index i
+        JOIN pg_class ic ON ic.oid = i.indexrelid
+        WHERE i.indrelid = %s::regclass
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint con WHERE con.conindid = i.indexrelid)
+    """, (live,))
+    index_names = [row[0] for row in cursor.fetchall()]
+    # Extended statistics copied by LIKE got generated names; match them to the live ones
+    cursor.execute("""
+        SELECT DISTINCT ON (s.oid) quote_ident(sn.nspname) || '.' || quote_ident(s.stxname), quote_ident(l.stxname)
+        FROM pg_statistic_ext l
+        JOIN pg_statistic_ext s ON s.stxrelid = %s::regclass AND s.stxkind = l.stxkind
+                               AND pg_get_statisticsobjdef_columns(s.oid) = pg_get_statisticsobjdef_columns(l.oid)
+        JOIN pg_namespace sn ON sn.oid = s.stxnamespace
+        WHERE l.stxrelid = %s::regclass
+    """, (staging, live))
+    statistics_names = cursor.fetchall()
+
+    # serial columns: keep the sequences alive when the old table goes
+    for sequence, column in owned_sequences:
+        cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {staging}.{column}")
+
+    cursor.execute(f"DROP TABLE {live} CASCADE")
+    cursor.execute(f'ALTER TABLE {staging} RENAME TO "{table_name}"')
+
+    for conname in constraint_names:
+        cursor.execute(f'ALTER TABLE {live} RENAME CONSTRAINT "{staging_name(conname)}" TO "{conname}"')
+    for index_name in index_names:
+        cursor.execute(f'ALTER INDEX {_qualified(schema, staging_name(index_name))} RENAME TO "{index_name}"')
+    for statistics, statistics_name in statistics_names:
+        cursor.execute(f"ALTER STATISTICS {statistics} RENAME TO {statistics_name}")
+
+    for grant in grants:
+        cursor.execute(grant.format(relation=live))
+    for view in views:
+        _recreate_view(cursor, view, rebuild_view)
+
+    return [view['relation'] for view in views if view['relkind'] == 'm']
+
+
+def populate_materialized_views(cursor, relations):
+    """
+    REFRESH the materialized views among `relations` (as returned by swap_in_staging) that
+    are not populated, in order and once each, on the caller's (swap) transaction.
+    A failure raises, so the caller rolls the swap back. Returns the relations populated.
+    """
+    populated = []
+    for relation in dict.fromkeys(relations):
+        cursor.execute("SELECT relispopulated FROM pg_class WHERE oid = to_regclass(%s) AND relkind = 'm'",
+                       (relation,))
+        row = cursor.fetchone()
+        if row is None or row[0]:
+            continue
+
+        started = time.perf_counter()
+        cursor.execute(f"REFRESH MATERIALIZED VIEW {relation}")
+        populated.append(relation)
+        print(f"  ✓ Populated materialized view {relation} ({time.perf_counter() - started:.2f}s)")
+    return populated
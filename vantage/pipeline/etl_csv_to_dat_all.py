@@ -11,6 +11,8 @@ import psycopg2
 from configparser import ConfigParser
 import csv  
 
+from pipeline.report_client import get_report_client
+
 # Load config
 config = ConfigParser()
 config.read('config/config.ini')
@@ -51,6 +53,15 @@ def convert_to_dat_line(row, column_order):
     return '|'.join(str(row.get(col, '')) for col in column_order)
 
 
+# Stream csv.reader rows as pipe-separated lines prefixed with the customer account
+def dat_lines(customer_id, csv_reader, width):
+    prefix = f"{customer_id}|"
+    for row in csv_reader:
+        if len(row) < width:
+            row += [''] * (width - len(row))
+        yield prefix + '|'.join([v.strip() for v in row[:width]]) + '\n'
+
+
 def fetch_and_generate_dat():
     base_url = config['API']['report_api_base_url']
     username = config['API']['username']
@@ -61,6 +72,9 @@ def fetch_and_generate_dat():
     os.makedirs(dat_dir, exist_ok=True)
 
     report_matrix = load_report_matrix_from_db()
+    # One keep-alive session for every request; results shared between report names download once
+    client = get_report_client(base_url, username, password)
+    downloads, cache_hits = client.downloads, client.cache_hits
 
     # Identify all distinct report names
     all_report_names = set()
@@ -68,59 +82,52 @@ def fetch_and_generate_dat():
         all_report_names.update(report_matrix.get(customer, {}).keys())
     print("All Reports: ", len(all_report_names), "Customer: ", len(customers))
     for report_name in all_report_names:
-        report_data_lines = []
-        headers_with_customer = []
-
-        for customer_id in customers:
-            report_id = report_matrix.get(customer_id, {}).get(report_name)
-            if not report_id:
-                logging.warning(f"No report ID found for {customer_id} - {report_name}")
-                continue
-
-            url = f"{base_url}/customer/{customer_id}/reports/results/{report_id}"
-            response = requests.post(url, auth=(username, password))
-
-            if response.status_code == 200:
-                root = ET.fromstring(response.content)
-                data_element = root.find('Data')
-                #print(data_element)
-
-                if data_element is not None and data_element.text:
-                    zip_bytes = base64.b64decode(data_element.text)
-                    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zip_file:
-                        for zip_info in zip_file.infolist():
-                            if zip_info.filename.endswith('.csv'):
-                                with zip_file.open(zip_info) as csv_file:
-                                    decoded = io.TextIOWrapper(csv_file, encoding='utf-8')
-                                    csv_reader = csv.reader(decoded)
-
-                                    try:
-                                        headers = next(csv_reader)
-                                    except StopIteration:
-                                        logging.warning(f"No data in CSV for customer {customer_id}")
-                                        continue
-
-                                    headers = [h.strip() for h in headers]
-                                    headers_with_customer = ['customer_account'] + headers
-
-                                    for row in csv_reader:
-                                        row_values = [v.strip() for v in row]
-                                        row_dict = dict(zip(headers, row_values))
-                                        row_dict['customer_account'] = customer_id
-                                        dat_line = convert_to_dat_line(row_dict, headers_with_customer)
-                                        report_data_lines.append(dat_line)
-            else:
-                logging.error(f"Failed to fetch report {report_id} for customer {customer_id}: HTTP {response.status_code}")
-
-        if report_data_lines:
-            file_path = os.path.join(dat_dir, f"{report_name}.dat")
-            with open(file_path, 'w') as f:
-                for line in report_data_lines:
-                    f.write(line + '\n')
-            logging.info(f"DAT file written: {file_path}")
+        # Lines go straight to disk; the .part file only replaces the .dat once the report is complete
+        file_path = os.path.join(dat_dir, f"{report_name}.dat")
+        part_path = f"{file_path}.part"
+        line_count = 0
+
+        try:
+            with open(part_path, 'w') as dat_file:
+                for customer_id in customers:
+                    report_id = report_matrix.get(customer_id, {}).get(report_name)
+                    if not report_id:
+                        logging.warning(f"No report ID found for {customer_id} - {report_name}")
+                        continue
+
+                    zip_bytes = client.fetch_results_zip(customer_id, report_id)
+
+                    if zip_bytes:
+                        with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zip_file:
+                            for zip_info in zip_file.infolist():
+                                if zip_info.filename.endswith('.csv'):
+                                    with zip_file.open(zip_info) as csv_file:
+                                        decoded = io.TextIOWrapper(csv_file, encoding='utf-8')
+                                        csv_reader = csv.reader(decoded)
+
+                                        try:
+                                            headers = next(csv_reader)
+                                        except StopIteration:
+                                            logging.warning(f"No data in CSV for customer {customer_id}")
+                                            continue
+
+                                        for line in dat_lines(customer_id, csv_reader, len(headers)):
+                                            dat_file.write(line)
+                                            line_count += 1
+        except Exception:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+
+        if line_count:
+            os.replace(part_path, file_path)
+            logging.info(f"DAT file written: {file_path} ({line_count} lines)")
         else:
+            os.remove(part_path)
             logging.info(f"No data generated for report: {report_name}")
 
+    print(f"Report results: {client.downloads - downloads} downloaded, {client.cache_hits - cache_hits} reused from cache")
+
 
 
 # Fetch reports and generate .dat files
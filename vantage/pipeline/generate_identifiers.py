@@ -141,4 +141,6 @@ def run_all_reports():
     for config in report_configs:
         generate_report_for_all_accounts(config["report_id"], config["filter_id"], config["name"])
 
-run_all_reports()
\ No newline at end of file
+
+if __name__ == "__main__":
+    run_all_reports()
\ No newline at end of file
@@ -1,6 +1,9 @@
 import time
 
+import csv
+import io
 import psycopg2
+from psycopg2.extras import execute_values
 import logging
 import os
 from configparser import ConfigParser
@@ -13,6 +16,9 @@ schema = config['POSTGRES']['schema']
 # Logging setup
 os.makedirs('logs', exist_ok=True)
 
+# Rows rendered per chunk when streaming a .dat file through COPY FROM STDIN
+COPY_CHUNK_ROWS = 10000
+
 # PostgreSQL DB connection
 def postgres_connection():
     return psycopg2.connect(
@@ -54,8 +60,79 @@ def tables_exist(cursor, schema='public'):
     count = cursor.fetchone()[0]
     return count > 0
 
-def load_files_via_insert(cursor, extract_path, schema=schema):
-    """Load data files into database tables using INSERT statements."""
+class IteratorFile(io.TextIOBase):
+    """Read-only file object over an iterator of text chunks, for cursor.copy_expert"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = ''
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size is None or size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._chunks)
+            except StopIteration:
+                break
+
+        if size is None or size < 0:
+            data, self._buffer = self._buffer, ''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def iter_dat_rows(f, num_columns, stats):
+    """
+    Yield rows of a pipe-delimited .dat file padded or truncated to num_columns.
+    Empty values become None (NULL). Row and adjustment counts are kept in `stats`.
+    """
+    for line in f:
+        row = line.strip().split('|')
+        # Convert empty strings to None (NULL)
+        row = [None if x == '' else x for x in row]
+
+        # Handle column count mismatches
+        if len(row) != num_columns:
+            stats['adjusted'] += 1
+            if len(row) > num_columns:
+                row = row[:num_columns]
+            else:
+                row.extend([None] * (num_columns - len(row)))
+
+        stats['rows'] += 1
+        yield row
+
+
+def iter_csv_chunks(rows, chunk_rows=COPY_CHUNK_ROWS):
+    """Render rows as CSV text in chunks; None is written unquoted and loads as NULL"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    count = 0
+
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count == chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+
+    if count:
+        yield buffer.getvalue()
+
+
+def load_files_via_insert(cursor, extract_path, schema=schema, load_method='copy', page_size=1000):
+    """
+    Load data files into database tables.
+
+    Each file is streamed line by line: rows are padded/truncated to the table's column
+    count on the fly and sent with COPY FROM STDIN (load_method='copy'), or with
+    psycopg2.extras.execute_values in pages of `page_size` rows (load_method='insert').
+    """
 
     files_map = {
         'ar_aging': 'ar_aging.dat',
@@ -68,8 +145,11 @@ def load_files_via_insert(cursor, extract_path, schema=schema):
         'rcm_productivity': 'rcm_productivity.dat'
     }
 
+    if load_method not in ('copy', 'insert'):
+        raise ValueError(f"Unknown load method '{load_method}' (expected 'copy' or 'insert')")
+
     print(f"\n{'=' * 70}")
-    print(f"Starting data load process for schema: {schema}")
+    print(f"Starting data load process for schema: {schema} ({load_method})")
     print(f"{'=' * 70}\n")
 
     cursor.execute(f"SET search_path TO {schema};")
@@ -90,14 +170,6 @@ def load_files_via_insert(cursor, extract_path, schema=schema):
             continue
 
         try:
-            with open(file_path, 'r') as f:
-                lines = f.readlines()
-
-            if not lines:
-                print(f"  ⚠️  WARNING: File is empty - no data to load\n")
-                logging.warning(f"File is empty: {filename} (no data to load for table '{table}')")
-                continue
-
             # Get column count from database
             cursor.execute(f"""
                 SELECT count(*)
@@ -108,39 +180,30 @@ def load_files_via_insert(cursor, extract_path, schema=schema):
             db_num_columns = cursor.fetchone()[0]
             print(f"  Columns in table: {db_num_columns}")
 
-            placeholders = ', '.join(['%s'] * db_num_columns)
-            insert_query = f"INSERT INTO {table} VALUES ({placeholders})"
-
-            batch_data = []
-            adjusted_rows = 0
+            table_start = time.time()
+            stats = {'rows': 0, 'adjusted': 0}
 
-            for line_num, line in enumerate(lines, start=1):
-                row = line.strip().split('|')
-                # Convert empty strings to None (NULL)
-                row = [None if x == '' else x for x in row]
-
-                # Handle column count mismatches
-                if len(row) != db_num_columns:
-                    adjusted_rows += 1
-                    if len(row) > db_num_columns:
-                        row = row[:db_num_columns]
-                    else:
-                        row.extend([None] * (db_num_columns - len(row)))
-
-                batch_data.append(tuple(row))
-
-            if adjusted_rows > 0:
-                print(f"  ℹ️  Adjusted {adjusted_rows} rows with column count mismatches")
-
-            if batch_data:
-                print(f"  Inserting {len(batch_data)} rows...")
-                cursor.executemany(insert_query, batch_data)
-                print(f"  ✅ Successfully loaded {len(batch_data)} rows into '{table}'\n")
-                logging.info(f"Loaded {len(batch_data)} rows into '{table}' from {filename}")
-                total_loaded += len(batch_data)
+            with open(file_path, 'r') as f:
+                rows = iter_dat_rows(f, db_num_columns, stats)
+                if load_method == 'copy':
+                    cursor.copy_expert(
+                        f"COPY {table} FROM STDIN WITH (FORMAT csv)",
+                        IteratorFile(iter_csv_chunks(rows))
+                    )
+                else:
+                    execute_values(cursor, f"INSERT INTO {table} VALUES %s", rows, page_size=page_size)
+
+            if stats['adjusted'] > 0:
+                print(f"  ℹ️  Adjusted {stats['adjusted']} rows with column count mismatches")
+
+            if stats['rows']:
+                table_elapsed = time.time() - table_start
+                print(f"  ✅ Successfully loaded {stats['rows']} rows into '{table}' in {table_elapsed:.2f}s\n")
+                logging.info(f"Loaded {stats['rows']} rows into '{table}' from {filename}")
+                total_loaded += stats['rows']
             else:
-                print(f"  ⚠️  WARNING: No valid data rows to insert\n")
-                logging.warning(f"No valid data rows to insert for table '{table}'")
+                print(f"  ⚠️  WARNING: File is empty - no data to load\n")
+                logging.warning(f"File is empty: {filename} (no data to load for table '{table}')")
 
         except Exception as e:
             print(f"  ❌ ERROR: Failed to load table '{table}'")
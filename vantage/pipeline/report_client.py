@@ -0,0 +1,128 @@
+import base64
+import logging
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Retries for connection errors and transient HTTP statuses, with exponential backoff between attempts
+RETRY_TOTAL = 3
+RETRY_BACKOFF_FACTOR = 1
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Keep-alive connections kept open to the report API
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 10
+# (connect, read) timeouts in seconds
+REQUEST_TIMEOUT = (30, 300)
+# Decoded result archives kept in memory; the least recently used are evicted beyond this
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Seconds a cached archive is reused for, across runs in the same process; identifiers rotate on regeneration
+CACHE_TTL = 3600
+
+
+def create_session(username, password):
+    """A requests.Session with API auth, pooled keep-alive connections and retry/backoff adapters"""
+    retry = Retry(
+        total=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        # Report results are fetched with POST but reading them has no side effects
+        allowed_methods=frozenset({'GET', 'POST'}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+
+    session = requests.Session()
+    session.auth = (username, password)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class ReportClient:
+    """
+    Fetches report results over one persistent session.
+
+    Downloaded result archives are kept in memory by (customer, identifier), so a result
+    shared by several report names, or fetched again by a later run within `cache_ttl`
+    seconds, is downloaded only once. The cache holds at most `cache_max_bytes`, evicting
+    the least recently used archives, and `clear_cache()` drops it. Results without data
+    (not ready yet) are not cached and are requested again.
+    """
+
+    def __init__(self, base_url, username, password, cache_max_bytes=CACHE_MAX_BYTES, cache_ttl=CACHE_TTL):
+        self.base_url = base_url
+        self.session = create_session(username, password)
+        self.cache_max_bytes = cache_max_bytes
+        self.cache_ttl = cache_ttl
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self.downloads = 0
+        self.cache_hits = 0
+
+    def fetch_results_zip(self, customer_id, identifier):
+        """The ZIP archive of a report result, or None if the request failed or returned no data"""
+        key = (str(customer_id), str(identifier))
+        with self._lock:
+            self._evict_expired()
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return self._cache[key][0]
+
+        url = f"{self.base_url}/customer/{customer_id}/reports/results/{identifier}"
+        response = self.session.post(url, timeout=REQUEST_TIMEOUT)
+        if response.status_code != 200:
+            logging.error(f"Failed to fetch report {identifier} for customer {customer_id}: HTTP {response.status_code}")
+            return None
+
+        root = ET.fromstring(response.content)
+        data_element = root.find('Data')
+        zip_bytes = base64.b64decode(data_element.text) if data_element is not None and data_element.text else None
+
+        with self._lock:
+            self.downloads += 1
+            if zip_bytes and key not in self._cache and len(zip_bytes) <= self.cache_max_bytes:
+                self._cache[key] = (zip_bytes, time.monotonic())
+                self._cache_bytes += len(zip_bytes)
+                while self._cache_bytes > self.cache_max_bytes:
+                    _, (evicted, _) = self._cache.popitem(last=False)
+                    self._cache_bytes -= len(evicted)
+        return zip_bytes
+
+    def _evict_expired(self):
+        """Drop archives cached longer than `cache_ttl` ago; the caller holds the lock"""
+        cutoff = time.monotonic() - self.cache_ttl
+        for key in [key for key, (_, cached_at) in self._cache.items() if cached_at < cutoff]:
+            zip_bytes, _ = self._cache.pop(key)
+            self._cache_bytes -= len(zip_bytes)
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+            self._cache_bytes = 0
+
+    def close(self):
+        self.clear_cache()
+        self.session.close()
+
+
+_report_client = None
+_report_client_lock = threading.Lock()
+
+
+def get_report_client(base_url, username, password):
+    """Return the process-wide ReportClient, creating it on first use or when the API settings change"""
+    global _report_client
+    with _report_client_lock:
+        client = _report_client
+        if client is None or (client.base_url, client.session.auth) != (base_url, (username, password)):
+            if client is not None:
+                client.close()
+            client = _report_client = ReportClient(base_url, username, password)
+        return client
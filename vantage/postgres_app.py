@@ -1,5 +1,5 @@
 from scripts.download_and_extract import download_and_extract
-from scripts.load_extracted_data_psql import load_extracted_data_postgres
+from scripts.load_extracted_data_psql import load_snapshot_folders
 from configparser import ConfigParser
 import logging
 import os 
@@ -21,18 +21,18 @@ def find_dat_folder(extract_root):
 
 def orchestrate():
     paths = download_and_extract()
-    # get absolute path 
-    absoulte_path = os.path.abspath(os.getcwd())
-    
-    for customer_id, extract_path in paths.items():
-        logging.info(f"Starting Load for {customer_id} from {extract_path}")
 
+    # Every customer's tables are COPYed together from the client, see load_snapshot_folders
+    dat_folders = {}
+    for customer_id, extract_path in paths.items():
         dat_folder = find_dat_folder(extract_path)
+        if dat_folder is None:
+            logging.error(f"No .DAT files found for {customer_id} in {extract_path}")
+            continue
+        logging.info(f"Starting Load for {customer_id} from {dat_folder}")
+        dat_folders[customer_id] = dat_folder
 
-        print('...................',dat_folder)
-
-        file_path = os.path.join(absoulte_path,extract_path,customer_id)        
-        load_extracted_data_postgres(dat_folder)
+    load_snapshot_folders(dat_folders)
 
 if __name__ == "__main__":
     orchestrate()
@@ -1,7 +1,10 @@
-import requests, zipfile, io, os
+import requests, zipfile, os
 from configparser import ConfigParser
+import concurrent.futures
 import logging
+import shutil
 import ast
+import time
 from datetime import datetime
 
 config = ConfigParser()
@@ -9,46 +12,118 @@ config.read('config/config.ini')
 
 logging.basicConfig(filename='logs/loader.log', level=logging.INFO)
 
-def download_and_extract():
-    url = config['API']['base_url']
+SNAPSHOT_URL = "https://webapi.collaboratemd.com/v2/account/{customer_id}/snapshot"
+# Snapshots downloaded at once; each is a long single-connection transfer
+DEFAULT_DOWNLOAD_WORKERS = 4
+RESPONSE_CHUNK_SIZE = 1024 * 1024
+# (connect, read) timeouts in seconds; the read timeout applies between chunks, not to the whole body
+SNAPSHOT_TIMEOUT = (30, 300)
+# Only the table files are loaded; README.txt and meta/ stay in the archive
+EXTRACT_SUFFIXES = ('.dat',)
+
+
+def download_snapshot(customer_id, username, password, zip_file_path):
+    """Stream one customer's snapshot ZIP to disk; returns the byte count, or None on an HTTP error"""
+    url = SNAPSHOT_URL.format(customer_id=customer_id)
+    with requests.get(url, auth=(username, password), stream=True, timeout=SNAPSHOT_TIMEOUT) as response:
+        if response.status_code != 200:
+            logging.error(f'Download failed for {customer_id} - Status: {response.status_code}')
+            return None
+
+        size = 0
+        part_path = f"{zip_file_path}.part"
+        with open(part_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=RESPONSE_CHUNK_SIZE):
+                f.write(chunk)
+                size += len(chunk)
+        os.replace(part_path, zip_file_path)
+        return size
+
+
+def extract_members(zip_file_path, extract_path, suffixes=EXTRACT_SUFFIXES):
+    """Extract the members ending in `suffixes` (keeping their folders), one streamed member at a time"""
+    extracted = 0
+    with zipfile.ZipFile(zip_file_path, 'r') as z:
+        for member in z.infolist():
+            if member.is_dir() or not member.filename.lower().endswith(suffixes):
+                continue
+            z.extract(member, extract_path)
+            extracted += 1
+    return extracted
+
+
+def download_and_extract_customer(customer_id, username, password, download_path, extract_path):
+    """Download and extract one customer's snapshot; returns (extract path, stats) or None on failure"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    customer_download_path = os.path.join(download_path, f"{customer_id}_{timestamp}")
+    customer_extract_path = os.path.join(extract_path, f"{customer_id}_{timestamp}")
+    os.makedirs(customer_download_path, exist_ok=True)
+    os.makedirs(customer_extract_path, exist_ok=True)
+    zip_file_path = os.path.join(customer_download_path, f'snapshot_{timestamp}.zip')
+
+    started = time.perf_counter()
+    size = download_snapshot(customer_id, username, password, zip_file_path)
+    if size is None:
+        shutil.rmtree(customer_extract_path, ignore_errors=True)
+        return None
+    downloaded = time.perf_counter() - started
+    logging.info(f"Download Successful for {customer_id}")
+
+    files = extract_members(zip_file_path, customer_extract_path)
+    logging.info(f'Files extracted to {customer_extract_path}')
+
+    return customer_extract_path, {
+        'bytes': size,
+        'download_seconds': downloaded,
+        'total_seconds': time.perf_counter() - started,
+        'files': files,
+    }
+
+
+def download_and_extract(max_workers=DEFAULT_DOWNLOAD_WORKERS):
+    """
+    Download every customer's snapshot concurrently on `max_workers` threads, streaming
+    each response to disk and extracting its .DAT files.
+    Returns {customer_id: extract_path} for every customer that succeeded.
+    """
     username = config['API']['username']
     password = config['API']['password']
     #download_path = config['PATHS']['download_dir']
     #extract_path = config['PATHS']['extract_dir']
     download_path = os.path.abspath("downloads")
     extract_path = os.path.abspath("extracted")
-    
+
     # get list of account
-    customers = ast.literal_eval(config['CUSTOMERS']['accounts'])    
+    customers = ast.literal_eval(config['CUSTOMERS']['accounts'])
     paths = {}
-    
-    for customer_id in customers:
-        #url = f"https://webapi.collaboratemd.com/v2/customer/{customer_id}/snapshot"
-        url = f"https://webapi.collaboratemd.com/v2/account/{customer_id}/snapshot"
-        response = requests.get(url, auth=(username, password))
-
-        if response.status_code == 200:
-            
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            logging.info(f"Download Successful for {customer_id}")
-            customer_download_path = os.path.join(download_path, f"{customer_id}_{timestamp}")
-            customer_extract_path = os.path.join(extract_path, f"{customer_id}_{timestamp}")
-            
-            os.makedirs(customer_download_path, exist_ok=True)
-            os.makedirs(customer_extract_path, exist_ok=True)
-            zip_file_path = os.path.join(customer_download_path, f'snapshot_{timestamp}.zip')
-
-            with open(zip_file_path, 'wb') as f:
-                f.write(response.content)
-
-            with zipfile.ZipFile(zip_file_path, 'r') as z:
-                z.extractall(customer_extract_path)
-
-            logging.info(f'Files extracted to {extract_path}/{customer_id}')
-            logging.info(f'Files extracted to {customer_extract_path}')
-            
+
+    started = time.perf_counter()
+    total_bytes = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(customers)))) as executor:
+        future_to_customer = {
+            executor.submit(download_and_extract_customer, customer_id, username, password, download_path, extract_path): customer_id
+            for customer_id in customers
+        }
+        for fut in concurrent.futures.as_completed(future_to_customer):
+            customer_id = future_to_customer[fut]
+            try:
+                result = fut.result()
+            except Exception as e:
+                logging.error(f'Download failed for {customer_id} - {type(e).__name__}: {e}')
+                print(f"✗ Snapshot {customer_id}: {e}")
+                continue
+
+            if result is None:
+                print(f"✗ Snapshot {customer_id}: download failed (see logs/loader.log)")
+                continue
+
+            customer_extract_path, stats = result
             paths[customer_id] = customer_extract_path
+            total_bytes += stats['bytes']
+            rate = stats['bytes'] / stats['download_seconds'] / 1024 / 1024 if stats['download_seconds'] > 0 else 0
+            print(f"✓ Snapshot {customer_id}: {stats['bytes'] / 1024 / 1024:.1f} MB in {stats['download_seconds']:.1f}s "
+                  f"({rate:.1f} MB/s), {stats['files']} .DAT file(s) extracted, {stats['total_seconds']:.1f}s total")
 
-        else:
-            logging.error(f'Download failed for {customer_id} - Status: {response.status_code}')
-        return paths
\ No newline at end of file
+    elapsed = time.perf_counter() - started
+    print(f"Downloaded {len(paths)}/{len(customers)} snapshot(s), {total_bytes / 1024 / 1024:.1f} MB in {elapsed:.1f}s")
+    return paths
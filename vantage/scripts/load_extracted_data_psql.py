@@ -1,6 +1,10 @@
 import psycopg2
 import logging
 import os
+import re
+import time
+import queue
+import concurrent.futures
 from configparser import ConfigParser
 
 # Config setup
@@ -11,6 +15,12 @@ config.read('config/config.ini')
 os.makedirs('logs', exist_ok=True)
 logging.basicConfig(filename='logs/loader.log', level=logging.INFO)
 
+# Snapshot tables are COPYed concurrently, one table file per unit of work
+DEFAULT_LOAD_WORKERS = 4
+# COPY statements naming each table, its .DAT file and the COPY options
+LOAD_SQL_PATH = 'sql/psql-load.sql'
+COPY_STATEMENT_PATTERN = re.compile(r"COPY\s+(\w+)\s+FROM\s+'([^']+)'\s+WITH\s+\((.*?)\)\s*;", re.IGNORECASE | re.DOTALL)
+
 # PostgreSQL DB connection
 def postgres_connection():
     return psycopg2.connect(
@@ -50,32 +60,129 @@ def tables_exist(cursor):
     count = cursor.fetchone()[0]
     return count > 0
 
-# Main loader
-def load_extracted_data_postgres(extract_path):
+
+def load_copy_statements(sql_path=LOAD_SQL_PATH):
+    """[(table, file name, COPY options), ...] from the server-side COPY statements in `sql_path`"""
+    with open(sql_path, 'r') as f:
+        return COPY_STATEMENT_PATTERN.findall(f.read())
+
+
+def ensure_tables():
     conn = postgres_connection()
     cursor = conn.cursor()
-
     try:
         if tables_exist(cursor):
             logging.info('Tables already exist — skipping CREATE')
         else:
             logging.info('Tables not found — running postgres-create.sql')
             run_sql(cursor, 'sql/psql-create.sql')
+            conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
 
-        dat_path =extract_path.replace("\\", "/")
-        print('dat_path',dat_path)
-        
-        run_sql(cursor, 'sql/psql-load.sql', dat_path)
-        conn.commit()
-        logging.info(f'Data Load Complete for {dat_path}')
 
-    except Exception as e:
+def copy_table_file(conn, table, file_path, options):
+    """
+    Stream one .DAT file into `table` with COPY FROM STDIN and commit it on its own.
+    A failure rolls back only this table file. Returns the number of rows copied.
+    """
+    cursor = conn.cursor()
+    try:
+        with open(file_path, 'rb') as f:
+            cursor.copy_expert(f"COPY {table} FROM STDIN WITH ({options})", f)
+        row_count = cursor.rowcount
+        conn.commit()
+        return row_count
+    except Exception:
         conn.rollback()
-        logging.error(f'Error loading data from {dat_path} - {str(e)}')
-
+        raise
     finally:
         cursor.close()
-        conn.close()
+
+
+def load_snapshot_folders(dat_folders, max_workers=DEFAULT_LOAD_WORKERS):
+    """
+    Load the snapshot .DAT files of every folder in `dat_folders` ({label: folder}).
+
+    Each (folder, table) file is its own unit of work, COPYed from the client over one of
+    `max_workers` connections, so the database server needs no access to the files. Tables
+    load concurrently and independently: a failing file is rolled back and reported
+    without affecting the others. Returns a list of per-file results.
+    """
+    ensure_tables()
+    statements = load_copy_statements()
+
+    tasks = []
+    for label, folder in dat_folders.items():
+        for table, filename, options in statements:
+            file_path = os.path.join(folder, filename)
+            if os.path.exists(file_path):
+                tasks.append((label, table, file_path, options))
+            else:
+                logging.warning(f"File not found: {file_path} (skipping table '{table}')")
+
+    # One connection per worker, reused across that worker's table files
+    connections = queue.Queue()
+    opened = []
+    workers = max(1, min(max_workers, len(tasks)))
+
+    def run(label, table, file_path, options):
+        try:
+            conn = connections.get_nowait()
+        except queue.Empty:
+            conn = postgres_connection()
+            opened.append(conn)
+
+        started = time.perf_counter()
+        try:
+            rows = copy_table_file(conn, table, file_path, options)
+        finally:
+            connections.put(conn)
+        return rows, time.perf_counter() - started
+
+    results = []
+    started = time.perf_counter()
+    print(f"Loading {len(tasks)} table file(s) from {len(dat_folders)} snapshot(s) on {workers} connection(s)")
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            future_to_task = {executor.submit(run, *task): task for task in tasks}
+            for fut in concurrent.futures.as_completed(future_to_task):
+                label, table, file_path, _ = future_to_task[fut]
+                try:
+                    rows, elapsed = fut.result()
+                except Exception as e:
+                    logging.error(f"Failed to load {table} from {file_path}: {type(e).__name__}: {e}")
+                    print(f"✗ {table} ({label}): {str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__}")
+                    results.append({'customer': label, 'table': table, 'file': file_path, 'error': str(e).strip()})
+                    continue
+
+                rate = rows / elapsed if elapsed > 0 else 0
+                logging.info(f"Loaded {rows} rows into {table} from {file_path} in {elapsed:.2f}s")
+                print(f"✓ {table} ({label}): {rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)")
+                results.append({'customer': label, 'table': table, 'file': file_path, 'rows': rows, 'seconds': elapsed})
+    finally:
+        for conn in opened:
+            conn.close()
+
+    failed = [r for r in results if 'error' in r]
+    total_rows = sum(r.get('rows', 0) for r in results)
+    print(f"Loaded {total_rows:,} rows from {len(results) - len(failed)}/{len(tasks)} table file(s) "
+          f"in {time.perf_counter() - started:.2f}s ({len(failed)} failed)")
+    return results
+
+
+# Main loader
+def load_extracted_data_postgres(extract_path, max_workers=DEFAULT_LOAD_WORKERS):
+    dat_path = extract_path.replace("\\", "/")
+    print('dat_path', dat_path)
+
+    results = load_snapshot_folders({dat_path: dat_path}, max_workers)
+    if any('error' in r for r in results):
+        logging.error(f'Data Load finished with errors for {dat_path}')
+    else:
+        logging.info(f'Data Load Complete for {dat_path}')
+    return results
 
 
 # Example usage
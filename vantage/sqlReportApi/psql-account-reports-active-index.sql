@@ -0,0 +1,24 @@
+-- Enforce a single active identifier per (instance_key, customer_account, report_name).
+-- Identifier rotation (generate_identifiers.handle_report_response) relies on this index
+-- for its INSERT ... ON CONFLICT upsert. Run after psql-account-reports.sql.
+
+-- Step 1: Add instance_key for multi-instance deployments (legacy rows get 'default')
+ALTER TABLE account_reports ADD COLUMN IF NOT EXISTS instance_key VARCHAR(50) NOT NULL DEFAULT 'default';
+
+-- Step 2: Retire all but the newest active row for each report so the index can be built.
+-- The retired rows are listed; the newest row (highest id) of each report stays active.
+UPDATE account_reports ar
+SET status = 0
+FROM (
+    SELECT id,
+           row_number() OVER (PARTITION BY instance_key, customer_account, report_name ORDER BY id DESC) AS rn
+    FROM account_reports
+    WHERE status = 1
+) ranked
+WHERE ar.id = ranked.id AND ranked.rn > 1
+RETURNING ar.id, ar.instance_key, ar.customer_account, ar.report_name, ar.identifier;
+
+-- Step 3: Unique partial index over the active rows
+CREATE UNIQUE INDEX IF NOT EXISTS uq_account_reports_active
+    ON account_reports (instance_key, customer_account, report_name)
+    WHERE status = 1;